@@ -0,0 +1,41 @@
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+
+from .tokens import is_revoked
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that trusts the claims in the access token.
+
+    With ``JWT_CLAIMS_USER``, tokens carrying the claims from
+    ``accounts/tokens.py`` authenticate as a lazy ``User`` built without a
+    query. Other tokens load the user from the database as before, which
+    also checks ``is_active``. Revoked tokens are refused either way.
+    """
+
+    def get_user(self, validated_token):
+        claims = [api_settings.USER_ID_CLAIM, *self.user_model.TOKEN_CLAIM_FIELDS]
+        if getattr(settings, "JWT_CLAIMS_USER", False) and all(
+            claim in validated_token for claim in claims
+        ):
+            self.check_revoked(validated_token)
+            return self.user_model.from_token_claims(
+                validated_token[api_settings.USER_ID_CLAIM],
+                {
+                    name: validated_token[name]
+                    for name in self.user_model.TOKEN_CLAIM_FIELDS
+                },
+            )
+        user = super().get_user(validated_token)
+        self.check_revoked(validated_token, user.token_generation)
+        return user
+
+    def check_revoked(self, validated_token, generation=None):
+        if is_revoked(validated_token, generation):
+            raise AuthenticationFailed(
+                _("Token has been revoked"), code="token_revoked"
+            )
@@ -0,0 +1,35 @@
+"""
+Password hashers with their cost parameters taken from settings.
+
+``PASSWORD_HASHER_PROFILE`` picks which of them hashes new passwords, the
+other stays in ``PASSWORD_HASHERS`` so existing hashes keep verifying.
+Django's ``check_password`` rehashes a password whenever its stored hash
+was made by another hasher or with other parameters, so switching profile
+or retuning costs upgrades every account on its next successful login.
+"""
+
+from django.conf import settings
+from django.contrib.auth.hashers import (
+    Argon2PasswordHasher,
+    PBKDF2PasswordHasher,
+)
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    @property
+    def time_cost(self):
+        return settings.PASSWORD_ARGON2_PARAMS["time_cost"]
+
+    @property
+    def memory_cost(self):
+        return settings.PASSWORD_ARGON2_PARAMS["memory_cost"]
+
+    @property
+    def parallelism(self):
+        return settings.PASSWORD_ARGON2_PARAMS["parallelism"]
+
+
+class TunedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    @property
+    def iterations(self):
+        return settings.PASSWORD_PBKDF2_ITERATIONS
@@ -0,0 +1,70 @@
+"""
+Deferred, batched ``last_login`` updates.
+
+Logins record the time in a per-process buffer instead of issuing an
+``UPDATE`` each. The buffer is written with a single ``bulk_update`` once it
+holds ``LAST_LOGIN_BATCH_SIZE`` users or ``LAST_LOGIN_FLUSH_INTERVAL`` seconds
+after its first entry, and when the process exits. ``last_login`` may lag
+by up to the interval and is lost if a worker is killed before flushing;
+nothing in the application relies on it being exact.
+"""
+
+import atexit
+import threading
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connections
+from django.utils import timezone
+
+
+class LastLoginWriter:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._timer = None
+
+    def record(self, user_id, when=None):
+        with self._lock:
+            self._pending[user_id] = when or timezone.now()
+            full = len(self._pending) >= settings.LAST_LOGIN_BATCH_SIZE
+            if not full and self._timer is None:
+                self._timer = threading.Timer(
+                    settings.LAST_LOGIN_FLUSH_INTERVAL, self._flush_in_background
+                )
+                self._timer.daemon = True
+                self._timer.start()
+        if full:
+            self.flush()
+
+    def pending(self):
+        with self._lock:
+            return dict(self._pending)
+
+    def flush(self):
+        """Write every pending time, returns the number of users updated"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if not pending:
+            return 0
+        User = get_user_model()
+        # bulk_update sends no signals, a login is not a session change
+        User.objects.bulk_update(
+            [User(pk=pk, last_login=when) for pk, when in pending.items()],
+            ["last_login"],
+        )
+        return len(pending)
+
+    def _flush_in_background(self):
+        try:
+            self.flush()
+        finally:
+            # The timer thread opened its own connection
+            connections.close_all()
+
+
+last_login_writer = LastLoginWriter()
+atexit.register(last_login_writer.flush)
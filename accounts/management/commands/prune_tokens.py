@@ -0,0 +1,45 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from accounts.revocation import copy_blacklist_to_cache, prune_expired_tokens
+from core.jobs import run_periodically
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete expired refresh tokens from the token blacklist tables. Runs "
+        "once, or every --interval seconds when given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--interval",
+            type=int,
+            default=0,
+            help="Keep running and prune every INTERVAL seconds",
+        )
+        parser.add_argument(
+            "--copy-to-cache",
+            action="store_true",
+            help="Also revoke still valid blacklisted tokens in the cache store",
+        )
+
+    def handle(self, *args, **options):
+        if options["copy_to_cache"]:
+            copied = copy_blacklist_to_cache(timezone.now())
+            self.stdout.write(f"copied={copied} blacklisted tokens to the cache")
+
+        def run():
+            started = time.perf_counter()
+            removed = prune_expired_tokens(
+                timezone.now(), batch_size=options["batch_size"]
+            )
+            self.stdout.write(
+                f"removed={removed} expired tokens "
+                f"in {(time.perf_counter() - started) * 1000:.1f}ms"
+            )
+
+        run_periodically(run, options["interval"])
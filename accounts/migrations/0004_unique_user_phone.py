@@ -0,0 +1,81 @@
+# Generated by Django 5.2 on 2026-10-19 07:19
+
+import phonenumber_field.modelfields
+import phonenumbers
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models.functions import Cast
+
+
+def normalize_phones(apps, schema_editor):
+    """
+    Store every parseable phone as E.164 before the unique index is built,
+    so the index compares numbers rather than spellings of them. Numbers
+    that then belong to several users are reported and stop the migration
+    before anything is written: which account keeps the number is for an
+    operator to decide.
+    """
+    User = apps.get_model("accounts", "User")
+    db = schema_editor.connection.alias
+    region = getattr(settings, "PHONENUMBER_DEFAULT_REGION", None)
+
+    # The text as stored, without the field's own parsing
+    rows = (
+        User.objects.using(db)
+        .annotate(raw=Cast("phone", output_field=models.CharField()))
+        .order_by("pk")
+        .values_list("pk", "raw")
+    )
+    changed, unparsed, owners = [], [], {}
+    for pk, raw in rows.iterator():
+        stored = raw or ""
+        try:
+            number = phonenumbers.parse(stored.strip(), region)
+        except phonenumbers.NumberParseException:
+            number = None
+        if number is not None and phonenumbers.is_valid_number(number):
+            normalized = phonenumbers.format_number(
+                number, phonenumbers.PhoneNumberFormat.E164
+            )
+        else:
+            normalized = stored.strip()
+            unparsed.append(pk)
+        if normalized != stored:
+            changed.append(User(pk=pk, phone=normalized))
+        owners.setdefault(normalized, []).append(pk)
+
+    duplicates = {phone: pks for phone, pks in owners.items() if len(pks) > 1}
+    if duplicates:
+        report = "\n".join(
+            f"  {phone}: users {', '.join(map(str, pks))}"
+            for phone, pks in sorted(duplicates.items())
+        )
+        raise RuntimeError(
+            "Phone numbers must be unique before accounts.0004 can add the "
+            "unique index. These numbers belong to more than one user:\n"
+            f"{report}\nChange all but one of each, then migrate again."
+        )
+
+    User.objects.using(db).bulk_update(changed, ["phone"], batch_size=500)
+    if changed:
+        print(f"\n  Normalized {len(changed)} phone numbers to E.164")
+    if unparsed:
+        print(f"\n  Left {len(unparsed)} unparseable phone numbers as is: {unparsed}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0003_alter_user_options_alter_user_managers_user_role_and_more"),
+    ]
+
+    operations = [
+        migrations.RunPython(normalize_phones, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="user",
+            name="phone",
+            field=phonenumber_field.modelfields.PhoneNumberField(
+                max_length=128, region=None, unique=True
+            ),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-19 07:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0004_unique_user_phone"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="token_generation",
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+    ]
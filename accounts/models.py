@@ -1,6 +1,8 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser, BaseUserManager
+from django.utils.translation import gettext_lazy as _
 from phonenumber_field.modelfields import PhoneNumberField
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
 
 
 class UserManager(BaseUserManager):
@@ -45,7 +47,8 @@ class User(AbstractUser):
     email = models.EmailField(unique=True)
     first_name = models.CharField(max_length=150)
     last_name = models.CharField(max_length=150)
-    phone = PhoneNumberField()
+    # Stored as E.164, so the unique index is over the normalized number
+    phone = PhoneNumberField(unique=True)
     date_of_birth = models.DateField(null=True, blank=True)
     role = models.CharField(
         max_length=10,
@@ -53,10 +56,17 @@ class User(AbstractUser):
         default=Role.PATIENT,
         help_text="User role in the system",
     )
+    # Tokens issued before this generation are revoked, see accounts/tokens.py
+    token_generation = models.BigIntegerField(default=0, editable=False)
 
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = ["first_name", "last_name", "phone"]
 
+    # Carried in access tokens, see accounts/tokens.py
+    TOKEN_CLAIM_FIELDS = ("role", "is_staff", "is_superuser")
+    # Changing any of these revokes the user's tokens
+    SESSION_FIELDS = (*TOKEN_CLAIM_FIELDS, "is_active", "password")
+
     objects = UserManager()
 
     class Meta:
@@ -67,3 +77,87 @@ class User(AbstractUser):
 
     def __str__(self):
         return f"{self.get_full_name()} <{self.email}>"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        user = super().from_db(db, field_names, values)
+        user.remember_session()
+        return user
+
+    @classmethod
+    def from_token_claims(cls, user_id, claims, using="default"):
+        """
+        A user built from token claims alone. Every other field is deferred;
+        touching any of them loads all of them in a single query.
+
+        Only called for tokens that are not revoked, and deactivating a user
+        revokes their tokens, so the user is active.
+        """
+        known = {"id": user_id, "is_active": True}
+        known.update((name, claims[name]) for name in cls.TOKEN_CLAIM_FIELDS)
+        # from_db expects values in field order
+        names = [
+            field.attname
+            for field in cls._meta.concrete_fields
+            if field.attname in known
+        ]
+        values = [known[name] for name in names]
+        user = cls.from_db(using, names, values)
+        user._load_deferred_together = True
+        return user
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        if fields is not None and getattr(self, "_load_deferred_together", False):
+            deferred = self.get_deferred_fields()
+            if deferred.issuperset(fields):
+                fields = deferred
+        try:
+            super().refresh_from_db(using, fields, from_queryset)
+        except self.DoesNotExist:
+            if not getattr(self, "_load_deferred_together", False):
+                raise
+            # Deleted after the token was checked, answer 401 rather than 500
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+        # Values just read from the database are not changes
+        loaded = getattr(self, "_loaded_session", {})
+        for name in self.SESSION_FIELDS:
+            if name in self.__dict__ and (fields is None or name in fields):
+                loaded[name] = self.__dict__[name]
+        self._loaded_session = loaded
+
+    def save(self, *args, **kwargs):
+        # Only revoke_user_tokens() writes the generation, so that saving a
+        # stale instance cannot bring revoked tokens back
+        if (
+            not self._state.adding
+            and not kwargs.get("force_insert")
+            and kwargs.get("update_fields") is None
+        ):
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != "token_generation"
+            ]
+        super().save(*args, **kwargs)
+
+    def remember_session(self):
+        self._loaded_session = {
+            name: self.__dict__[name]
+            for name in self.SESSION_FIELDS
+            if name in self.__dict__
+        }
+
+    def session_changed(self):
+        """Whether a field in SESSION_FIELDS was set since loading"""
+        loaded = getattr(self, "_loaded_session", {})
+        changed = {
+            name
+            for name in self.SESSION_FIELDS
+            if name in self.__dict__
+            and (name not in loaded or self.__dict__[name] != loaded[name])
+        }
+        if self._password is None:
+            # Rehashing on login replaces the hash but not the password;
+            # set_password() is what marks a real change
+            changed.discard("password")
+        return bool(changed)
@@ -0,0 +1,104 @@
+"""
+Where revoked (logged out or rotated) refresh tokens are remembered.
+
+``TOKEN_REVOCATION_STORE`` names the store used by ``ClaimsRefreshToken``:
+
+* ``CacheRevocationStore``: one key per revoked ``jti`` in the shared cache,
+  expiring together with the token. Issuing a token writes nothing, and
+  checking or revoking one is a single cache operation however many tokens
+  have been issued. Needs a cache shared by all workers (``REDIS_URL``)
+  and is the default when there is one.
+* ``DatabaseRevocationStore``: simplejwt's ``OutstandingToken`` and
+  ``BlacklistedToken`` tables, the default otherwise. Every issued token is
+  a row; the ``prune_tokens`` command deletes the expired ones.
+"""
+
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.module_loading import import_string
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import (
+    BlacklistedToken,
+    OutstandingToken,
+)
+from rest_framework_simplejwt.tokens import RefreshToken, Token
+from rest_framework_simplejwt.utils import datetime_to_epoch
+
+
+class CacheRevocationStore:
+    prefix = "accounts:revoked-token:"
+
+    def outstand(self, token):
+        pass
+
+    def revoke_jti(self, jti, timeout):
+        if timeout > 0:
+            cache.set(self.prefix + jti, True, timeout=timeout)
+
+    def revoke(self, token):
+        remaining = token["exp"] - datetime_to_epoch(token.current_time)
+        self.revoke_jti(token[api_settings.JTI_CLAIM], remaining)
+
+    def is_revoked(self, token):
+        return cache.get(self.prefix + token[api_settings.JTI_CLAIM], False)
+
+
+class DatabaseRevocationStore:
+    def outstand(self, token):
+        Token.outstand(token)
+
+    def revoke(self, token):
+        RefreshToken.blacklist(token)
+
+    def is_revoked(self, token):
+        return BlacklistedToken.objects.filter(
+            token__jti=token[api_settings.JTI_CLAIM]
+        ).exists()
+
+
+@lru_cache
+def _load(path):
+    return import_string(path)()
+
+
+def get_store():
+    return _load(settings.TOKEN_REVOCATION_STORE)
+
+
+def prune_expired_tokens(now, batch_size=1000):
+    """
+    Delete expired rows from the blacklist tables in batches, returns the
+    number of outstanding tokens removed.
+    """
+    removed = 0
+    while True:
+        # Tokens expire in issue order, so expired rows form a prefix of
+        # the primary key and this stops early on an index scan
+        ids = list(
+            OutstandingToken.objects.filter(expires_at__lte=now)
+            .order_by("id")
+            .values_list("id", flat=True)[:batch_size]
+        )
+        if not ids:
+            return removed
+        BlacklistedToken.objects.filter(token_id__in=ids).delete()
+        OutstandingToken.objects.filter(id__in=ids).delete()
+        removed += len(ids)
+
+
+def copy_blacklist_to_cache(now):
+    """
+    Revoke the still valid blacklisted tokens in the cache store, for the
+    switch from the database store. Returns the number copied.
+    """
+    store = CacheRevocationStore()
+    rows = BlacklistedToken.objects.filter(token__expires_at__gt=now).values_list(
+        "token__jti", "token__expires_at"
+    )
+    copied = 0
+    for jti, expires_at in rows.iterator():
+        store.revoke_jti(jti, (expires_at - now).total_seconds())
+        copied += 1
+    return copied
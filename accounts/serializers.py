@@ -1,6 +1,16 @@
 from django.core.validators import MinLengthValidator
+from django.db import IntegrityError, transaction
 from rest_framework import serializers
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from core.integrity import raise_unique_violations
 from .models import User
+from .tokens import ClaimsRefreshToken
+
+# Enforced by unique constraints, reported from the IntegrityError
+USER_UNIQUE_MESSAGES = {
+    "email": "A user with this email already exists.",
+    "phone": "A user with this phone number already exists.",
+}
 
 
 class UserRegisterSerializer(serializers.ModelSerializer):
@@ -27,6 +37,8 @@ class UserRegisterSerializer(serializers.ModelSerializer):
             "password",
             "confirm_password",
         ]
+        # Uniqueness is left to the database, see create()
+        extra_kwargs = {"email": {"validators": []}, "phone": {"validators": []}}
 
     def validate(self, attrs):
         if attrs["password"] != attrs["confirm_password"]:
@@ -35,18 +47,6 @@ class UserRegisterSerializer(serializers.ModelSerializer):
             )
         return attrs
 
-    def validate_email(self, value):
-        if User.objects.filter(email=value).exists():
-            raise serializers.ValidationError("A user with this email already exists.")
-        return value
-
-    def validate_phone(self, value):
-        if User.objects.filter(phone=value).exists():
-            raise serializers.ValidationError(
-                "A user with this phone number already exists."
-            )
-        return value
-
     def create(self, validated_data):
         validated_data.pop(
             "confirm_password"
@@ -54,7 +54,11 @@ class UserRegisterSerializer(serializers.ModelSerializer):
         password = validated_data.pop("password")  # Remove password from validated_data
         user = User(**validated_data)  # Create user without password
         user.set_password(password)  # Set password with proper hashing
-        user.save()
+        try:
+            with transaction.atomic():
+                user.save()
+        except IntegrityError as e:
+            raise_unique_violations(e, (User, USER_UNIQUE_MESSAGES))
         return user
 
 
@@ -68,9 +72,15 @@ class UserLoginSerializer(serializers.Serializer):
         email = attrs.get("email")
         password = attrs.get("password")
 
-        user = User.objects.filter(email=email).first()
+        try:
+            user = User.objects.get(email=email)
+        except User.DoesNotExist:
+            # Hash anyway so unknown emails take as long as wrong passwords
+            User().set_password(password)
+            raise serializers.ValidationError("Invalid email or password.")
 
-        if not user or not user.check_password(password):
+        # Also rehashes the password if it was hashed with other settings
+        if not user.check_password(password):
             raise serializers.ValidationError("Invalid email or password.")
 
         attrs["user"] = user
@@ -93,3 +103,9 @@ class UserProfileSerializer(serializers.ModelSerializer):
             "last_login",
         ]
         read_only_fields = ["email", "role", "date_joined", "last_login"]
+
+
+class ClaimsTokenRefreshSerializer(TokenRefreshSerializer):
+    """Token refresh that refuses revoked refresh tokens"""
+
+    token_class = ClaimsRefreshToken
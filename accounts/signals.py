@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .tokens import revoke_user_tokens
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def revoke_tokens_on_session_change(sender, instance, created, **kwargs):
+    if not created and instance.session_changed():
+        # Tokens issued from this instance afterwards are valid again
+        instance.token_generation = revoke_user_tokens(instance.pk)
+    instance.remember_session()
+
+
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def revoke_tokens_on_delete(sender, instance, **kwargs):
+    revoke_user_tokens(instance.pk)
@@ -1,3 +1,416 @@
-from django.test import TestCase
+from contextlib import redirect_stdout
+from datetime import timedelta
+from importlib import import_module
+from io import StringIO
+from itertools import count
+from types import SimpleNamespace
+from unittest.mock import patch
 
-# Create your tests here.
+from django.apps import apps as django_apps
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import (
+    BlacklistedToken,
+    OutstandingToken,
+)
+from rest_framework import status
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APIRequestFactory, APITestCase
+
+from .authentication import ClaimsJWTAuthentication
+from .last_login import last_login_writer
+from .models import User
+from .revocation import copy_blacklist_to_cache, prune_expired_tokens
+from .tokens import ClaimsRefreshToken
+
+PHONES = count(11000000)
+
+
+def make_user(email="patient@example.com", **extra):
+    return User.objects.create_user(
+        email,
+        "Abebe",
+        "Kebede",
+        f"+2519{next(PHONES)}",
+        password="s3cret-pass",
+        **extra,
+    )
+
+
+@override_settings(JWT_CLAIMS_USER=True)
+class ClaimsAuthenticationTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = make_user()
+        self.factory = APIRequestFactory()
+
+    def authenticate(self, token):
+        request = self.factory.get("/", HTTP_AUTHORIZATION=f"Bearer {token}")
+        return ClaimsJWTAuthentication().authenticate(request)[0]
+
+    def test_claims_user_is_lazy(self):
+        access = ClaimsRefreshToken.for_user(self.user).access_token
+        with self.assertNumQueries(1):
+            # The token generation, read back into the cache
+            self.authenticate(access)
+        with self.assertNumQueries(0):
+            user = self.authenticate(access)
+            self.assertEqual(user.pk, self.user.pk)
+            self.assertEqual(user.role, User.Role.PATIENT)
+            self.assertFalse(user.is_staff)
+            self.assertTrue(user.is_authenticated)
+        with self.assertNumQueries(1):
+            # The first other field loads the whole row
+            self.assertEqual(user.email, "patient@example.com")
+            self.assertEqual(user.first_name, "Abebe")
+            self.assertTrue(user.check_password("s3cret-pass"))
+
+    @override_settings(JWT_CLAIMS_USER=False)
+    def test_can_be_turned_off(self):
+        access = ClaimsRefreshToken.for_user(self.user).access_token
+        with self.assertNumQueries(1):
+            self.authenticate(access)
+
+    def test_profile_endpoint(self):
+        response = self.client.post(
+            reverse("user-login"),
+            {"email": "patient@example.com", "password": "s3cret-pass"},
+        )
+        access = response.data["tokens"]["access"]
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+        self.client.get(reverse("user-profile"))
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("user-profile"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["email"], "patient@example.com")
+
+    def test_profile_update_keeps_session(self):
+        access = ClaimsRefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(
+                reverse("user-profile"), {"first_name": "Abebech"}
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.get(reverse("user-profile"))
+        self.assertEqual(response.data["first_name"], "Abebech")
+
+    def test_session_changes_revoke_tokens(self):
+        refresh = ClaimsRefreshToken.for_user(self.user)
+        access = refresh.access_token
+
+        # Profile edits and logins keep the session
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.first_name = "Abebech"
+            self.user.save()
+        self.assertEqual(self.authenticate(access).pk, self.user.pk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_staff = True
+            self.user.save()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+        response = self.client.get(reverse("user-profile"))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        response = self.client.post(reverse("token-refresh"), {"refresh": str(refresh)})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        # Tokens issued afterwards carry the new claims
+        user = self.authenticate(ClaimsRefreshToken.for_user(self.user).access_token)
+        self.assertTrue(user.is_staff)
+
+    def test_password_change_revokes_tokens(self):
+        access = ClaimsRefreshToken.for_user(self.user).access_token
+        user = self.authenticate(access)
+        with self.captureOnCommitCallbacks(execute=True):
+            user.set_password("n3w-secret-pass")
+            user.save()
+        response = self.client.get(
+            reverse("user-profile"), HTTP_AUTHORIZATION=f"Bearer {access}"
+        )
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_revocation_survives_cache_loss(self):
+        access = ClaimsRefreshToken.for_user(self.user).access_token
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.role = User.Role.DOCTOR
+            self.user.save()
+        cache.clear()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(access)
+        # The generation read back from the row is cached again
+        with self.assertNumQueries(0), self.assertRaises(AuthenticationFailed):
+            self.authenticate(access)
+
+    def test_stale_instance_cannot_restore_revoked_tokens(self):
+        access = ClaimsRefreshToken.for_user(self.user).access_token
+        stale = User.objects.get(pk=self.user.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.set_password("n3w-secret-pass")
+            self.user.save()
+        stale.first_name = "Abebech"
+        stale.save()
+        cache.clear()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(access)
+
+    def test_deleted_user_gets_401(self):
+        access = ClaimsRefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+        # Deleted between the token check and the first field access
+        with patch("accounts.authentication.is_revoked", return_value=False):
+            User.objects.filter(pk=self.user.pk).delete()
+            response = self.client.get(reverse("user-profile"))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            other = make_user("other@example.com")
+            access = ClaimsRefreshToken.for_user(other).access_token
+            other.delete()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(access)
+
+
+class DatabaseAuthenticationTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = make_user()
+        self.factory = APIRequestFactory()
+
+    def authenticate(self, token):
+        request = self.factory.get("/", HTTP_AUTHORIZATION=f"Bearer {token}")
+        return ClaimsJWTAuthentication().authenticate(request)[0]
+
+    def test_inactive_and_revoked_users_are_refused(self):
+        access = ClaimsRefreshToken.for_user(self.user).access_token
+        with self.assertNumQueries(1):
+            self.assertEqual(self.authenticate(access).pk, self.user.pk)
+
+        # Revocations need no cache at all
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        with self.assertRaisesMessage(AuthenticationFailed, "User is inactive"):
+            self.authenticate(access)
+        User.objects.filter(pk=self.user.pk).update(is_active=True)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_staff = True
+            self.user.save()
+        cache.clear()
+        with self.assertRaisesMessage(AuthenticationFailed, "revoked"):
+            self.authenticate(access)
+
+
+@override_settings(
+    PASSWORD_HASHERS=["accounts.hashers.TunedPBKDF2PasswordHasher"],
+    PASSWORD_PBKDF2_ITERATIONS=1000,
+    LAST_LOGIN_FLUSH_INTERVAL=3600,
+    # Query counts below leave out the database store's outstanding tokens
+    TOKEN_REVOCATION_STORE="accounts.revocation.CacheRevocationStore",
+)
+class LoginTests(APITestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.addCleanup(last_login_writer.flush)
+
+    def login(self, email="patient@example.com", password="s3cret-pass"):
+        return self.client.post(
+            reverse("user-login"), {"email": email, "password": password}
+        )
+
+    def test_rehash_on_login_keeps_sessions(self):
+        access = ClaimsRefreshToken.for_user(self.user).access_token
+        with self.settings(PASSWORD_PBKDF2_ITERATIONS=2000):
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.login()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith("pbkdf2_sha256$2000$"))
+
+        response = self.client.get(
+            reverse("user-profile"), HTTP_AUTHORIZATION=f"Bearer {access}"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_invalid_credentials(self):
+        self.assertEqual(
+            self.login(password="wrong-pass").status_code,
+            status.HTTP_400_BAD_REQUEST,
+        )
+        self.assertEqual(
+            self.login(email="nobody@example.com").status_code,
+            status.HTTP_400_BAD_REQUEST,
+        )
+
+    def test_last_login_is_batched(self):
+        other = make_user("other@example.com")
+        with self.assertNumQueries(1):
+            # Only the user lookup, no UPDATE
+            self.login()
+        self.login("other@example.com")
+        self.assertEqual(set(last_login_writer.pending()), {self.user.pk, other.pk})
+
+        with self.assertNumQueries(1):
+            self.assertEqual(last_login_writer.flush(), 2)
+        self.user.refresh_from_db()
+        self.assertIsNotNone(self.user.last_login)
+        self.assertEqual(last_login_writer.pending(), {})
+
+
+class RevocationStoreTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = make_user()
+
+    def refresh(self, token):
+        return self.client.post(reverse("token-refresh"), {"refresh": str(token)})
+
+    def logout(self, token):
+        access = ClaimsRefreshToken.for_user(self.user).access_token
+        return self.client.post(
+            reverse("user-logout"),
+            {"refresh": str(token)},
+            HTTP_AUTHORIZATION=f"Bearer {access}",
+        )
+
+    # Both need a shared cache and are used together
+    @override_settings(
+        JWT_CLAIMS_USER=True,
+        TOKEN_REVOCATION_STORE="accounts.revocation.CacheRevocationStore",
+    )
+    def test_cache_store(self):
+        with self.assertNumQueries(0):
+            token = ClaimsRefreshToken.for_user(self.user)
+        with self.assertNumQueries(2):
+            # The token generation, read back into the cache, and the active
+            # user check of the refresh serializer
+            response = self.refresh(token)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # Rotation revoked the old token
+        self.assertEqual(self.refresh(token).status_code, status.HTTP_401_UNAUTHORIZED)
+
+        rotated = response.data["refresh"]
+        with self.assertNumQueries(0):
+            response = self.logout(rotated)
+        self.assertEqual(response.status_code, status.HTTP_205_RESET_CONTENT)
+        self.assertEqual(
+            self.refresh(rotated).status_code, status.HTTP_401_UNAUTHORIZED
+        )
+        self.assertFalse(OutstandingToken.objects.exists())
+
+    @override_settings(
+        TOKEN_REVOCATION_STORE="accounts.revocation.DatabaseRevocationStore"
+    )
+    def test_database_store(self):
+        token = ClaimsRefreshToken.for_user(self.user)
+        self.assertEqual(OutstandingToken.objects.count(), 1)
+        self.assertEqual(self.logout(token).status_code, status.HTTP_205_RESET_CONTENT)
+        self.assertEqual(BlacklistedToken.objects.count(), 1)
+        self.assertEqual(self.refresh(token).status_code, status.HTTP_401_UNAUTHORIZED)
+
+        # Blacklisted tokens carry over when switching to the cache store
+        self.assertEqual(copy_blacklist_to_cache(timezone.now()), 1)
+        with self.settings(
+            TOKEN_REVOCATION_STORE="accounts.revocation.CacheRevocationStore"
+        ):
+            self.assertEqual(
+                self.refresh(token).status_code, status.HTTP_401_UNAUTHORIZED
+            )
+
+    def test_prune_expired_tokens(self):
+        now = timezone.now()
+        tokens = OutstandingToken.objects.bulk_create(
+            OutstandingToken(
+                user=self.user,
+                jti=f"jti-{i}",
+                token="x",
+                expires_at=now + timedelta(days=i - 5),
+            )
+            for i in range(8)
+        )
+        BlacklistedToken.objects.bulk_create(
+            BlacklistedToken(token=token) for token in tokens[::2]
+        )
+        self.assertEqual(prune_expired_tokens(now, batch_size=2), 6)
+        self.assertEqual(
+            set(OutstandingToken.objects.values_list("jti", flat=True)),
+            {"jti-6", "jti-7"},
+        )
+        self.assertEqual(BlacklistedToken.objects.count(), 1)
+
+
+@override_settings(
+    # Query counts below leave out the database store's outstanding tokens
+    TOKEN_REVOCATION_STORE="accounts.revocation.CacheRevocationStore",
+)
+class RegistrationTests(APITestCase):
+    def register(self, **overrides):
+        data = {
+            "email": "new@example.com",
+            "first_name": "Abebe",
+            "last_name": "Kebede",
+            "phone": "+251911999999",
+            "password": "s3cret-pass",
+            "confirm_password": "s3cret-pass",
+            **overrides,
+        }
+        return self.client.post(reverse("user-register"), data)
+
+    def test_register_checks_uniqueness_with_the_insert(self):
+        with self.assertNumQueries(3):
+            # The INSERT in its savepoint, no exists() checks before it
+            response = self.register()
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        response = self.register(phone="+251911999998")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            response.data, {"email": ["A user with this email already exists."]}
+        )
+
+        response = self.register(email="other@example.com", phone="+251 91 199 9999")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            response.data,
+            {"phone": ["A user with this phone number already exists."]},
+        )
+        self.assertEqual(User.objects.count(), 1)
+
+
+class NormalizePhonesMigrationTests(APITestCase):
+    def normalize(self):
+        migration = import_module("accounts.migrations.0004_unique_user_phone")
+        editor = SimpleNamespace(connection=connection)
+        with redirect_stdout(StringIO()) as output:
+            migration.normalize_phones(django_apps, editor)
+        return output.getvalue()
+
+    def store_raw(self, user, phone):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "UPDATE accounts_user SET phone = %s WHERE id = %s", [phone, user.pk]
+            )
+
+    @override_settings(PHONENUMBER_DEFAULT_REGION="ET")
+    def test_phones_are_normalized_and_duplicates_reported(self):
+        first, second, third = (make_user(f"user{i}@example.com") for i in range(3))
+        self.store_raw(first, "+251 911 22 33 44")
+        self.store_raw(second, "0911 55 66 77")
+        self.store_raw(third, "not a phone")
+
+        output = self.normalize()
+        self.assertIn("Normalized 2 phone numbers", output)
+        self.assertIn(f"unparseable phone numbers as is: [{third.pk}]", output)
+        phones = dict(User.objects.values_list("pk", "phone"))
+        self.assertEqual(str(phones[first.pk]), "+251911223344")
+        self.assertEqual(str(phones[second.pk]), "+251911556677")
+
+        self.store_raw(second, "0911223344")
+        with self.assertRaisesMessage(
+            RuntimeError, f"+251911223344: users {first.pk}, {second.pk}"
+        ):
+            self.normalize()
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT phone FROM accounts_user WHERE id = %s", [second.pk])
+            self.assertEqual(cursor.fetchone()[0], "0911223344")
@@ -0,0 +1,109 @@
+"""
+JWTs that carry the user's role and staff flags, and their revocation.
+
+Tokens issued by ``ClaimsRefreshToken`` (and the access tokens derived from
+it) embed ``User.TOKEN_CLAIM_FIELDS``, so ``ClaimsJWTAuthentication`` can
+build ``request.user`` without reading the user row.
+
+Because claims are frozen at login, every change to them (or to the
+password or ``is_active``) revokes the user's outstanding tokens. Each
+token records the user's ``token_generation`` at issue time in the ``gen``
+claim. Revoking writes a new, larger generation to the user row, in the
+transaction that made the change, and any token carrying an older one is
+rejected.
+
+Requests that load the user row compare against it for free. With
+``JWT_CLAIMS_USER`` the generation is read from the cache instead, one
+cache read per request. The cache is only a copy: a missing key is read
+back from the row, so eviction, flushes and restarts do not bring revoked
+tokens back. Claims mode is only safe with a cache shared by all workers,
+which is why it is only the default when ``REDIS_URL`` is set.
+
+Single refresh tokens (logout, rotation) are blacklisted through the store
+in ``accounts/revocation.py``.
+"""
+
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import BlacklistMixin, RefreshToken
+
+from .models import User
+from .revocation import get_store
+
+GENERATION_CLAIM = "gen"
+
+
+def generation_key(user_id):
+    return f"accounts:token-generation:{user_id}"
+
+
+def token_generation(user_id):
+    """The user's current generation, None once the user is deleted"""
+    users = User.objects.filter(pk=user_id).values_list("token_generation", flat=True)
+    if not getattr(settings, "JWT_CLAIMS_USER", False):
+        return users.first()
+    key = generation_key(user_id)
+    generation = cache.get(key)
+    if generation is None:
+        generation = users.first()
+        if generation is not None:
+            # add() so a revocation cached meanwhile is not overwritten
+            cache.add(key, generation, timeout=None)
+    return generation
+
+
+def revoke_user_tokens(user_id):
+    """Invalidate every token issued to the user so far, returns the generation"""
+    # Nanoseconds give a larger generation without reading the current one
+    generation = time.time_ns()
+    User.objects.filter(pk=user_id).update(token_generation=generation)
+    transaction.on_commit(
+        lambda: cache.set(generation_key(user_id), generation, timeout=None)
+    )
+    return generation
+
+
+def is_revoked(token, generation=None):
+    """
+    Whether the token predates a revocation. ``generation`` is the user's
+    current one when already known, otherwise it is looked up.
+    """
+    if generation is None:
+        generation = token_generation(token.get(api_settings.USER_ID_CLAIM))
+    return generation is None or token.get(GENERATION_CLAIM, 0) < generation
+
+
+class ClaimsRefreshToken(RefreshToken):
+    """Refresh token with claims, blacklisted through accounts/revocation.py"""
+
+    @classmethod
+    def for_user(cls, user):
+        # Skip BlacklistMixin.for_user, the store decides what to record
+        token = super(BlacklistMixin, cls).for_user(user)
+        for name in user.TOKEN_CLAIM_FIELDS:
+            token[name] = getattr(user, name)
+        token[GENERATION_CLAIM] = user.token_generation
+        get_store().outstand(token)
+        return token
+
+    def outstand(self):
+        get_store().outstand(self)
+
+    def blacklist(self):
+        get_store().revoke(self)
+
+    def check_blacklist(self):
+        if get_store().is_revoked(self):
+            raise TokenError(_("Token is blacklisted"))
+
+    def verify(self, *args, **kwargs):
+        super().verify(*args, **kwargs)
+        # Stops a revoked refresh token from minting fresh access tokens
+        if is_revoked(self):
+            raise TokenError("Token has been revoked")
@@ -8,7 +8,9 @@ from rest_framework_simplejwt.exceptions import TokenError
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.utils.translation import gettext_lazy as _
 
+from .last_login import last_login_writer
 from .models import User
+from .tokens import ClaimsRefreshToken
 from .serializers import (
     UserRegisterSerializer,
     UserLoginSerializer,
@@ -28,7 +30,7 @@ class UserRegisterView(generics.CreateAPIView):
         serializer.is_valid(raise_exception=True)
         user = self.perform_create(serializer)
 
-        refresh = RefreshToken.for_user(user)
+        refresh = ClaimsRefreshToken.for_user(user)
         access = refresh.access_token
 
         return Response(
@@ -51,7 +53,8 @@ class UserLoginView(TokenObtainPairView):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         user = serializer.validated_data["user"]
-        refresh = RefreshToken.for_user(user)
+        last_login_writer.record(user.pk)
+        refresh = ClaimsRefreshToken.for_user(user)
         access = refresh.access_token
 
         return Response(
@@ -76,7 +79,7 @@ class UserLogoutView(APIView):
             )
 
         try:
-            token = RefreshToken(refresh_token)
+            token = ClaimsRefreshToken(refresh_token)
             token.blacklist()
             return Response(
                 {"message": _("Logout successful. Token invalidated.")},
@@ -47,6 +47,12 @@ else
     echo "Skipping doctors fixtures (empty or not found)"
 fi
 
+# Import the clinic registry when one is configured
+if [ -n "$CLINIC_REGISTRY_PATH" ]; then
+    echo "Importing clinics from $CLINIC_REGISTRY_PATH..."
+    python manage.py import_clinics "$CLINIC_REGISTRY_PATH"
+fi
+
 echo "Initial data loading completed!"
 
 # Collect static files
@@ -4,6 +4,8 @@ import logging
 from time import sleep
 from django.utils.translation import gettext_lazy as _
 from symptoms.ai import configure_gemini, MAX_RETRIES
+from core.ai_budget import BudgetExceeded, estimate_tokens, reserve
+from core.single_flight import prompt_key, single_flight
 import google.generativeai as genai
 
 logger = logging.getLogger(__name__)
@@ -67,16 +69,31 @@ def _validate_response(response_data):
 
 
 def generate_chat_response(user_input, is_retry=False):
+    """
+    Answer a chat message. Concurrent identical messages share one Gemini
+    request, see core/single_flight.py.
+    """
+    return single_flight(
+        prompt_key("chat", user_input),
+        lambda: _generate_chat_response(user_input, is_retry),
+        publish=lambda response: response.get("mode") != "error",
+    )
+
+
+def _generate_chat_response(user_input, is_retry=False):
     try:
         configure_gemini()
         model = genai.GenerativeModel("gemini-2.0-flash")
+        prompt = CHAT_PROMPT_TEMPLATE.format(user_input=user_input)
 
+        reservation = reserve("chat", estimate_tokens(prompt, 600))
         response = model.generate_content(
-            CHAT_PROMPT_TEMPLATE.format(user_input=user_input),
+            prompt,
             generation_config=genai.types.GenerationConfig(
                 temperature=0.2, max_output_tokens=600, top_p=0.95
             ),
         )
+        reservation.settle(response)
 
         raw = response.text.strip()
         for prefix in ["```json", "```JSON"]:
@@ -96,9 +113,16 @@ def generate_chat_response(user_input, is_retry=False):
         logger.error(f"JSON parse error: {je}")
         if not is_retry and (MAX_RETRIES is None or is_retry < MAX_RETRIES):
             sleep(1)
-            return generate_chat_response(user_input, is_retry=True)
+            return _generate_chat_response(user_input, is_retry=True)
         return {"mode": "error", "response": "Could not process request"}
 
+    except BudgetExceeded as e:
+        logger.warning(str(e))
+        return {
+            "mode": "error",
+            "response": "The assistant is busy right now. Please try again shortly.",
+        }
+
     except genai.types.BlockedPromptException:
         return {
             "mode": "error",
@@ -28,6 +28,8 @@ except (ImportError, Exception) as e:
 class ChatViewSet(viewsets.ModelViewSet):
     serializer_class = ChatSessionSerializer
     permission_classes = [permissions.IsAuthenticated]
+    # Set on the actions that call the model
+    throttle_scope = None
 
     def get_queryset(self):
         return (
@@ -36,7 +38,9 @@ class ChatViewSet(viewsets.ModelViewSet):
             .order_by("-created_at")
         )
 
-    @action(detail=False, methods=["post"], url_path="interact")
+    @action(
+        detail=False, methods=["post"], url_path="interact", throttle_scope="chatbot"
+    )
     def chat_interaction(self, request):
         user = request.user
         raw_message = request.data.get("message", "")
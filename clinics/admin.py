@@ -1,3 +1,9 @@
 from django.contrib import admin
+from .models import Clinic
 
-# Register your models here.
+
+@admin.register(Clinic)
+class ClinicAdmin(admin.ModelAdmin):
+    list_display = ["name", "city", "latitude", "longitude", "is_active"]
+    list_filter = ["is_active", "city"]
+    search_fields = ["name", "city", "address"]
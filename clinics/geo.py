@@ -0,0 +1,133 @@
+"""
+Small geodesy helpers for the clinic locator: great-circle distances and
+geohashes.
+
+A geohash interleaves longitude and latitude bits into a base-32 string, so
+points sharing a prefix lie in the same cell and a cell's rows form one
+contiguous range of an ordinary B-tree index on the hash column.
+"""
+
+from math import asin, cos, degrees, radians, sin, sqrt
+
+EARTH_RADIUS_KM = 6371.0088
+
+BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+DECODE = {char: index for index, char in enumerate(BASE32)}
+GEOHASH_LENGTH = 12
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    """Great-circle distance between two points in kilometres"""
+    lat1, lng1, lat2, lng2 = map(radians, (lat1, lng1, lat2, lng2))
+    a = (
+        sin((lat2 - lat1) / 2) ** 2
+        + cos(lat1) * cos(lat2) * sin((lng2 - lng1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * asin(min(1.0, sqrt(a)))
+
+
+def encode_geohash(lat, lng, length=GEOHASH_LENGTH):
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars = []
+    bits, bit_count, even = 0, 0, True
+    while len(chars) < length:
+        interval, value = (lng_range, lng) if even else (lat_range, lat)
+        mid = (interval[0] + interval[1]) / 2
+        bits <<= 1
+        if value >= mid:
+            bits |= 1
+            interval[0] = mid
+        else:
+            interval[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(BASE32[bits])
+            bits, bit_count = 0, 0
+    return "".join(chars)
+
+
+def geohash_bounds(geohash):
+    """Return ``(min_lat, min_lng, max_lat, max_lng)`` of a geohash cell"""
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    even = True
+    for char in geohash:
+        value = DECODE[char]
+        for shift in range(4, -1, -1):
+            interval = lng_range if even else lat_range
+            mid = (interval[0] + interval[1]) / 2
+            if value >> shift & 1:
+                interval[0] = mid
+            else:
+                interval[1] = mid
+            even = not even
+    return lat_range[0], lng_range[0], lat_range[1], lng_range[1]
+
+
+def cell_size(precision):
+    """Height and width of a geohash cell at ``precision``, in degrees"""
+    lng_bits = (5 * precision + 1) // 2
+    lat_bits = 5 * precision // 2
+    return 180.0 / 2**lat_bits, 360.0 / 2**lng_bits
+
+
+def neighbourhood(lat, lng, precision):
+    """
+    The cell containing a point and its eight neighbours, deduplicated.
+
+    Near the poles the rows above or below are simply dropped; longitudes
+    wrap around the antimeridian.
+    """
+    height, width = cell_size(precision)
+    cells = []
+    for dlat in (-height, 0.0, height):
+        cell_lat = lat + dlat
+        if not -90.0 <= cell_lat <= 90.0:
+            continue
+        for dlng in (-width, 0.0, width):
+            cell_lng = (lng + dlng + 180.0) % 360.0 - 180.0
+            cell = encode_geohash(cell_lat, cell_lng, precision)
+            if cell not in cells:
+                cells.append(cell)
+    return cells
+
+
+def covered_radius_km(lat, lng, precision):
+    """
+    Distance from a point within which every location is guaranteed to be
+    inside the point's 3x3 geohash neighbourhood.
+    """
+    min_lat, min_lng, max_lat, max_lng = geohash_bounds(
+        encode_geohash(lat, lng, precision)
+    )
+    height, width = cell_size(precision)
+    # Distance to the outer edge of the neighbourhood in each direction
+    north = haversine_km(lat, lng, min(max_lat + height, 90.0), lng)
+    south = haversine_km(lat, lng, max(min_lat - height, -90.0), lng)
+    # Shortest great-circle distance to the bounding meridians
+    east = _meridian_distance_km(lat, max_lng + width - lng)
+    west = _meridian_distance_km(lat, lng - (min_lng - width))
+    return min(north, south, east, west)
+
+
+def _meridian_distance_km(lat, dlng):
+    if dlng >= 90.0:
+        return EARTH_RADIUS_KM * radians(90.0 - abs(lat))
+    return EARTH_RADIUS_KM * asin(cos(radians(lat)) * sin(radians(dlng)))
+
+
+def bounding_box(lat, lng, radius_km):
+    """
+    Smallest latitude/longitude box enclosing a circle, as
+    ``(min_lat, min_lng, max_lat, max_lng)``. Boxes reaching a pole or
+    crossing the antimeridian span every longitude.
+    """
+    angular = radius_km / EARTH_RADIUS_KM
+    dlat = degrees(angular)
+    min_lat, max_lat = lat - dlat, lat + dlat
+    if min_lat <= -90.0 or max_lat >= 90.0:
+        return max(min_lat, -90.0), -180.0, min(max_lat, 90.0), 180.0
+    dlng = degrees(asin(min(1.0, sin(angular) / cos(radians(lat)))))
+    if lng - dlng < -180.0 or lng + dlng > 180.0:
+        return min_lat, -180.0, max_lat, 180.0
+    return min_lat, lng - dlng, max_lat, lng + dlng
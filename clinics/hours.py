@@ -0,0 +1,99 @@
+"""
+Weekly opening hours as a bitmap of 15-minute buckets.
+
+A week has 7 * 96 = 672 buckets, numbered from Monday 00:00 in the clinics'
+local time (``CLINIC_TIME_ZONE``). Bit ``n`` is set when the clinic is open
+during bucket ``n``. The bitmap is stored as 84 little-endian bytes, which
+is also the bit order of PostgreSQL's ``get_bit()``, so "open at T" is a
+single bit test whether it runs in SQL or on a Python ``int``.
+
+Hours are written as ``{"mon": [["08:00", "17:00"]], ...}``. A range whose
+end is not after its start runs past midnight, and ``"24:00"`` closes at the
+end of the day.
+"""
+
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.utils import timezone
+
+DAYS = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
+BUCKET_MINUTES = 15
+BUCKETS_PER_DAY = 24 * 60 // BUCKET_MINUTES
+WEEK_BUCKETS = 7 * BUCKETS_PER_DAY
+BITMAP_BYTES = WEEK_BUCKETS // 8
+
+
+def _minutes(value):
+    try:
+        hours, minutes = (int(part) for part in value.split(":"))
+    except (AttributeError, ValueError):
+        raise ValidationError(f"Invalid time {value!r}, expected HH:MM")
+    total = hours * 60 + minutes
+    if not 0 <= minutes < 60 or not 0 <= total <= 24 * 60:
+        raise ValidationError(f"Invalid time {value!r}, expected HH:MM")
+    if total % BUCKET_MINUTES:
+        raise ValidationError(f"{value} is not on a {BUCKET_MINUTES}-minute boundary")
+    return total
+
+
+def hours_to_bitmap(hours):
+    """Compile an opening hours mapping into the weekly bitmap as an int"""
+    if not isinstance(hours, dict):
+        raise ValidationError("Opening hours must be an object keyed by weekday")
+    bitmap = 0
+    for day, ranges in hours.items():
+        if day not in DAYS:
+            raise ValidationError(f"Unknown weekday {day!r}")
+        if not isinstance(ranges, list):
+            raise ValidationError(f"Hours for {day} must be a list of ranges")
+        day_start = DAYS.index(day) * BUCKETS_PER_DAY
+        for item in ranges:
+            if not isinstance(item, (list, tuple)) or len(item) != 2:
+                raise ValidationError("Each range must be a [start, end] pair")
+            start = _minutes(item[0]) // BUCKET_MINUTES
+            end = _minutes(item[1]) // BUCKET_MINUTES
+            if end <= start:
+                # Overnight, ends on the following day
+                end += BUCKETS_PER_DAY
+            for bucket in range(day_start + start, day_start + end):
+                bitmap |= 1 << (bucket % WEEK_BUCKETS)
+    return bitmap
+
+
+def to_bytes(bitmap):
+    return bitmap.to_bytes(BITMAP_BYTES, "little")
+
+
+def from_bytes(data):
+    """Bitmap int from the stored bytes; None stays None (hours unknown)"""
+    if data is None:
+        return None
+    return int.from_bytes(bytes(data), "little")
+
+
+def clinic_time_zone():
+    return ZoneInfo(getattr(settings, "CLINIC_TIME_ZONE", settings.TIME_ZONE))
+
+
+def bucket_at(moment=None):
+    """Week bucket containing ``moment`` (default: now) in clinic local time"""
+    local = timezone.localtime(moment or timezone.now(), clinic_time_zone())
+    minutes = local.hour * 60 + local.minute
+    return local.weekday() * BUCKETS_PER_DAY + minutes // BUCKET_MINUTES
+
+
+def open_mask(bitmaps, bucket):
+    """
+    Which of ``bitmaps`` are open during ``bucket``, as a list of booleans.
+
+    The same single-bit mask is ANDed against every candidate; unknown
+    hours (None) count as closed.
+    """
+    bit = 1 << bucket
+    return [bitmap is not None and bitmap & bit != 0 for bitmap in bitmaps]
+
+
+def is_open(bitmap, bucket):
+    return bitmap is not None and bitmap >> bucket & 1 == 1
@@ -0,0 +1,261 @@
+"""
+Streaming import of clinic registries from CSV or GeoJSON.
+
+Records are read one at a time, validated, and written in chunks with a
+single ``bulk_create`` per chunk. Rows carrying an ``external_id`` are
+upserted on it, so re-importing a registry updates clinics in place. Only
+the current chunk is held in memory, whatever the size of the file.
+
+CSV files need ``name``, ``latitude`` and ``longitude`` columns (``lat``,
+``lng`` and ``lon`` are accepted too, and ``id`` for ``external_id``). GeoJSON may be a FeatureCollection or
+one Feature per line; Point geometries give the coordinates and
+``properties`` the other fields. ``opening_hours`` uses the format of
+``clinics/hours.py`` and may be given as a JSON string.
+"""
+
+import csv
+import json
+import re
+import time
+from dataclasses import dataclass, field
+
+from django.core.exceptions import ValidationError
+from django.db import reset_queries, transaction
+
+from .index import clinic_index
+from .models import Clinic
+
+UPDATE_FIELDS = [
+    "name",
+    "address",
+    "city",
+    "phone",
+    "latitude",
+    "longitude",
+    "geohash",
+    "opening_hours",
+    "hours_bitmap",
+    "is_active",
+    "updated_at",
+]
+TEXT_FIELDS = {
+    "name": 255,
+    "address": 500,
+    "city": 100,
+    "phone": 30,
+    "external_id": 100,
+}
+ALIASES = {
+    "external_id": ("external_id", "id"),
+    "latitude": ("latitude", "lat"),
+    "longitude": ("longitude", "lng", "lon"),
+}
+FALSE_VALUES = {"0", "false", "no", "n", "inactive", "closed"}
+MAX_REPORTED_ERRORS = 50
+HEAD = re.compile(r'"features"|"FeatureCollection"|"Feature"')
+# How far to look for HEAD before assuming newline-delimited values
+HEAD_BYTES = 1 << 20
+
+
+@dataclass
+class ImportStats:
+    read: int = 0
+    imported: int = 0
+    invalid: int = 0
+    chunks: int = 0
+    started: float = field(default_factory=time.perf_counter)
+    errors: list = field(default_factory=list)
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    @property
+    def rate(self):
+        return self.read / self.elapsed if self.elapsed else 0.0
+
+    def error(self, record_number, message):
+        self.invalid += 1
+        # Keep memory flat on files full of bad rows
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((record_number, message))
+
+
+def read_csv(path):
+    with open(path, newline="", encoding="utf-8-sig") as handle:
+        yield from csv.DictReader(handle)
+
+
+def iter_json_values(handle, read_size=1 << 16):
+    """
+    Yield the elements of the ``features`` array of a FeatureCollection, or
+    the top-level values of a newline-delimited file, decoding one value at
+    a time from a sliding buffer.
+    """
+    decoder = json.JSONDecoder()
+    buffer = handle.read(read_size)
+    eof = not buffer
+    position = 0
+
+    def fill():
+        nonlocal buffer, position, eof
+        chunk = handle.read(read_size)
+        eof = not chunk
+        buffer = buffer[position:] + chunk
+        position = 0
+
+    # A FeatureCollection is a single object; jump into its features array.
+    # Newline-delimited Features announce themselves as "Feature" instead.
+    while not eof and len(buffer) < HEAD_BYTES and not HEAD.search(buffer):
+        fill()
+    head = HEAD.search(buffer)
+    in_array = head is not None and head.group() != '"Feature"'
+    if in_array:
+        while not eof and not re.search(r'"features"\s*:\s*\[', buffer):
+            fill()
+        match = re.search(r'"features"\s*:\s*\[', buffer)
+        if match is None:
+            raise ValueError("FeatureCollection without a features array")
+        position = match.end()
+
+    while True:
+        # Skip separators between values
+        while True:
+            while position < len(buffer) and buffer[position] in " \t\r\n,":
+                position += 1
+            if position < len(buffer) or eof:
+                break
+            fill()
+        if position >= len(buffer) or (in_array and buffer[position] == "]"):
+            return
+        try:
+            value, end = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            # The value continues past the buffer
+            fill()
+            continue
+        position = end
+        yield value
+
+
+def read_geojson(path):
+    with open(path, encoding="utf-8-sig") as handle:
+        for feature in iter_json_values(handle):
+            record = dict(feature.get("properties") or {})
+            geometry = feature.get("geometry") or {}
+            if geometry.get("type") == "Point":
+                coordinates = geometry.get("coordinates") or []
+                if len(coordinates) >= 2:
+                    record["longitude"], record["latitude"] = coordinates[:2]
+            yield record
+
+
+def _first(record, names):
+    for name in names:
+        value = record.get(name)
+        if value not in (None, ""):
+            return value
+    return None
+
+
+def build_clinic(record):
+    """Validate one record and return an unsaved Clinic"""
+    values = {}
+    for name, max_length in TEXT_FIELDS.items():
+        value = _first(record, ALIASES.get(name, (name,)))
+        value = "" if value is None else str(value).strip()
+        if len(value) > max_length:
+            raise ValidationError(f"{name} is longer than {max_length} characters")
+        values[name] = value
+    if not values["name"]:
+        raise ValidationError("name is required")
+    values["external_id"] = values["external_id"] or None
+
+    for name in ("latitude", "longitude"):
+        value = _first(record, ALIASES[name])
+        try:
+            values[name] = float(value)
+        except (TypeError, ValueError):
+            raise ValidationError(f"{name} is missing or not a number")
+    if not -90 <= values["latitude"] <= 90:
+        raise ValidationError("latitude must be between -90 and 90")
+    if not -180 <= values["longitude"] <= 180:
+        raise ValidationError("longitude must be between -180 and 180")
+
+    hours = record.get("opening_hours") or {}
+    if isinstance(hours, str):
+        try:
+            hours = json.loads(hours)
+        except ValueError:
+            raise ValidationError("opening_hours is not valid JSON")
+    values["opening_hours"] = hours
+
+    active = record.get("is_active")
+    values["is_active"] = str(active).strip().lower() not in FALSE_VALUES
+
+    clinic = Clinic(**values)
+    # Also validates the opening hours
+    clinic.compile_derived_fields()
+    return clinic
+
+
+def write_chunk(clinics):
+    keyed, plain = {}, []
+    for clinic in clinics:
+        if clinic.external_id:
+            # The last occurrence of an id wins, a single upsert cannot
+            # touch the same row twice
+            keyed[clinic.external_id] = clinic
+        else:
+            plain.append(clinic)
+    with transaction.atomic():
+        if keyed:
+            Clinic.objects.bulk_create(
+                list(keyed.values()),
+                update_conflicts=True,
+                unique_fields=["external_id"],
+                update_fields=UPDATE_FIELDS,
+            )
+        if plain:
+            Clinic.objects.bulk_create(plain)
+    return len(keyed) + len(plain)
+
+
+def import_clinics(records, chunk_size=2000, dry_run=False, progress=None):
+    """
+    Validate and write ``records`` in chunks. ``progress`` is called with the
+    running ``ImportStats`` after every chunk.
+    """
+    stats = ImportStats()
+    chunk = []
+
+    def flush():
+        if chunk and not dry_run:
+            stats.imported += write_chunk(chunk)
+            # With DEBUG on, the query log would keep every INSERT alive
+            reset_queries()
+        elif chunk:
+            stats.imported += len(chunk)
+        chunk.clear()
+        stats.chunks += 1
+        if progress is not None:
+            progress(stats)
+
+    for number, record in enumerate(records, start=1):
+        stats.read += 1
+        try:
+            chunk.append(build_clinic(record))
+        except ValidationError as e:
+            stats.error(number, "; ".join(e.messages))
+        if len(chunk) >= chunk_size:
+            flush()
+    if chunk:
+        flush()
+
+    if stats.imported and not dry_run:
+        # bulk_create sends no signals. Bumping the version in the database
+        # makes every web worker reload its index, not just this process
+        clinic_index.invalidate()
+    return stats
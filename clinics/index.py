@@ -0,0 +1,186 @@
+"""
+Process-local KD-tree of active clinics for the ``kdtree`` search backend.
+
+Each web worker builds the tree when it starts (``warm_up``, called from
+medihelp/wsgi.py), or on first use if that failed. It is then kept current
+by the model signals in ``clinics/signals.py``, which apply inserts and
+deletes once the writing transaction commits. Every change also bumps the
+version in the ``ClinicIndexVersion`` row. Searches compare that row with
+the version their tree was built at, at most every
+``VERSION_CHECK_INTERVAL`` seconds so most searches touch no database, and
+reload the tree when another worker, or an import run from a management
+command, wrote clinics. The version lives in the database rather than the
+cache so that processes without a shared cache see each other's changes too.
+
+Searches never wait for the database or for each other: the lock only
+guards swapping in a new tree and applying a single change to it, which
+``KDTree`` allows alongside running searches. Version bumps and reloads
+happen outside it, and while one thread reloads the others keep searching
+the previous tree.
+"""
+
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from django.db.models import F
+
+from .hours import from_bytes
+from .kdtree import KDTree
+from .models import Clinic, ClinicIndexVersion
+
+logger = logging.getLogger(__name__)
+
+VERSION_PK = 1
+# Seconds a process may serve a tree without comparing its version
+VERSION_CHECK_INTERVAL = 5
+
+
+class ClinicIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        # One reload at a time, the other threads keep the current tree
+        self._reload_lock = threading.Lock()
+        self._tree = None
+        # None while the tree is missing or known to be stale
+        self._version = None
+        self._checked = None
+        # Changes applied (or skipped) so far, to spot those during a reload
+        self._changes = 0
+        # Opening hours bitmaps of the indexed clinics, see clinics/hours.py
+        self._hours = {}
+
+    def _shared_version(self):
+        versions = ClinicIndexVersion.objects.filter(pk=VERSION_PK)
+        return versions.values_list("version", flat=True).first() or 0
+
+    def _bump(self):
+        versions = ClinicIndexVersion.objects.filter(pk=VERSION_PK)
+        # The row stays locked until commit, so the version read back is ours
+        with transaction.atomic():
+            if not versions.update(version=F("version") + 1):
+                ClinicIndexVersion.objects.get_or_create(pk=VERSION_PK)
+                versions.update(version=F("version") + 1)
+            return versions.values_list("version", flat=True).get()
+
+    def _load(self):
+        rows = Clinic.objects.filter(is_active=True).values_list(
+            "id", "latitude", "longitude", "hours_bitmap"
+        )
+        points, hours = [], {}
+        for pk, lat, lng, bitmap in rows.iterator(chunk_size=10_000):
+            points.append((pk, lat, lng))
+            hours[pk] = from_bytes(bitmap)
+        return KDTree(points), hours
+
+    def _reload(self, tree, hours):
+        if not self._reload_lock.acquire(blocking=tree is None):
+            # Someone else is reloading, the previous tree will do until then
+            return tree, hours
+        try:
+            with self._lock:
+                if self._version is not None:
+                    # Reloaded while we waited for the lock
+                    return self._tree, self._hours
+                changes = self._changes
+            version = self._shared_version()
+            tree, hours = self._load()
+            with self._lock:
+                self._tree, self._hours = tree, hours
+                # A change that came in meanwhile may be missing from the
+                # load, so the next search reloads again
+                self._version = version if self._changes == changes else None
+                self._checked = time.monotonic()
+            return tree, hours
+        finally:
+            self._reload_lock.release()
+
+    def _current(self):
+        """The current tree and opening hours, (re)loaded when stale"""
+        now = time.monotonic()
+        with self._lock:
+            tree, hours, version = self._tree, self._hours, self._version
+            due = self._checked is None or now - self._checked >= VERSION_CHECK_INTERVAL
+        if version is not None and due:
+            if self._shared_version() == version:
+                with self._lock:
+                    self._checked = now
+            else:
+                with self._lock:
+                    if self._version == version:
+                        self._version = None
+                version = None
+        if version is None:
+            return self._reload(tree, hours)
+        return tree, hours
+
+    def tree(self):
+        """The current tree, (re)loaded when missing or stale"""
+        return self._current()[0]
+
+    def nearest(self, lat, lng, k=10, radius_km=None, open_bucket=None):
+        """
+        ``(distance_km, pk)`` of the nearest active clinics, optionally only
+        those open during the week bucket ``open_bucket``.
+        """
+        tree, hours = self._current()
+        accept = None
+        if open_bucket is not None:
+            bit = 1 << open_bucket
+
+            def accept(pk):
+                bitmap = hours.get(pk)
+                return bitmap is not None and bitmap & bit != 0
+
+        return tree.nearest(lat, lng, k=k, radius_km=radius_km, accept=accept)
+
+    def apply(self, clinic=None, deleted_pk=None):
+        """Reflect one saved or deleted clinic in the tree"""
+        version = self._bump()
+        with self._lock:
+            self._changes += 1
+            if self._tree is None or self._version is None:
+                return
+            if version != self._version + 1 or self._tree.needs_rebuild():
+                # Missed someone else's change, reload on next use
+                self._version = None
+                return
+            if deleted_pk is not None:
+                self._tree.delete(deleted_pk)
+                self._hours.pop(deleted_pk, None)
+            elif clinic.is_active:
+                self._tree.insert(clinic.pk, clinic.latitude, clinic.longitude)
+                self._hours[clinic.pk] = from_bytes(clinic.hours_bitmap)
+            else:
+                self._tree.delete(clinic.pk)
+                self._hours.pop(clinic.pk, None)
+            self._version = version
+
+    def invalidate(self):
+        """Force every process to reload, after writes that skip signals"""
+        self._bump()
+        with self._lock:
+            self._version = None
+
+    def clear(self):
+        with self._lock:
+            self._tree = None
+            self._version = None
+            self._checked = None
+            self._hours = {}
+
+
+clinic_index = ClinicIndex()
+
+
+def warm_up():
+    """Build the tree at process start when the ``kdtree`` backend is used"""
+    if getattr(settings, "CLINIC_SPATIAL_BACKEND", "auto") != "kdtree":
+        return
+    try:
+        clinic_index.tree()
+    except DatabaseError:
+        # e.g. not migrated yet; the first search loads it instead
+        logger.exception("Could not build the clinic index at startup")
@@ -0,0 +1,170 @@
+"""
+Pure-Python KD-tree over points on the sphere.
+
+Latitude/longitude pairs are mapped to 3-D unit vectors, where straight-line
+(chord) distance grows monotonically with great-circle distance. An ordinary
+Euclidean KD-tree therefore answers haversine nearest-neighbour and radius
+queries exactly, without special cases at the antimeridian or the poles.
+
+Points live in leaf buckets. Inserts descend to a bucket and split it once
+it holds ``2 * leaf_size`` points; deletes remove the point from its bucket.
+Heavy churn can unbalance the tree, callers rebuild it from scratch when
+``needs_rebuild()`` says so.
+
+One writer at a time may change the tree while other threads search it:
+changes replace a leaf's bucket instead of mutating the list a search may
+be iterating, and a split links the new children before turning the leaf
+into an inner node.
+"""
+
+import heapq
+from math import asin, cos, pi, radians, sin
+
+from .geo import EARTH_RADIUS_KM
+
+
+def to_xyz(lat, lng):
+    lat, lng = radians(lat), radians(lng)
+    return (cos(lat) * cos(lng), cos(lat) * sin(lng), sin(lat))
+
+
+def chord_to_km(chord):
+    return 2 * EARTH_RADIUS_KM * asin(min(1.0, chord / 2))
+
+
+def km_to_chord(km):
+    angle = km / EARTH_RADIUS_KM
+    return 2.0 if angle >= pi else 2 * sin(angle / 2)
+
+
+def _distance_sq(a, b):
+    return (a[0] - b[0]) ** 2 + (a[1] - b[1]) ** 2 + (a[2] - b[2]) ** 2
+
+
+class _Node:
+    __slots__ = ("axis", "split", "left", "right", "bucket")
+
+    def __init__(self, bucket):
+        self.axis = None
+        self.split = None
+        self.left = None
+        self.right = None
+        # Leaf payload as a list of (xyz, key); None for inner nodes
+        self.bucket = bucket
+
+
+class KDTree:
+    def __init__(self, items=(), leaf_size=16):
+        """``items`` is an iterable of ``(key, lat, lng)``"""
+        self.leaf_size = leaf_size
+        self._points = {key: to_xyz(lat, lng) for key, lat, lng in items}
+        self._changes = 0
+        self._root = self._build([(xyz, key) for key, xyz in self._points.items()])
+
+    def __len__(self):
+        return len(self._points)
+
+    def __contains__(self, key):
+        return key in self._points
+
+    def _build(self, points):
+        node = _Node(points)
+        if len(points) > self.leaf_size:
+            self._split(node)
+        return node
+
+    def _split(self, node):
+        points = node.bucket
+        # Split on the axis with the widest spread, at the median
+        spreads = [
+            max(p[0][axis] for p in points) - min(p[0][axis] for p in points)
+            for axis in range(3)
+        ]
+        axis = spreads.index(max(spreads))
+        values = sorted(p[0][axis] for p in points)
+        split = values[len(values) // 2]
+        left = [p for p in points if p[0][axis] < split]
+        right = [p for p in points if p[0][axis] >= split]
+        if not left or not right:
+            # Identical coordinates, nothing to split on
+            return
+        node.axis, node.split = axis, split
+        node.left, node.right = self._build(left), self._build(right)
+        # Last, so concurrent searches see a complete leaf or inner node
+        node.bucket = None
+
+    def _leaf(self, xyz):
+        node = self._root
+        while node.bucket is None:
+            node = node.left if xyz[node.axis] < node.split else node.right
+        return node
+
+    def insert(self, key, lat, lng):
+        """Add a point, replacing any previous point stored under ``key``"""
+        if key in self._points:
+            self.delete(key)
+        xyz = to_xyz(lat, lng)
+        self._points[key] = xyz
+        leaf = self._leaf(xyz)
+        leaf.bucket = leaf.bucket + [(xyz, key)]
+        if len(leaf.bucket) >= 2 * self.leaf_size:
+            self._split(leaf)
+        self._changes += 1
+
+    def delete(self, key):
+        xyz = self._points.pop(key, None)
+        if xyz is None:
+            return False
+        leaf = self._leaf(xyz)
+        leaf.bucket = [point for point in leaf.bucket if point != (xyz, key)]
+        self._changes += 1
+        return True
+
+    def needs_rebuild(self):
+        """True once incremental changes outnumber the points built with"""
+        return self._changes > max(len(self._points), 1000)
+
+    def nearest(self, lat, lng, k=1, radius_km=None, accept=None):
+        """
+        Up to ``k`` ``(distance_km, key)`` pairs, nearest first, optionally
+        limited to ``radius_km`` and to keys for which ``accept(key)`` is true.
+        """
+        if k <= 0 or not self._points:
+            return []
+        target = to_xyz(lat, lng)
+        bound_sq = km_to_chord(radius_km) ** 2 if radius_km is not None else 4.0
+
+        # Max-heap of the best k as (-distance_sq, key)
+        best = []
+        # Min-heap of nodes to visit, keyed by a lower bound of their distance
+        pending = [(0.0, 0, self._root)]
+        counter = 1
+        while pending:
+            lower, _, node = heapq.heappop(pending)
+            limit = -best[0][0] if len(best) == k else bound_sq
+            if lower > limit:
+                break
+            bucket = node.bucket
+            if bucket is not None:
+                for xyz, key in bucket:
+                    d = _distance_sq(xyz, target)
+                    if d > bound_sq or (accept is not None and not accept(key)):
+                        continue
+                    if len(best) < k:
+                        heapq.heappush(best, (-d, key))
+                    elif d < -best[0][0]:
+                        heapq.heapreplace(best, (-d, key))
+                continue
+            offset = target[node.axis] - node.split
+            near, far = (
+                (node.left, node.right) if offset < 0 else (node.right, node.left)
+            )
+            heapq.heappush(pending, (lower, counter, near))
+            heapq.heappush(pending, (max(lower, offset * offset), counter + 1, far))
+            counter += 2
+
+        return sorted((chord_to_km((-neg) ** 0.5), key) for neg, key in best)
+
+    def within(self, lat, lng, radius_km):
+        """Every ``(distance_km, key)`` within ``radius_km``, nearest first"""
+        return self.nearest(lat, lng, k=len(self._points), radius_km=radius_km)
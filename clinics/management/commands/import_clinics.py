@@ -0,0 +1,78 @@
+import os
+import resource
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from clinics.importer import import_clinics, read_csv, read_geojson
+
+READERS = {"csv": read_csv, "geojson": read_geojson}
+EXTENSIONS = {".csv": "csv", ".geojson": "geojson", ".json": "geojson"}
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream a clinic registry from CSV or GeoJSON into the database in "
+        "chunks, upserting on external_id."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument(
+            "--format",
+            choices=sorted(READERS),
+            help="Input format, inferred from the file extension by default",
+        )
+        parser.add_argument("--chunk-size", type=int, default=2000)
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Validate every record without writing anything",
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        if not os.path.isfile(path):
+            raise CommandError(f"{path} does not exist")
+        fmt = options["format"]
+        if fmt is None:
+            fmt = EXTENSIONS.get(os.path.splitext(path)[1].lower())
+            if fmt is None:
+                raise CommandError("Cannot infer the format, pass --format")
+        if options["chunk_size"] < 1:
+            raise CommandError("--chunk-size must be positive")
+
+        def progress(stats):
+            self.stdout.write(
+                f"  {stats.read} read, {stats.imported} imported, "
+                f"{stats.invalid} invalid, {stats.rate:,.0f} rows/s"
+            )
+
+        try:
+            stats = import_clinics(
+                READERS[fmt](path),
+                chunk_size=options["chunk_size"],
+                dry_run=options["dry_run"],
+                progress=progress if options["verbosity"] > 1 else None,
+            )
+        except (UnicodeDecodeError, ValueError) as e:
+            raise CommandError(f"Could not read {path}: {e}")
+
+        for number, message in stats.errors:
+            self.stderr.write(f"record {number}: {message}")
+        if stats.invalid > len(stats.errors):
+            self.stderr.write(f"... {stats.invalid - len(stats.errors)} more")
+        verb = "Validated" if options["dry_run"] else "Imported"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{verb} {stats.imported} of {stats.read} records "
+                f"({stats.invalid} invalid) in {stats.elapsed:.1f}s, "
+                f"{stats.rate:,.0f} rows/s, peak RSS {peak_rss_mb():.0f} MB"
+            )
+        )
@@ -0,0 +1,58 @@
+"""
+GiST index on the clinic coordinates as a PostGIS geography, used by the
+``postgis`` search backend (see clinics/search.py).
+
+PostGIS is optional: when the extension is not available on the server, or
+cannot be enabled with the current privileges, this migration does nothing
+and searches use the geohash fallback.
+"""
+
+from django.db import DatabaseError, migrations, transaction
+
+FORWARD_SQL = [
+    """
+    CREATE OR REPLACE FUNCTION clinics_point(double precision, double precision)
+    RETURNS geography LANGUAGE sql IMMUTABLE PARALLEL SAFE AS
+    $$ SELECT ST_SetSRID(ST_MakePoint($2, $1), 4326)::geography $$
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS clinic_point_gist_idx
+    ON clinics_clinic USING gist (clinics_point(latitude, longitude))
+    """,
+]
+
+REVERSE_SQL = [
+    "DROP INDEX IF EXISTS clinic_point_gist_idx",
+    "DROP FUNCTION IF EXISTS clinics_point(double precision, double precision)",
+]
+
+
+def forward(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    try:
+        # Savepoint, so a refused extension does not abort the migration
+        with transaction.atomic(using=schema_editor.connection.alias):
+            schema_editor.execute("CREATE EXTENSION IF NOT EXISTS postgis")
+    except DatabaseError:
+        return
+    for statement in FORWARD_SQL:
+        schema_editor.execute(statement)
+
+
+def reverse(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for statement in REVERSE_SQL:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("clinics", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.RunPython(forward, reverse),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2 on 2026-10-19 06:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("clinics", "0002_postgis_point_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="clinic",
+            name="hours_bitmap",
+            field=models.BinaryField(max_length=84, null=True),
+        ),
+        migrations.AddField(
+            model_name="clinic",
+            name="opening_hours",
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2 on 2026-10-19 06:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("clinics", "0003_opening_hours"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="clinic",
+            name="external_id",
+            field=models.CharField(
+                blank=True, default=None, max_length=100, null=True, unique=True
+            ),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2 on 2026-10-19 07:50
+
+from django.db import migrations, models
+
+
+def create_version_row(apps, schema_editor):
+    ClinicIndexVersion = apps.get_model("clinics", "ClinicIndexVersion")
+    ClinicIndexVersion.objects.using(schema_editor.connection.alias).create(pk=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("clinics", "0004_clinic_external_id"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ClinicIndexVersion",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("version", models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(create_version_row, migrations.RunPython.noop),
+    ]
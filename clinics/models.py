@@ -1,3 +1,75 @@
+from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
 
-# Create your models here.
+from .geo import encode_geohash
+from .hours import BITMAP_BYTES, hours_to_bitmap, to_bytes
+
+
+class Clinic(models.Model):
+    # Identifier in the source registry, the upsert key for imports
+    external_id = models.CharField(
+        max_length=100, unique=True, null=True, blank=True, default=None
+    )
+    name = models.CharField(max_length=255)
+    address = models.CharField(max_length=500, blank=True)
+    city = models.CharField(max_length=100, blank=True)
+    phone = models.CharField(max_length=30, blank=True)
+    latitude = models.FloatField(
+        validators=[MinValueValidator(-90.0), MaxValueValidator(90.0)]
+    )
+    longitude = models.FloatField(
+        validators=[MinValueValidator(-180.0), MaxValueValidator(180.0)]
+    )
+    # Derived from the coordinates on save, backs the portable spatial search
+    geohash = models.CharField(max_length=12, editable=False)
+    # {"mon": [["08:00", "17:00"]], ...}, see clinics/hours.py
+    opening_hours = models.JSONField(default=dict, blank=True)
+    # Compiled from opening_hours on save; NULL when no hours are known
+    hours_bitmap = models.BinaryField(
+        max_length=BITMAP_BYTES, null=True, editable=False
+    )
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["name"]
+        indexes = [
+            models.Index(fields=["geohash"], name="clinic_geohash_idx"),
+        ]
+
+    def __str__(self):
+        return self.name
+
+    def clean(self):
+        hours_to_bitmap(self.opening_hours)
+
+    def compile_derived_fields(self):
+        """Refresh the fields computed from coordinates and opening hours"""
+        self.geohash = encode_geohash(self.latitude, self.longitude)
+        self.hours_bitmap = (
+            to_bytes(hours_to_bitmap(self.opening_hours))
+            if self.opening_hours
+            else None
+        )
+
+    def save(self, *args, **kwargs):
+        self.compile_derived_fields()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            update_fields = set(update_fields)
+            if {"latitude", "longitude"} & update_fields:
+                update_fields.add("geohash")
+            if "opening_hours" in update_fields:
+                update_fields.add("hours_bitmap")
+            kwargs["update_fields"] = update_fields
+        super().save(*args, **kwargs)
+
+
+class ClinicIndexVersion(models.Model):
+    """
+    Single row counting clinic changes. Every process compares it with the
+    version its in-memory index was built at, see clinics/index.py.
+    """
+
+    version = models.BigIntegerField(default=0)
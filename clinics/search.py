@@ -0,0 +1,177 @@
+"""
+Nearest-N and within-radius clinic search.
+
+Two interchangeable backends answer the same query:
+
+* ``postgis``: used when migration 0002 managed to enable PostGIS. Distances
+  and the radius filter are computed by PostGIS on a GiST index over the
+  ``clinics_point(latitude, longitude)`` geography expression, and rows come
+  back in index (KNN) order.
+* ``geohash``: portable fallback. Candidates are read from the 3x3 geohash
+  neighbourhood of the query point as B-tree range scans on
+  ``Clinic.geohash``, starting with small cells and widening until enough
+  clinics are provably the nearest ones. Exact distances are then computed
+  in Python.
+* ``kdtree``: the process-local KD-tree from ``clinics/index.py``. Searches
+  never touch the database; only the matching clinics are then fetched by
+  primary key. The tree holds active clinics only.
+
+``CLINIC_SPATIAL_BACKEND`` forces one of them; the default ``"auto"`` picks
+PostGIS whenever the database has it and the geohash index otherwise.
+"""
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import BooleanField, FloatField, Q
+from django.db.models.expressions import RawSQL
+
+from .geo import bounding_box, covered_radius_km, haversine_km, neighbourhood
+from .hours import from_bytes, open_mask
+from .index import clinic_index
+from .models import Clinic
+
+# Geohash precisions tried by the fallback, from ~1.2 km to ~630 km cells
+FALLBACK_PRECISIONS = range(6, 0, -1)
+
+GEOGRAPHY_POINT = "ST_SetSRID(ST_MakePoint(%s, %s), 4326)::geography"
+CLINIC_POINT = "clinics_point(latitude, longitude)"
+
+_postgis = {}
+
+
+def postgis_enabled(using="default"):
+    """Whether the clinic geography index exists on this database"""
+    if using not in _postgis:
+        connection = connections[using]
+        enabled = False
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT 1 FROM pg_proc WHERE proname = 'clinics_point' LIMIT 1"
+                )
+                enabled = cursor.fetchone() is not None
+        _postgis[using] = enabled
+    return _postgis[using]
+
+
+def get_backend(using="default"):
+    backend = getattr(settings, "CLINIC_SPATIAL_BACKEND", "auto")
+    if backend == "auto":
+        return "postgis" if postgis_enabled(using) else "geohash"
+    return backend
+
+
+def nearest_clinics(
+    lat, lng, limit=10, radius_km=50.0, queryset=None, open_bucket=None
+):
+    """
+    Return up to ``limit`` clinics within ``radius_km`` of a point, nearest
+    first. Each clinic carries its distance as ``distance_km``.
+
+    With ``open_bucket`` (see ``clinics.hours.bucket_at``) only clinics open
+    during that week bucket are considered.
+    """
+    if queryset is None:
+        queryset = Clinic.objects.all()
+    backend = get_backend(queryset.db)
+    if backend == "postgis":
+        return _postgis_nearest(queryset, lat, lng, limit, radius_km, open_bucket)
+    if backend == "geohash":
+        return _geohash_nearest(queryset, lat, lng, limit, radius_km, open_bucket)
+    if backend == "kdtree":
+        found = clinic_index.nearest(
+            lat, lng, k=limit, radius_km=radius_km, open_bucket=open_bucket
+        )
+        return _fetch(queryset, found)
+    raise ValueError(f"Unknown clinic spatial backend {backend!r}")
+
+
+def _postgis_nearest(queryset, lat, lng, limit, radius_km, open_bucket):
+    point = (lng, lat)
+    if open_bucket is not None:
+        queryset = queryset.filter(
+            RawSQL(
+                "get_bit(hours_bitmap, %s) = 1",
+                (open_bucket,),
+                output_field=BooleanField(),
+            ),
+            hours_bitmap__isnull=False,
+        )
+    clinics = list(
+        queryset.annotate(
+            distance_m=RawSQL(
+                f"ST_Distance({CLINIC_POINT}, {GEOGRAPHY_POINT})",
+                point,
+                output_field=FloatField(),
+            )
+        )
+        .filter(
+            RawSQL(
+                f"ST_DWithin({CLINIC_POINT}, {GEOGRAPHY_POINT}, %s)",
+                (*point, radius_km * 1000),
+                output_field=BooleanField(),
+            )
+        )
+        .order_by(RawSQL(f"{CLINIC_POINT} <-> {GEOGRAPHY_POINT}", point))[:limit]
+    )
+    for clinic in clinics:
+        clinic.distance_km = clinic.distance_m / 1000
+    return clinics
+
+
+def geohash_ranges(cells):
+    """Filter matching every geohash that starts with one of ``cells``"""
+    condition = Q()
+    for cell in cells:
+        # "{" sorts right after "z", the last geohash character
+        condition |= Q(geohash__gte=cell, geohash__lt=cell + "{")
+    return condition
+
+
+def _geohash_nearest(queryset, lat, lng, limit, radius_km, open_bucket):
+    found = []
+    for precision in FALLBACK_PRECISIONS:
+        covered = covered_radius_km(lat, lng, precision)
+        last = precision == FALLBACK_PRECISIONS[-1] or covered >= radius_km
+
+        # Anything within `covered` is in the neighbourhood, so the clinics
+        # found up to that distance are guaranteed to be the nearest ones
+        bound = min(covered, radius_km)
+        min_lat, min_lng, max_lat, max_lng = bounding_box(lat, lng, bound)
+        candidates = queryset.filter(
+            geohash_ranges(neighbourhood(lat, lng, precision)),
+            latitude__range=(min_lat, max_lat),
+            longitude__range=(min_lng, max_lng),
+        )
+        if open_bucket is None:
+            rows = candidates.values_list("id", "latitude", "longitude")
+        else:
+            rows = list(
+                candidates.filter(hours_bitmap__isnull=False).values_list(
+                    "id", "latitude", "longitude", "hours_bitmap"
+                )
+            )
+            is_open = open_mask([from_bytes(row[3]) for row in rows], open_bucket)
+            rows = [row[:3] for row, open_ in zip(rows, is_open) if open_]
+        found = sorted(
+            (distance, pk)
+            for pk, clinic_lat, clinic_lng in rows
+            if (distance := haversine_km(lat, lng, clinic_lat, clinic_lng)) <= bound
+        )
+        if len(found) >= limit or last:
+            break
+
+    return _fetch(queryset, found[:limit])
+
+
+def _fetch(queryset, found):
+    """Load ``(distance_km, pk)`` pairs as clinics, keeping their order"""
+    clinics = queryset.in_bulk([pk for _, pk in found])
+    results = []
+    for distance, pk in found:
+        # Rows excluded by the queryset are skipped
+        clinic = clinics.get(pk)
+        if clinic is not None:
+            clinic.distance_km = distance
+            results.append(clinic)
+    return results
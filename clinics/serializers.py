@@ -0,0 +1,62 @@
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.utils import timezone
+from rest_framework import serializers
+from .hours import bucket_at, hours_to_bitmap
+from .models import Clinic
+
+
+class ClinicSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Clinic
+        fields = [
+            "id",
+            "name",
+            "address",
+            "city",
+            "phone",
+            "latitude",
+            "longitude",
+            "opening_hours",
+            "is_active",
+        ]
+        read_only_fields = ["id"]
+
+    def validate_opening_hours(self, value):
+        try:
+            hours_to_bitmap(value)
+        except DjangoValidationError as e:
+            raise serializers.ValidationError(e.messages)
+        return value
+
+
+class NearbyClinicSerializer(ClinicSerializer):
+    distance_km = serializers.FloatField(read_only=True)
+
+    class Meta(ClinicSerializer.Meta):
+        fields = ClinicSerializer.Meta.fields + ["distance_km"]
+
+
+class ClinicSearchSerializer(serializers.Serializer):
+    """Query parameters for the nearby clinic search"""
+
+    MAX_RADIUS_KM = 200
+
+    lat = serializers.FloatField(min_value=-90, max_value=90)
+    lng = serializers.FloatField(min_value=-180, max_value=180)
+    radius_km = serializers.FloatField(
+        required=False, default=10, min_value=0.1, max_value=MAX_RADIUS_KM
+    )
+    limit = serializers.IntegerField(
+        required=False, default=10, min_value=1, max_value=100
+    )
+    open_now = serializers.BooleanField(required=False, default=False)
+    open_at = serializers.DateTimeField(
+        required=False, help_text="Only clinics open at this time"
+    )
+
+    def validate(self, attrs):
+        open_at = attrs.pop("open_at", None)
+        if attrs.pop("open_now"):
+            open_at = timezone.now()
+        attrs["open_bucket"] = None if open_at is None else bucket_at(open_at)
+        return attrs
@@ -0,0 +1,16 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .index import clinic_index
+from .models import Clinic
+
+
+@receiver(post_save, sender=Clinic)
+def index_saved_clinic(sender, instance, **kwargs):
+    transaction.on_commit(lambda: clinic_index.apply(clinic=instance))
+
+
+@receiver(post_delete, sender=Clinic)
+def unindex_deleted_clinic(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: clinic_index.apply(deleted_pk=pk))
@@ -1,3 +1,342 @@
-from django.test import TestCase
+import io
+import json
+import os
+import random
+import tempfile
+from datetime import datetime, timezone as dt_timezone
+from math import cos, radians, sin
+from unittest.mock import patch
 
-# Create your tests here.
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from .geo import (
+    covered_radius_km,
+    encode_geohash,
+    geohash_bounds,
+    haversine_km,
+    neighbourhood,
+)
+from .hours import BUCKETS_PER_DAY, bucket_at, hours_to_bitmap, is_open, to_bytes
+from .importer import import_clinics, iter_json_values, read_geojson
+from .index import VERSION_CHECK_INTERVAL, ClinicIndex, clinic_index, warm_up
+from .kdtree import KDTree
+from .models import Clinic
+from .search import nearest_clinics
+
+ADDIS_ABABA = (9.03, 38.74)
+
+
+WEEKDAYS = {"mon": [["08:00", "17:00"]], "tue": [["08:00", "17:00"]]}
+NIGHTS = {"mon": [["20:00", "02:00"]], "sun": [["22:00", "06:00"]]}
+
+
+def make_clinics(count, center=ADDIS_ABABA, spread=1.0, seed=1):
+    rng = random.Random(seed)
+    return Clinic.objects.bulk_create(
+        Clinic(
+            name=f"Clinic {i}",
+            latitude=lat,
+            longitude=lng,
+            geohash=encode_geohash(lat, lng),
+            opening_hours=hours,
+            hours_bitmap=to_bytes(hours_to_bitmap(hours)) if hours else None,
+        )
+        for i in range(count)
+        for lat, lng, hours in [
+            (
+                center[0] + rng.uniform(-spread, spread),
+                center[1] + rng.uniform(-spread, spread),
+                rng.choice([WEEKDAYS, NIGHTS, {}]),
+            )
+        ]
+    )
+
+
+class GeoTests(TestCase):
+    def test_geohash_round_trip(self):
+        self.assertEqual(encode_geohash(57.64911, 10.40744, 11), "u4pruydqqvj")
+        min_lat, min_lng, max_lat, max_lng = geohash_bounds("u4pruydqqvj")
+        self.assertTrue(min_lat <= 57.64911 <= max_lat)
+        self.assertTrue(min_lng <= 10.40744 <= max_lng)
+
+    def test_neighbourhood_covers_radius(self):
+        lat, lng = ADDIS_ABABA
+        for precision in range(2, 7):
+            radius = covered_radius_km(lat, lng, precision)
+            cells = neighbourhood(lat, lng, precision)
+            # Points on a circle just inside the covered radius
+            step = radius * 0.99 / 111.2
+            for bearing in range(0, 360, 15):
+                point_lat = lat + step * cos(radians(bearing))
+                point_lng = lng + step * sin(radians(bearing)) / cos(radians(lat))
+                self.assertIn(encode_geohash(point_lat, point_lng, precision), cells)
+
+
+class OpeningHoursTests(TestCase):
+    def test_bitmap(self):
+        bitmap = hours_to_bitmap(NIGHTS)
+        monday_20 = 20 * 4
+        self.assertTrue(is_open(bitmap, monday_20))
+        self.assertFalse(is_open(bitmap, monday_20 - 1))
+        # Monday night runs into Tuesday, Sunday night into Monday
+        self.assertTrue(is_open(bitmap, BUCKETS_PER_DAY + 7))
+        self.assertFalse(is_open(bitmap, BUCKETS_PER_DAY + 8))
+        self.assertTrue(is_open(bitmap, 5 * 4))
+        self.assertFalse(is_open(bitmap, 6 * 4))
+
+        for invalid in ({"mon": [["08:10", "17:00"]]}, {"xyz": []}, []):
+            with self.assertRaises(ValidationError):
+                hours_to_bitmap(invalid)
+
+    @override_settings(CLINIC_TIME_ZONE="Africa/Addis_Ababa")
+    def test_bucket_in_clinic_time_zone(self):
+        # Monday 06:00 UTC is 09:00 in Addis Ababa
+        moment = datetime(2030, 1, 7, 6, 0, tzinfo=dt_timezone.utc)
+        self.assertEqual(bucket_at(moment), 9 * 4)
+
+
+class NearestClinicsTests(TestCase):
+    def test_geohash_search_matches_brute_force(self):
+        make_clinics(500)
+        clinics = list(Clinic.objects.values_list("id", "latitude", "longitude"))
+        rng = random.Random(7)
+        for _ in range(20):
+            lat = ADDIS_ABABA[0] + rng.uniform(-1, 1)
+            lng = ADDIS_ABABA[1] + rng.uniform(-1, 1)
+            radius = rng.choice([2, 10, 50])
+            expected = sorted(
+                (haversine_km(lat, lng, c_lat, c_lng), pk)
+                for pk, c_lat, c_lng in clinics
+            )
+            expected = [pk for distance, pk in expected if distance <= radius][:5]
+            found = nearest_clinics(lat, lng, limit=5, radius_km=radius)
+            self.assertEqual([clinic.id for clinic in found], expected)
+
+    def test_open_filter_matches_brute_force(self):
+        make_clinics(300)
+        rows = Clinic.objects.values_list(
+            "id", "latitude", "longitude", "opening_hours"
+        )
+        lat, lng = ADDIS_ABABA
+        monday_noon = 12 * 4
+        expected = sorted(
+            (haversine_km(lat, lng, c_lat, c_lng), pk)
+            for pk, c_lat, c_lng, hours in rows
+            if hours and is_open(hours_to_bitmap(hours), monday_noon)
+        )
+        expected = [pk for _, pk in expected[:5]]
+        for backend in ("geohash", "kdtree"):
+            with override_settings(CLINIC_SPATIAL_BACKEND=backend):
+                found = nearest_clinics(
+                    lat, lng, limit=5, radius_km=200, open_bucket=monday_noon
+                )
+            self.assertEqual([clinic.id for clinic in found], expected)
+        clinic_index.clear()
+
+
+class KDTreeTests(TestCase):
+    def test_matches_brute_force_through_inserts_and_deletes(self):
+        rng = random.Random(3)
+        points = {i: (rng.uniform(-80, 80), rng.uniform(-180, 180)) for i in range(600)}
+        tree = KDTree(
+            [(key, lat, lng) for key, (lat, lng) in points.items() if key < 300]
+        )
+        for key in range(300, 600):
+            tree.insert(key, *points[key])
+        for key in range(0, 600, 3):
+            tree.delete(key)
+            del points[key]
+
+        for _ in range(30):
+            lat, lng = rng.uniform(-90, 90), rng.uniform(-180, 180)
+            expected = sorted(
+                (haversine_km(lat, lng, p_lat, p_lng), key)
+                for key, (p_lat, p_lng) in points.items()
+            )
+            found = tree.nearest(lat, lng, k=5)
+            self.assertEqual([key for _, key in found], [k for _, k in expected[:5]])
+            self.assertAlmostEqual(found[0][0], expected[0][0], places=6)
+
+            within = tree.within(lat, lng, 2000)
+            self.assertEqual(
+                [key for _, key in within],
+                [key for distance, key in expected if distance <= 2000],
+            )
+
+
+@override_settings(CLINIC_SPATIAL_BACKEND="kdtree")
+class ClinicIndexTests(TestCase):
+    def setUp(self):
+        clinic_index.clear()
+        self.addCleanup(clinic_index.clear)
+
+    def test_signals_keep_the_index_current(self):
+        lat, lng = ADDIS_ABABA
+        make_clinics(50)
+        with self.assertNumQueries(3):
+            # Version, initial load and loading the matches
+            nearest_clinics(lat, lng, limit=3)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            clinic = Clinic.objects.create(name="New", latitude=lat, longitude=lng)
+        # The version was checked moments ago, only the match is loaded
+        with self.assertNumQueries(1):
+            [nearest] = nearest_clinics(lat, lng, limit=1)
+        self.assertEqual(nearest, clinic)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            clinic.is_active = False
+            clinic.save()
+        self.assertNotIn(clinic.pk, clinic_index.tree())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Clinic.objects.get(name="Clinic 0").delete()
+        self.assertEqual(len(clinic_index.tree()), 49)
+
+    def test_other_processes_reload_after_an_import(self):
+        lat, lng = ADDIS_ABABA
+        make_clinics(20)
+        clock = self.enterContext(patch("clinics.index.time"))
+        clock.monotonic.return_value = 100.0
+        # A web worker with its own index and its own per-process cache
+        worker = ClinicIndex()
+        self.assertEqual(len(worker.tree()), 20)
+
+        with override_settings(
+            CACHES={
+                "default": {
+                    "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+                    "LOCATION": "import-command",
+                }
+            }
+        ):
+            stats = import_clinics(
+                [{"external_id": "N1", "name": "New", "lat": lat, "lng": lng}]
+            )
+        self.assertEqual(stats.imported, 1)
+
+        # The worker compares versions every VERSION_CHECK_INTERVAL seconds
+        clock.monotonic.return_value = 102.0
+        with self.assertNumQueries(0):
+            self.assertEqual(len(worker.tree()), 20)
+        clock.monotonic.return_value = 100.0 + VERSION_CHECK_INTERVAL
+        [(_, pk)] = worker.nearest(lat, lng, k=1)
+        self.assertEqual(pk, Clinic.objects.get(external_id="N1").pk)
+        self.assertEqual(len(worker.tree()), 21)
+
+    def test_warm_up_builds_the_tree(self):
+        make_clinics(5)
+        with self.assertNumQueries(2):
+            warm_up()
+        with self.assertNumQueries(0):
+            self.assertEqual(len(clinic_index.tree()), 5)
+
+    def test_searches_keep_the_previous_tree_during_a_reload(self):
+        lat, lng = ADDIS_ABABA
+        make_clinics(5)
+        index = ClinicIndex()
+        index.tree()
+        Clinic.objects.create(name="New", latitude=lat, longitude=lng)
+        index.invalidate()
+
+        # Another thread is reloading: searches neither wait nor query
+        with index._reload_lock, self.assertNumQueries(0):
+            self.assertEqual(len(index.nearest(lat, lng, k=10)), 5)
+        self.assertEqual(len(index.nearest(lat, lng, k=10)), 6)
+
+
+class ImportTests(TestCase):
+    def write(self, suffix, content):
+        handle = tempfile.NamedTemporaryFile(
+            "w", suffix=suffix, delete=False, encoding="utf-8"
+        )
+        with handle:
+            handle.write(content)
+        self.addCleanup(os.unlink, handle.name)
+        return handle.name
+
+    def test_csv_upserts_on_external_id(self):
+        path = self.write(
+            ".csv",
+            "external_id,name,city,lat,lng,opening_hours\n"
+            'A1,Alpha,Addis Ababa,9.03,38.74,"{""mon"": [[""08:00"", ""17:00""]]}"\n'
+            "B2,Beta,Adama,8.54,39.27,\n"
+            ",Gamma,,9.1,38.8,\n"
+            "C3,,,9.1,38.8,\n"
+            "D4,Delta,,95,38.8,\n",
+        )
+        out, err = io.StringIO(), io.StringIO()
+        call_command("import_clinics", path, chunk_size=2, stdout=out, stderr=err)
+        self.assertIn("Imported 3 of 5 records (2 invalid)", out.getvalue())
+        self.assertIn("record 4: name is required", err.getvalue())
+        alpha = Clinic.objects.get(external_id="A1")
+        self.assertEqual(alpha.geohash, encode_geohash(9.03, 38.74))
+        self.assertIsNotNone(alpha.hours_bitmap)
+
+        path = self.write(".csv", "external_id,name,lat,lng\nA1,Alpha 2,9.0,38.7\n")
+        call_command("import_clinics", path, stdout=io.StringIO())
+        alpha.refresh_from_db()
+        self.assertEqual(Clinic.objects.count(), 3)
+        self.assertEqual(alpha.name, "Alpha 2")
+        self.assertEqual(alpha.geohash, encode_geohash(9.0, 38.7))
+        self.assertIsNone(alpha.hours_bitmap)
+
+    def test_geojson_across_buffer_boundaries(self):
+        features = [
+            {
+                "type": "Feature",
+                "geometry": {"type": "Point", "coordinates": [38.74 + i, 9.03]},
+                "properties": {"id": str(i), "name": f"Clinic [{i}], {{x}}"},
+            }
+            for i in range(5)
+        ]
+        collection = json.dumps(
+            {"type": "FeatureCollection", "features": features}, indent=2
+        )
+        lines = "\n".join(json.dumps(feature) for feature in features)
+        for content in (collection, lines):
+            values = list(iter_json_values(io.StringIO(content), read_size=7))
+            self.assertEqual(values, features)
+
+        path = self.write(".geojson", collection)
+        stats = import_clinics(read_geojson(path))
+        self.assertEqual(stats.imported, 5)
+        self.assertEqual(Clinic.objects.get(external_id="2").longitude, 40.74)
+
+    def test_dry_run_writes_nothing(self):
+        path = self.write(".csv", "name,lat,lng\nAlpha,9.03,38.74\n")
+        out = io.StringIO()
+        call_command("import_clinics", path, dry_run=True, stdout=out)
+        self.assertIn("Validated 1 of 1", out.getvalue())
+        self.assertFalse(Clinic.objects.exists())
+
+
+class ClinicAPITests(APITestCase):
+    def test_nearby(self):
+        near = Clinic.objects.create(name="Near", latitude=9.031, longitude=38.741)
+        Clinic.objects.create(name="Far", latitude=9.5, longitude=38.74)
+        Clinic.objects.create(
+            name="Closed", latitude=9.03, longitude=38.74, is_active=False
+        )
+        lat, lng = ADDIS_ABABA
+        response = self.client.get(
+            reverse("clinic-nearby"), {"lat": lat, "lng": lng, "radius_km": 5}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        [clinic] = response.data
+        self.assertEqual(clinic["id"], near.id)
+        self.assertLess(clinic["distance_km"], 0.2)
+
+    def test_only_staff_can_write(self):
+        response = self.client.post(
+            reverse("clinic-list"), {"name": "X", "latitude": 1, "longitude": 1}
+        )
+        self.assertIn(
+            response.status_code,
+            (status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN),
+        )
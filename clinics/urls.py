@@ -1,2 +1,10 @@
 from django.urls import path, include
-from . import views
\ No newline at end of file
+from rest_framework.routers import DefaultRouter
+from . import views
+
+router = DefaultRouter()
+router.register(r"", views.ClinicViewSet, basename="clinic")
+
+urlpatterns = [
+    path("", include(router.urls)),
+]
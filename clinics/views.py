@@ -0,0 +1,62 @@
+from rest_framework import permissions, viewsets, pagination
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from drf_spectacular.utils import extend_schema
+from .models import Clinic
+from .search import nearest_clinics
+from .serializers import (
+    ClinicSearchSerializer,
+    ClinicSerializer,
+    NearbyClinicSerializer,
+)
+
+
+class ClinicAdminPermission(permissions.BasePermission):
+    message = "Only admin users can modify clinics"
+
+    def has_permission(self, request, view):
+        if request.method in permissions.SAFE_METHODS:
+            return True
+        return request.user and request.user.is_staff
+
+
+class ClinicsPagination(pagination.PageNumberPagination):
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+
+class ClinicViewSet(viewsets.ModelViewSet):
+    serializer_class = ClinicSerializer
+    permission_classes = [ClinicAdminPermission]
+    pagination_class = ClinicsPagination
+
+    def get_queryset(self):
+        queryset = Clinic.objects.all()
+        if not self.request.user.is_staff:
+            queryset = queryset.filter(is_active=True)
+        return queryset
+
+    @extend_schema(
+        parameters=[ClinicSearchSerializer],
+        responses=NearbyClinicSerializer(many=True),
+    )
+    @action(detail=False, methods=["get"])
+    def nearby(self, request):
+        """
+        Active clinics within `radius_km` of a point, nearest first.
+        `open_now` / `open_at` keep only clinics open at that time.
+        """
+        params = ClinicSearchSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        data = params.validated_data
+
+        clinics = nearest_clinics(
+            data["lat"],
+            data["lng"],
+            limit=data["limit"],
+            radius_km=data["radius_km"],
+            queryset=Clinic.objects.filter(is_active=True),
+            open_bucket=data["open_bucket"],
+        )
+        return Response(NearbyClinicSerializer(clinics, many=True).data)
@@ -0,0 +1,151 @@
+"""
+One request and token budget for every AI call, shared by all workers.
+
+Symptom checks, chat and skin diagnoses all spend the same Gemini quota.
+Each call reserves its share of the budget with ``reserve()`` right before
+reaching the provider, so peaks are absorbed here instead of coming back as
+provider 429s:
+
+* requests and tokens per minute are counted with the sliding window
+  counters of ``core/throttling.py``, in the same ``THROTTLE_COUNTER_STORE``;
+* a call reserves one request and an estimate of its tokens, and
+  ``Reservation.settle()`` corrects the estimate with the usage the
+  provider reports;
+* every kind of call may only fill its ``share`` of the limits, so as the
+  minute fills up the lowest priorities are turned away first and the
+  rest of the budget stays available to the more important calls;
+* a call that does not fit works out from the counters how long the
+  window takes to slide far enough, like ``SlidingWindowRateThrottle.wait``.
+  If that is within its ``max_wait`` (at most ``MAX_WAIT``) it sleeps once
+  and tries again, otherwise, or if the room was taken meanwhile,
+  ``BudgetExceeded`` is raised with the computed ``retry_after``. Callers
+  answer it like any other provider outage.
+
+Limits and priorities come from ``AI_BUDGET``; a limit of ``None`` is not
+enforced.
+"""
+
+import logging
+import math
+import time
+
+from django.conf import settings
+
+from .throttling import get_store
+
+logger = logging.getLogger(__name__)
+
+REQUESTS_KEY = "ai-budget:requests"
+TOKENS_KEY = "ai-budget:tokens"
+DURATION = 60
+# Longest a call may queue for room, whatever its priority says: the call
+# itself still has to fit within gunicorn's 30 s request timeout
+MAX_WAIT = 5
+
+
+class BudgetExceeded(Exception):
+    def __init__(self, kind, retry_after):
+        super().__init__(f"AI budget exhausted for {kind}, retry in {retry_after}s")
+        self.kind = kind
+        self.retry_after = retry_after
+
+
+def estimate_tokens(prompt, max_output_tokens, images=0):
+    """Upper bound of a call's tokens, about four characters per token"""
+    # Gemini bills an image as 258 tokens
+    return math.ceil(len(prompt) / 4) + max_output_tokens + 258 * images
+
+
+def response_tokens(response):
+    usage = getattr(response, "usage_metadata", None)
+    return getattr(usage, "total_token_count", None) or None
+
+
+class Reservation:
+    def __init__(self, window, tokens):
+        self.window = window
+        self.tokens = tokens
+
+    def settle(self, response):
+        """Replace the estimate with the tokens the provider reports"""
+        used = response_tokens(response)
+        if used is None or used == self.tokens:
+            return
+        store = get_store()
+        if used > self.tokens:
+            store.hit(
+                TOKENS_KEY, self.window, timeout=DURATION * 2, amount=used - self.tokens
+            )
+        else:
+            store.undo(TOKENS_KEY, self.window, amount=self.tokens - used)
+        self.tokens = used
+
+
+def _wait(current, previous, amount, cap, elapsed):
+    """
+    Seconds until ``amount`` more fits within ``cap``, given the counts of
+    the current window (without ``amount``) and of the previous one.
+    """
+    if amount > cap:
+        return math.inf
+    if current + amount > cap:
+        # Only in the next window, once enough of this one has slid out:
+        # current * (1 - t / DURATION) + amount <= cap
+        later = DURATION * (1 - (cap - amount) / current)
+        return DURATION - elapsed + later
+    # previous * (1 - t / DURATION) + current + amount <= cap
+    needed = DURATION * (1 - (cap - current - amount) / previous)
+    return max(0, needed - elapsed)
+
+
+def _try_reserve(share, tokens, now):
+    """
+    Count the call if it fits within ``share`` of the limits. Returns the
+    window it was counted in and 0, or ``None`` and the seconds until it
+    would fit after taking it back.
+    """
+    config = settings.AI_BUDGET
+    store = get_store()
+    window = int(now // DURATION)
+    elapsed = now - window * DURATION
+    weight = 1 - elapsed / DURATION
+    counted = []
+    wait = None
+    for key, amount, limit in (
+        (REQUESTS_KEY, 1, config["REQUESTS_PER_MINUTE"]),
+        (TOKENS_KEY, tokens, config["TOKENS_PER_MINUTE"]),
+    ):
+        if limit is None:
+            continue
+        current, previous = store.hit(key, window, timeout=DURATION * 2, amount=amount)
+        counted.append((key, amount))
+        if previous * weight + current > limit * share:
+            wait = _wait(current - amount, previous, amount, limit * share, elapsed)
+            break
+    if wait is None:
+        return window, 0
+    for key, amount in counted:
+        store.undo(key, window, amount=amount)
+    return None, wait
+
+
+def reserve(kind, tokens, wait=True):
+    """
+    Reserve one request and ``tokens`` for a call of ``kind`` (a key of
+    ``AI_BUDGET["PRIORITIES"]``), waiting for room if allowed to. Retries
+    of a call pass ``wait=False``: the request already queued once, and
+    queueing per attempt would hold its worker for several waits.
+    """
+    priority = settings.AI_BUDGET["PRIORITIES"][kind]
+    max_wait = min(priority["max_wait"], MAX_WAIT) if wait else 0
+    window, wait = _try_reserve(priority["share"], tokens, time.time())
+    if window is None and wait <= max_wait:
+        # One sleep until the window has slid far enough, not a poll
+        time.sleep(wait)
+        window, wait = _try_reserve(priority["share"], tokens, time.time())
+    if window is None:
+        logger.warning(f"Shedding {kind} AI call, budget exhausted")
+        if math.isinf(wait):
+            wait = DURATION - time.time() % DURATION
+        raise BudgetExceeded(kind, retry_after=math.ceil(wait))
+    return Reservation(window, tokens)
@@ -0,0 +1,201 @@
+"""
+Shared fixtures for the ``bench_*`` management commands.
+
+Benchmarks seed synthetic rows inside ``rolled_back()`` so they can be run
+against any database without leaving data behind.
+"""
+
+import random
+from contextlib import contextmanager
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from chatbot.models import ChatMessage, ChatSession
+from clinics.geo import encode_geohash
+from clinics.models import Clinic
+from doctors.models import DoctorProfile
+from education.models import Article, Video
+from symptoms.models import Condition, Symptom, SymptomCheck
+
+
+@contextmanager
+def rolled_back():
+    with transaction.atomic():
+        yield
+        transaction.set_rollback(True)
+
+
+def seed_catalog(rows):
+    """Create ``rows`` articles, videos and doctor profiles with relations"""
+    conditions = Condition.objects.bulk_create(
+        Condition(name=f"bench condition {i}", description="bench", severity=2)
+        for i in range(5)
+    )
+    symptoms = Symptom.objects.bulk_create(
+        Symptom(name=f"bench symptom {i}", description="bench") for i in range(5)
+    )
+
+    articles = Article.objects.bulk_create(
+        Article(
+            title=f"Article {i}",
+            summary="Summary",
+            content="Lorem ipsum dolor sit amet. " * 40,
+            tags=["bench", f"tag{i % 10}"],
+        )
+        for i in range(rows)
+    )
+    Article.related_conditions.through.objects.bulk_create(
+        Article.related_conditions.through(
+            article_id=article.id, condition_id=condition.id
+        )
+        for article in articles
+        for condition in conditions[:2]
+    )
+
+    videos = Video.objects.bulk_create(
+        Video(
+            title=f"Video {i}",
+            video_url="https://example.com/video",
+            duration_minutes=10,
+        )
+        for i in range(rows)
+    )
+    Video.related_symptoms.through.objects.bulk_create(
+        Video.related_symptoms.through(video_id=video.id, symptom_id=symptom.id)
+        for video in videos
+        for symptom in symptoms[:2]
+    )
+
+    User = get_user_model()
+    users = User.objects.bulk_create(
+        User(
+            email=f"bench-doctor-{i}@example.com",
+            first_name="Bench",
+            last_name=f"Doctor {i}",
+            phone=f"+2519{20000000 + i}",
+            role=User.Role.DOCTOR,
+            password="!",
+        )
+        for i in range(rows)
+    )
+    DoctorProfile.objects.bulk_create(
+        DoctorProfile(
+            user=user,
+            license_number=f"BENCH-{user.id}",
+            specialization="General",
+            consultation_fee=Decimal("150.00"),
+        )
+        for user in users
+    )
+
+
+def seed_user_activity(rows):
+    """Create a staff user with a long chat session and symptom checks"""
+    User = get_user_model()
+    user = User.objects.create_user(
+        email="bench-renderer@example.com",
+        first_name="Bench",
+        last_name="Patient",
+        phone="+251911000001",
+        password="bench-password",
+        is_staff=True,
+    )
+
+    history = [
+        {
+            "role": "user" if i % 2 else "assistant",
+            "content": "Fever and cough " * 8,
+        }
+        for i in range(rows)
+    ]
+    session = ChatSession.objects.create(user=user, context={"history": history})
+    ChatMessage.objects.bulk_create(
+        ChatMessage(
+            session=session,
+            is_bot=bool(i % 2),
+            content={
+                "input": "I have had a headache for three days",
+                "output": {
+                    "mode": "symptoms",
+                    "conditions": ["Migraine", "Tension headache"],
+                    "recommendations": ["Rest in a dark room", "Stay hydrated"],
+                    "urgency": "low",
+                },
+            },
+        )
+        for i in range(rows)
+    )
+
+    symptoms = list(Symptom.objects.all()[:3])
+    conditions = list(Condition.objects.all()[:2])
+    for _ in range(min(rows, 100)):
+        check = SymptomCheck.objects.create(
+            user=user,
+            ai_diagnosis={
+                "conditions": [c.name for c in conditions],
+                "recommendations": ["Consult a doctor"] * 5,
+                "urgency": "medium",
+            },
+        )
+        check.symptoms.set(symptoms)
+        check.conditions.set(conditions)
+    return user
+
+
+def collect_payloads(user, rows):
+    """Return ``(label, data)`` pairs for the main list endpoint payloads"""
+    client = APIClient()
+    client.force_authenticate(user=user)
+    params = {"page_size": min(rows, 100)}
+
+    payloads = []
+    for label, url_name in [
+        ("articles", "article-list"),
+        ("videos", "video-list"),
+        ("doctor profiles", "doctor-profile-list"),
+        ("symptom checks", "symptom-check-list"),
+    ]:
+        response = client.get(reverse(url_name), params)
+        payloads.append((label, response.data))
+
+    # The chat session payload is assembled from the model directly so
+    # the benchmark measures encoding of the stored context and messages
+    session = ChatSession.objects.prefetch_related("messages").get(user=user)
+    payloads.append(
+        (
+            "chat session",
+            {
+                "id": session.id,
+                "user": user.id,
+                "context": session.context,
+                "created_at": session.created_at,
+                "messages": [
+                    {"content": message.content, "created_at": message.created_at}
+                    for message in session.messages.all()
+                ],
+            },
+        )
+    )
+    return payloads
+
+
+def seed_clinics(rows, center=(9.03, 38.74), spread=3.0, seed=0):
+    """Create ``rows`` clinics scattered uniformly around ``center``"""
+    rng = random.Random(seed)
+    clinics = []
+    for i in range(rows):
+        lat = center[0] + rng.uniform(-spread, spread)
+        lng = center[1] + rng.uniform(-spread, spread)
+        clinics.append(
+            Clinic(
+                name=f"bench clinic {i}",
+                latitude=lat,
+                longitude=lng,
+                geohash=encode_geohash(lat, lng),
+            )
+        )
+    Clinic.objects.bulk_create(clinics, batch_size=5000)
@@ -0,0 +1,42 @@
+"""
+Map unique constraint violations back to the fields that caused them.
+
+Writes that rely on the database to enforce uniqueness insert first and
+translate the ``IntegrityError`` afterwards, instead of racing ``exists()``
+checks against concurrent requests. The violated column is recognised in
+the messages of both supported backends:
+
+* SQLite: ``UNIQUE constraint failed: accounts_user.email``
+* PostgreSQL: ``... DETAIL:  Key (email)=(a@example.com) already exists.``
+"""
+
+from rest_framework import serializers
+
+
+def unique_violations(error, model, messages):
+    """
+    The entries of ``messages`` (field name -> error message) whose unique
+    constraint on ``model`` is reported by ``error``.
+    """
+    text = str(error)
+    table = model._meta.db_table
+    violations = {}
+    for name, message in messages.items():
+        column = model._meta.get_field(name).column
+        if f"{table}.{column}" in text or f"Key ({column})=" in text:
+            violations[name] = [message]
+    return violations
+
+
+def raise_unique_violations(error, *checks):
+    """
+    Raise a DRF ``ValidationError`` for the fields reported by ``error``;
+    ``checks`` are ``(model, messages)`` pairs. Errors that match none of
+    them are re-raised unchanged.
+    """
+    violations = {}
+    for model, messages in checks:
+        violations.update(unique_violations(error, model, messages))
+    if not violations:
+        raise error
+    raise serializers.ValidationError(violations) from error
@@ -0,0 +1,37 @@
+"""
+Long-running maintenance loops for the Procfile's worker processes.
+
+A command run with ``--interval`` lives for weeks. Its database connection
+can be dropped under it (e.g. by the provider's idle timeout), and a single
+failing pass must not end the process. ``run_periodically`` therefore
+closes stale connections before every pass, like Django does around each
+request, and logs a failing pass instead of raising it.
+"""
+
+import logging
+import time
+
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+
+def run_periodically(job, interval):
+    """
+    Call ``job()`` once when ``interval`` is 0, otherwise every ``interval``
+    seconds forever. Errors of a single run are raised, those of a repeated
+    run are logged.
+    """
+    while True:
+        close_old_connections()
+        try:
+            job()
+        except Exception:
+            if not interval:
+                raise
+            logger.exception("Periodic job %s failed", job.__qualname__)
+        finally:
+            close_old_connections()
+        if not interval:
+            return
+        time.sleep(interval)
@@ -0,0 +1,105 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+
+from clinics.geo import bounding_box, haversine_km
+from clinics.index import clinic_index
+from clinics.models import Clinic
+from clinics.search import nearest_clinics, postgis_enabled
+from core.benchmarks import rolled_back, seed_clinics
+
+
+def bounding_box_search(lat, lng, limit, radius_km):
+    """Naive SQL baseline: latitude/longitude range filter, sorted in Python"""
+    min_lat, min_lng, max_lat, max_lng = bounding_box(lat, lng, radius_km)
+    rows = Clinic.objects.filter(
+        latitude__range=(min_lat, max_lat), longitude__range=(min_lng, max_lng)
+    ).values_list("id", "latitude", "longitude")
+    found = sorted(
+        (d, pk)
+        for pk, c_lat, c_lng in rows
+        if (d := haversine_km(lat, lng, c_lat, c_lng)) <= radius_km
+    )
+    return [pk for _, pk in found[:limit]]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the clinic search backends with a naive bounding-box query on "
+        "synthetic clinics. Data is seeded in a rolled back transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=100_000)
+        parser.add_argument("--queries", type=int, default=200)
+        parser.add_argument("--limit", type=int, default=10)
+        parser.add_argument("--radius", type=float, default=20.0)
+
+    def handle(self, *args, **options):
+        with rolled_back():
+            seed_clinics(options["rows"])
+            self._run(options)
+        clinic_index.clear()
+
+    def _time(self, label, search, points, expected=None):
+        started = time.perf_counter()
+        results = [search(lat, lng) for lat, lng in points]
+        per_query = (time.perf_counter() - started) * 1000 / len(points)
+        identical = "" if expected is None else f" identical={results == expected}"
+        self.stdout.write(f"{label:<14} {per_query:8.2f}ms/query{identical}")
+        return results
+
+    def _run(self, options):
+        rng = random.Random(1)
+        points = [
+            (9.03 + rng.uniform(-3, 3), 38.74 + rng.uniform(-3, 3))
+            for _ in range(options["queries"])
+        ]
+        limit, radius = options["limit"], options["radius"]
+        self.stdout.write(
+            f"clinics={options['rows']} queries={len(points)} "
+            f"limit={limit} radius={radius}km"
+        )
+
+        expected = self._time(
+            "bounding box",
+            lambda lat, lng: bounding_box_search(lat, lng, limit, radius),
+            points,
+        )
+
+        clinic_index.clear()
+        started = time.perf_counter()
+        clinic_index.tree()
+        self.stdout.write(
+            f"{'kdtree build':<14} {(time.perf_counter() - started) * 1000:8.1f}ms"
+        )
+
+        backends = ["geohash", "kdtree"]
+        if postgis_enabled():
+            backends.append("postgis")
+        for backend in backends:
+            with override_settings(CLINIC_SPATIAL_BACKEND=backend):
+                self._time(
+                    backend,
+                    lambda lat, lng: [
+                        clinic.id
+                        for clinic in nearest_clinics(
+                            lat, lng, limit=limit, radius_km=radius
+                        )
+                    ],
+                    points,
+                    expected,
+                )
+
+        # Index-only lookups, without loading the clinics afterwards
+        self._time(
+            "kdtree (ids)",
+            lambda lat, lng: [
+                pk
+                for _, pk in clinic_index.nearest(lat, lng, k=limit, radius_km=radius)
+            ],
+            points,
+            expected,
+        )
@@ -0,0 +1,53 @@
+import timeit
+
+from django.core.management.base import BaseCommand
+
+from core.benchmarks import (
+    collect_payloads,
+    rolled_back,
+    seed_catalog,
+    seed_user_activity,
+)
+from core.middleware import APICompressionMiddleware, brotli
+from core.renderers import FastJSONRenderer
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure compressed size and CPU time of APICompressionMiddleware for "
+        "the main list endpoint payloads. Data is seeded in a rolled back "
+        "transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=100)
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args, **options):
+        rows, repeat = options["rows"], options["repeat"]
+        middleware = APICompressionMiddleware(lambda request: None)
+        encodings = ["gzip", "br"] if brotli is not None else ["gzip"]
+        renderer = FastJSONRenderer()
+
+        with rolled_back():
+            seed_catalog(rows)
+            user = seed_user_activity(rows)
+            payloads = collect_payloads(user, rows)
+
+        for label, data in payloads:
+            content = renderer.render(data)
+            for encoding in encodings:
+                compressed = middleware.compress(encoding, content)
+                elapsed = min(
+                    timeit.repeat(
+                        lambda: middleware.compress(encoding, content),
+                        number=1,
+                        repeat=repeat,
+                    )
+                )
+                self.stdout.write(
+                    f"{label:<16} {encoding:<4} bytes={len(content):<8} "
+                    f"compressed={len(compressed):<7} "
+                    f"ratio={len(compressed) / len(content):.2f} "
+                    f"cpu={elapsed * 1000:.2f}ms"
+                )
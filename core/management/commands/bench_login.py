@@ -0,0 +1,85 @@
+import time
+from importlib.util import find_spec
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from accounts.last_login import last_login_writer
+from accounts.models import User
+from core.benchmarks import rolled_back
+
+PASSWORD = "bench-pass-123"
+PROFILES = {
+    "pbkdf2": "accounts.hashers.TunedPBKDF2PasswordHasher",
+    "argon2": "accounts.hashers.TunedArgon2PasswordHasher",
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure logins per second per core through the login endpoint for "
+        "each password hasher profile. Users are created in a rolled back "
+        "transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=50)
+        parser.add_argument("--logins", type=int, default=50)
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f"configured profile={settings.PASSWORD_HASHER_PROFILE} "
+            f"pbkdf2 iterations={settings.PASSWORD_PBKDF2_ITERATIONS} "
+            f"argon2={settings.PASSWORD_ARGON2_PARAMS}"
+        )
+        for profile, hasher in PROFILES.items():
+            if profile == "argon2" and find_spec("argon2") is None:
+                self.stdout.write("argon2   skipped, argon2-cffi is not installed")
+                continue
+            with override_settings(PASSWORD_HASHERS=[hasher]), rolled_back():
+                self._run(profile, options["users"], options["logins"])
+
+    def _run(self, profile, users, logins):
+        # Hash once, salts do not change the cost of verifying
+        password = make_password(PASSWORD)
+        User.objects.bulk_create(
+            User(
+                email=f"bench{i}@example.com",
+                first_name="Bench",
+                last_name="User",
+                phone=f"+2519{30000000 + i}",
+                password=password,
+            )
+            for i in range(users)
+        )
+        client = APIClient()
+        url = reverse("user-login")
+
+        started, cpu_started = time.perf_counter(), time.process_time()
+        with CaptureQueriesContext(connection) as queries:
+            for i in range(logins):
+                response = client.post(
+                    url,
+                    {"email": f"bench{i % users}@example.com", "password": PASSWORD},
+                )
+                assert response.status_code == 200, response.data
+        elapsed = time.perf_counter() - started
+        cpu = time.process_time() - cpu_started
+        last_login_writer.flush()
+
+        hash_started = time.process_time()
+        for _ in range(10):
+            User(password=password).check_password(PASSWORD)
+        hash_cpu = (time.process_time() - hash_started) / 10
+
+        self.stdout.write(
+            f"{profile:<8} logins={logins} {logins / elapsed:.1f}/s wall, "
+            f"{logins / cpu:.1f}/s per core, hash={hash_cpu * 1000:.1f}ms, "
+            f"queries/login={len(queries) / logins:.1f}"
+        )
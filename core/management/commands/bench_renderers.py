@@ -0,0 +1,46 @@
+import timeit
+
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+
+from core.benchmarks import (
+    collect_payloads,
+    rolled_back,
+    seed_catalog,
+    seed_user_activity,
+)
+from core.renderers import FastJSONRenderer
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the stdlib JSONRenderer with FastJSONRenderer on the payloads "
+        "of the main list endpoints. Data is seeded in a rolled back transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=100)
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args, **options):
+        rows, repeat = options["rows"], options["repeat"]
+        with rolled_back():
+            seed_catalog(rows)
+            user = seed_user_activity(rows)
+            payloads = collect_payloads(user, rows)
+
+            stdlib, fast = JSONRenderer(), FastJSONRenderer()
+            for label, data in payloads:
+                identical = stdlib.render(data) == fast.render(data)
+                size = len(stdlib.render(data))
+                stdlib_time = min(
+                    timeit.repeat(lambda: stdlib.render(data), number=1, repeat=repeat)
+                )
+                fast_time = min(
+                    timeit.repeat(lambda: fast.render(data), number=1, repeat=repeat)
+                )
+                self.stdout.write(
+                    f"{label:<20} bytes={size:<8} stdlib={stdlib_time * 1000:.2f}ms "
+                    f"fast={fast_time * 1000:.2f}ms "
+                    f"speedup={stdlib_time / fast_time:.1f}x identical={identical}"
+                )
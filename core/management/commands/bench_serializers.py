@@ -0,0 +1,68 @@
+import timeit
+
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+
+from core.benchmarks import rolled_back, seed_catalog
+from core.projection import compile_serializer
+from doctors.models import DoctorProfile
+from doctors.serializers import DoctorProfileSerializer
+from education.models import Article, Video
+from education.serializers import ArticleSerializer, VideoSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare DRF list serialization with the compiled projection path on "
+        "synthetic pages. All rows are created in a rolled back transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1000)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        with rolled_back():
+            seed_catalog(options["rows"])
+            self._run(options["rows"], options["repeat"])
+
+    def _run(self, rows, repeat):
+        cases = [
+            (
+                "articles",
+                ArticleSerializer,
+                Article.objects.prefetch_related("related_conditions").order_by("id"),
+            ),
+            (
+                "videos",
+                VideoSerializer,
+                Video.objects.prefetch_related("related_symptoms").order_by("id"),
+            ),
+            (
+                "doctor profiles",
+                DoctorProfileSerializer,
+                DoctorProfile.objects.select_related("user").order_by("id"),
+            ),
+        ]
+        renderer = JSONRenderer()
+
+        for label, serializer_class, queryset in cases:
+            projection = compile_serializer(serializer_class)
+            page = queryset[:rows]
+
+            def drf():
+                return serializer_class(list(page.all()), many=True).data
+
+            def fast():
+                values = page.prefetch_related(None).values(*projection.lookups)
+                return projection.serialize(values)
+
+            identical = renderer.render(drf()) == renderer.render(fast())
+            drf_time = min(timeit.repeat(drf, number=1, repeat=repeat))
+            fast_time = min(timeit.repeat(fast, number=1, repeat=repeat))
+
+            self.stdout.write(
+                f"{label:<16} rows={rows} drf={drf_time * 1000:.1f}ms "
+                f"projection={fast_time * 1000:.1f}ms "
+                f"speedup={drf_time / fast_time:.1f}x identical={identical}"
+            )
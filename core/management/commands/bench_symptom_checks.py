@@ -0,0 +1,92 @@
+import time
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from core.benchmarks import rolled_back
+from symptoms.models import Condition, Symptom
+from symptoms.views import SymptomCheckViewSet
+
+DIAGNOSIS = {
+    "conditions": ["Bench Condition 0", "Bench Condition 1", "Not In Catalog"],
+    "recommendations": ["Rest", "Drink fluids"],
+    "urgency": "low",
+}
+WRITES = ("INSERT", "UPDATE", "DELETE")
+
+
+def fake_diagnosis(symptoms):
+    return dict(DIAGNOSIS)
+
+
+class Command(BaseCommand):
+    help = (
+        "Count the queries of creating symptom checks through the API, one at "
+        "a time and in a batch, with the AI call stubbed out. Rows are "
+        "created in a rolled back transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--checks", type=int, default=100)
+        parser.add_argument("--symptoms", type=int, default=3)
+
+    def handle(self, *args, **options):
+        with (
+            rolled_back(),
+            patch.object(SymptomCheckViewSet, "throttle_classes", []),
+            patch("symptoms.serializers.generate_diagnosis", fake_diagnosis),
+            patch("symptoms.batch.generate_diagnosis", fake_diagnosis),
+        ):
+            self._run(options["checks"], options["symptoms"])
+
+    def _run(self, checks, per_check):
+        Condition.objects.bulk_create(
+            Condition(name=f"Bench Condition {i}", description="bench")
+            for i in range(2)
+        )
+        symptoms = Symptom.objects.bulk_create(
+            Symptom(name=f"bench symptom {i}") for i in range(per_check)
+        )
+        user = get_user_model().objects.create_user(
+            email="bench-checks@example.com",
+            first_name="Bench",
+            last_name="Patient",
+            phone="+251911000002",
+            password="bench-password",
+        )
+        client = APIClient()
+        client.force_authenticate(user=user)
+        ids = [symptom.pk for symptom in symptoms]
+
+        started = time.perf_counter()
+        with CaptureQueriesContext(connection) as queries:
+            for _ in range(checks):
+                response = client.post(
+                    reverse("symptom-check-list"), {"symptoms": ids}, format="json"
+                )
+                assert response.status_code == 201, response.data
+        self._report("single", checks, queries, time.perf_counter() - started)
+
+        started = time.perf_counter()
+        with CaptureQueriesContext(connection) as queries:
+            response = client.post(
+                reverse("symptom-check-batch"),
+                {"checks": [{"symptoms": ids}] * checks},
+                format="json",
+            )
+            assert response.status_code == 201, response.data
+        self._report("batch", checks, queries, time.perf_counter() - started)
+
+    def _report(self, label, checks, queries, elapsed):
+        writes = sum(
+            query["sql"].lstrip().upper().startswith(WRITES) for query in queries
+        )
+        self.stdout.write(
+            f"{label:<7} checks={checks} queries/check={len(queries) / checks:.2f} "
+            f"writes/check={writes / checks:.2f} {checks / elapsed:.0f} checks/s"
+        )
@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core import ai_budget
+from core.jobs import run_periodically
+from core.throttling import prune_counters, scope_durations
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete throttle and AI budget counters of windows that are no longer "
+        "read from the database counter store. Runs once, or every --interval "
+        "seconds when given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--interval",
+            type=int,
+            default=0,
+            help="Keep running and prune every INTERVAL seconds",
+        )
+
+    def handle(self, *args, **options):
+        durations = {
+            **scope_durations(),
+            ai_budget.REQUESTS_KEY: ai_budget.DURATION,
+            ai_budget.TOKENS_KEY: ai_budget.DURATION,
+        }
+
+        def run():
+            started = time.perf_counter()
+            removed = prune_counters(durations, time.time())
+            self.stdout.write(
+                f"removed={removed} stale rate counters "
+                f"in {(time.perf_counter() - started) * 1000:.1f}ms"
+            )
+
+        run_periodically(run, options["interval"])
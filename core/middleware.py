@@ -0,0 +1,161 @@
+import time
+
+from django.conf import settings
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_sequence, compress_string
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - exercised only without brotli
+    brotli = None
+
+
+DEFAULT_API_COMPRESSION = {
+    # Only API responses are handled here; WhiteNoise serves precompressed statics
+    "PATH_PREFIXES": ["/api/"],
+    # Responses carrying credentials are left alone to stay clear of BREACH
+    "EXCLUDED_PREFIXES": ["/api/auth/"],
+    "MIN_SIZE": 1024,
+    "BROTLI_QUALITY": 5,
+}
+
+
+def parse_accept_encoding(header):
+    """Return a ``{coding: q}`` mapping for an Accept-Encoding header"""
+    codings = {}
+    for item in header.split(","):
+        coding, _, params = item.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        codings[coding] = q
+    return codings
+
+
+class APICompressionMiddleware(GZipMiddleware):
+    """
+    Content-negotiated brotli/gzip compression for API responses.
+
+    Picks the best coding the client accepts (brotli wins ties when the
+    ``brotli`` package is installed), skips responses under ``MIN_SIZE`` or
+    already encoded, and compresses streaming responses chunk by chunk. The
+    time spent compressing a regular response is reported in a
+    ``Server-Timing`` header so the CPU cost can be tracked per endpoint.
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        config = {
+            **DEFAULT_API_COMPRESSION,
+            **getattr(settings, "API_COMPRESSION", {}),
+        }
+        self.path_prefixes = tuple(config["PATH_PREFIXES"])
+        self.excluded_prefixes = tuple(config["EXCLUDED_PREFIXES"])
+        self.min_size = config["MIN_SIZE"]
+        self.brotli_quality = config["BROTLI_QUALITY"]
+
+    def select_encoding(self, request):
+        codings = parse_accept_encoding(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+        wildcard = codings.get("*", 0.0)
+        supported = ["br", "gzip"] if brotli is not None else ["gzip"]
+
+        best, best_q = None, 0.0
+        for coding in supported:
+            q = codings.get(coding, wildcard)
+            if q > best_q:
+                best, best_q = coding, q
+        return best
+
+    def compress(self, encoding, content):
+        if encoding == "br":
+            return brotli.compress(content, quality=self.brotli_quality)
+        return compress_string(content, max_random_bytes=self.max_random_bytes)
+
+    def compress_stream(self, encoding, chunks):
+        if encoding == "gzip":
+            return compress_sequence(chunks, max_random_bytes=self.max_random_bytes)
+        return self._brotli_stream(chunks)
+
+    def _brotli_stream(self, chunks):
+        compressor = brotli.Compressor(quality=self.brotli_quality)
+        for chunk in chunks:
+            # Flush per chunk so clients see data as soon as it is produced
+            data = compressor.process(chunk) + compressor.flush()
+            if data:
+                yield data
+        yield compressor.finish()
+
+    def process_response(self, request, response):
+        path = request.path_info
+        if not path.startswith(self.path_prefixes) or path.startswith(
+            self.excluded_prefixes
+        ):
+            return response
+
+        if response.has_header("Content-Encoding"):
+            return response
+        if not response.streaming and len(response.content) < self.min_size:
+            return response
+        if response.streaming and response.is_async:
+            # The project is served over WSGI, leave async streams untouched
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+
+        encoding = self.select_encoding(request)
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            response.streaming_content = self.compress_stream(
+                encoding, response.streaming_content
+            )
+            del response.headers["Content-Length"]
+        else:
+            started = time.perf_counter()
+            compressed = self.compress(encoding, response.content)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers["Content-Length"] = str(len(compressed))
+
+            timing = f"compress;desc={encoding};dur={elapsed_ms:.2f}"
+            existing = response.get("Server-Timing")
+            response.headers["Server-Timing"] = (
+                f"{existing}, {timing}" if existing else timing
+            )
+
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response.headers["ETag"] = "W/" + etag
+        response.headers["Content-Encoding"] = encoding
+
+        return response
+
+
+class RateLimitHeadersMiddleware:
+    """
+    Adds the quota left by ``core.throttling.SlidingWindowRateThrottle`` to
+    the response, so clients can slow down before being rejected.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        quota = getattr(request, "rate_limit_quota", None)
+        if quota is not None:
+            for name, value in quota.headers().items():
+                response[name] = value
+        return response
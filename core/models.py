@@ -1,3 +1,19 @@
 from django.db import models
 
-# Create your models here.
+
+class RateCounter(models.Model):
+    """
+    Requests made in one window of a throttle scope, for deployments
+    without a shared cache, see core/throttling.py.
+    """
+
+    key = models.CharField(max_length=200)
+    window = models.BigIntegerField()
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["key", "window"], name="rate_counter_key_window_uniq"
+            )
+        ]
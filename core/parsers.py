@@ -0,0 +1,39 @@
+"""
+JSON parser backed by orjson, with DRF's stdlib parser as the fallback.
+
+orjson only reads UTF-8 and already rejects NaN/Infinity, which matches
+``STRICT_JSON``. Other charsets, a missing orjson install, or input orjson
+cannot represent (integers beyond 64 bits) go through ``JSONParser``.
+"""
+
+import io
+from django.conf import settings
+from rest_framework import parsers
+from .renderers import FastJSONRenderer
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - exercised only without orjson
+    orjson = None
+
+
+class FastJSONParser(parsers.JSONParser):
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+
+        if orjson is None or encoding.lower().replace("_", "-") not in (
+            "utf-8",
+            "utf8",
+        ):
+            return super().parse(stream, media_type, parser_context)
+
+        body = stream.read()
+        try:
+            return orjson.loads(body)
+        except orjson.JSONDecodeError:
+            # Re-parse with the stdlib so valid-but-unsupported input still
+            # works and invalid input reports DRF's usual error
+            return super().parse(io.BytesIO(body), media_type, parser_context)
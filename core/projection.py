@@ -0,0 +1,233 @@
+"""
+Read-only serialization fast path built on ``.values()`` projections.
+
+``compile_serializer`` walks a ``ModelSerializer`` once and turns it into a
+flat list of column lookups plus the bound DRF fields that format each
+column, so list endpoints can skip model instantiation and DRF's per-field
+attribute resolution while producing exactly the same output. Nested
+``ModelSerializer`` fields on forward relations are folded into the same
+query; nested ``many=True`` serializers on many-to-many relations are loaded
+with one through-table query per page.
+
+Serializers using features that cannot be expressed as a projection (method
+fields, custom ``to_representation``, dotted sources, file fields...) raise
+``ImproperlyConfigured`` so callers can fall back to the regular serializer.
+"""
+
+from functools import lru_cache
+
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from rest_framework import serializers
+from rest_framework.relations import PrimaryKeyRelatedField, RelatedField
+from rest_framework.response import Response
+
+
+def _unsupported(serializer_class, field_name, reason):
+    return ImproperlyConfigured(
+        f"{serializer_class.__name__}.{field_name} cannot be projected: {reason}"
+    )
+
+
+class ProjectionSerializer:
+    """Compiled, read-only counterpart of a ``ModelSerializer``"""
+
+    def __init__(self, serializer_class, prefix=""):
+        if not issubclass(serializer_class, serializers.ModelSerializer):
+            raise ImproperlyConfigured(
+                f"{serializer_class.__name__} is not a ModelSerializer"
+            )
+        if (
+            serializer_class.to_representation
+            is not serializers.ModelSerializer.to_representation
+        ):
+            raise _unsupported(
+                serializer_class, "to_representation", "custom implementation"
+            )
+
+        serializer = serializer_class()
+        self.model = serializer.Meta.model
+        opts = self.model._meta
+        self.pk_lookup = prefix + opts.pk.attname
+        self.lookups = [self.pk_lookup]
+        self.nested_many = []
+        self._steps = []
+
+        for field_name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+
+            source = field.source
+            if source == "*" or "." in source:
+                raise _unsupported(serializer_class, field_name, "complex source")
+
+            if isinstance(field, serializers.ListSerializer):
+                self._compile_many(serializer_class, field_name, field)
+            elif isinstance(field, serializers.ModelSerializer):
+                self._compile_nested(serializer_class, field_name, field, prefix)
+            elif source.startswith("get_") and source.endswith("_display"):
+                model_field = self._model_field(
+                    serializer_class, field_name, source[4:-8]
+                )
+                self._add_display(field_name, field, model_field, prefix)
+            else:
+                model_field = self._model_field(serializer_class, field_name, source)
+                if model_field.many_to_many or model_field.one_to_many:
+                    raise _unsupported(serializer_class, field_name, "to-many field")
+                if isinstance(field, RelatedField):
+                    if not isinstance(field, PrimaryKeyRelatedField):
+                        raise _unsupported(
+                            serializer_class, field_name, "non-pk related field"
+                        )
+                    # values() already yields the related primary key
+                    self._add_value(field_name, None, prefix + model_field.attname)
+                elif isinstance(field, serializers.FileField):
+                    raise _unsupported(serializer_class, field_name, "file field")
+                elif isinstance(field, serializers.SerializerMethodField):
+                    raise _unsupported(serializer_class, field_name, "method field")
+                else:
+                    self._add_value(
+                        field_name,
+                        field.to_representation,
+                        prefix + model_field.attname,
+                    )
+
+    def _model_field(self, serializer_class, field_name, name):
+        try:
+            return self.model._meta.get_field(name)
+        except FieldDoesNotExist:
+            raise _unsupported(serializer_class, field_name, "not a model field")
+
+    def _lookup(self, lookup):
+        if lookup not in self.lookups:
+            self.lookups.append(lookup)
+        return lookup
+
+    def _add_value(self, field_name, to_representation, lookup):
+        lookup = self._lookup(lookup)
+        if to_representation is None:
+            self._steps.append(lambda row, related: (field_name, row[lookup]))
+            return
+
+        def step(row, related):
+            value = row[lookup]
+            return field_name, None if value is None else to_representation(value)
+
+        self._steps.append(step)
+
+    def _add_display(self, field_name, field, model_field, prefix):
+        lookup = self._lookup(prefix + model_field.attname)
+        choices = dict(model_field.flatchoices)
+        to_representation = field.to_representation
+
+        def step(row, related):
+            label = choices.get(row[lookup], row[lookup])
+            return field_name, None if label is None else to_representation(label)
+
+        self._steps.append(step)
+
+    def _compile_nested(self, serializer_class, field_name, field, prefix):
+        model_field = self._model_field(serializer_class, field_name, field.source)
+        if not (model_field.many_to_one or model_field.one_to_one) or (
+            not model_field.concrete
+        ):
+            raise _unsupported(serializer_class, field_name, "not a forward relation")
+
+        child = ProjectionSerializer(type(field), prefix=f"{prefix}{field.source}__")
+        if child.nested_many:
+            raise _unsupported(serializer_class, field_name, "nested to-many field")
+        for lookup in child.lookups:
+            self._lookup(lookup)
+
+        def step(row, related):
+            if row[child.pk_lookup] is None:
+                return field_name, None
+            return field_name, child.to_representation(row, related)
+
+        self._steps.append(step)
+
+    def _compile_many(self, serializer_class, field_name, field):
+        if not isinstance(field.child, serializers.ModelSerializer):
+            raise _unsupported(serializer_class, field_name, "non-model list")
+        model_field = self._model_field(serializer_class, field_name, field.source)
+        if not (model_field.many_to_many and model_field.concrete):
+            raise _unsupported(serializer_class, field_name, "not a many-to-many")
+
+        through = model_field.remote_field.through
+        source_name = model_field.m2m_field_name()
+        target_name = model_field.m2m_reverse_field_name()
+        child = ProjectionSerializer(type(field.child), prefix=f"{target_name}__")
+
+        # Match the order DRF would see from `instance.<m2m>.all()`
+        ordering = [
+            (
+                f"-{target_name}__{item[1:]}"
+                if item.startswith("-")
+                else f"{target_name}__{item}"
+            )
+            for item in child.model._meta.ordering
+            if isinstance(item, str)
+        ] or ["pk"]
+
+        self.nested_many.append((field_name, through, source_name, child, ordering))
+        self._steps.append(
+            lambda row, related: (
+                field_name,
+                related[field_name].get(row[self.pk_lookup], []),
+            )
+        )
+
+    def fetch_related(self, rows):
+        """Load every nested many-to-many field for ``rows`` in one query each"""
+        related = {}
+        ids = [row[self.pk_lookup] for row in rows]
+        for field_name, through, source_name, child, ordering in self.nested_many:
+            grouped = {}
+            if ids:
+                child_rows = list(
+                    through.objects.filter(**{f"{source_name}__in": ids})
+                    .order_by(*ordering)
+                    .values(source_name, *child.lookups)
+                )
+                child_related = child.fetch_related(child_rows)
+                for child_row in child_rows:
+                    grouped.setdefault(child_row[source_name], []).append(
+                        child.to_representation(child_row, child_related)
+                    )
+            related[field_name] = grouped
+        return related
+
+    def to_representation(self, row, related):
+        return dict(step(row, related) for step in self._steps)
+
+    def serialize(self, rows):
+        rows = list(rows)
+        related = self.fetch_related(rows)
+        return [self.to_representation(row, related) for row in rows]
+
+
+@lru_cache(maxsize=None)
+def compile_serializer(serializer_class):
+    return ProjectionSerializer(serializer_class)
+
+
+class ProjectionListMixin:
+    """
+    Serve ``list()`` from a ``.values()`` projection of the filtered queryset.
+
+    Falls back to the regular serializer whenever the serializer class cannot
+    be compiled.
+    """
+
+    def list(self, request, *args, **kwargs):
+        try:
+            projection = compile_serializer(self.get_serializer_class())
+        except ImproperlyConfigured:
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset()).prefetch_related(None)
+        rows = queryset.values(*projection.lookups)
+
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(projection.serialize(page))
+        return Response(projection.serialize(rows))
@@ -0,0 +1,57 @@
+"""
+JSON renderer backed by orjson, with DRF's stdlib renderer as the fallback.
+
+Output matches ``rest_framework.renderers.JSONRenderer`` for everything the
+API returns: compact separators, unescaped UTF-8, ``Z`` suffixed UTC
+datetimes, escaped U+2028/U+2029, and DRF's encoder for the types orjson
+does not know about (``Decimal`` as float, lazy translation strings,
+querysets...). Requests for indented output (the browsable API,
+``Accept: application/json; indent=4``), data orjson refuses, or a missing
+orjson install all go through the stdlib renderer.
+
+Two edge cases differ by design: floats needing an exponent are written
+without the ``+``/leading zero (``1e16`` instead of ``1e+16``, same value),
+and NaN/Infinity encode as ``null`` instead of raising.
+"""
+
+from rest_framework import renderers
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - exercised only without orjson
+    orjson = None
+
+
+_LINE_SEPARATOR = "\u2028".encode()
+_PARAGRAPH_SEPARATOR = "\u2029".encode()
+
+
+class FastJSONRenderer(renderers.JSONRenderer):
+    options = (orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS) if orjson else 0
+
+    def __init__(self):
+        super().__init__()
+        self._default = JSONEncoder().default
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None
+            or data is None
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=self._default, option=self.options)
+        except (orjson.JSONEncodeError, TypeError, ValueError):
+            # Let the stdlib renderer either cope (e.g. >64-bit ints) or raise
+            return super().render(data, accepted_media_type, renderer_context)
+
+        if _LINE_SEPARATOR in ret or _PARAGRAPH_SEPARATOR in ret:
+            ret = ret.replace(_LINE_SEPARATOR, b"\\u2028").replace(
+                _PARAGRAPH_SEPARATOR, b"\\u2029"
+            )
+        return ret
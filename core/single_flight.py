@@ -0,0 +1,114 @@
+"""
+Single-flight coalescing of identical slow calls.
+
+During an outbreak many users send the same symptoms or the same chat
+question at once, and every request used to make its own Gemini call.
+``single_flight(key, compute)`` lets concurrent callers with the same key
+share one ``compute()``:
+
+* within a process, the first caller runs it and the others block on an
+  event, then get a copy of its result (or its exception);
+* across processes, the caller that wins ``cache.add`` on a lock key runs
+  it and publishes the result in the cache for ``RESULT_TTL`` seconds.
+  Callers in other processes poll for that result instead of calling the
+  provider themselves. If the lock holder dies or fails, its lock is
+  released or expires after ``LOCK_TIMEOUT`` and the next caller computes.
+
+Only results that ``publish(result)`` accepts are put in the cache: an
+error answer such as "service busy" is shared with the callers that waited
+for it, but a caller arriving after the flight makes a fresh attempt.
+Waiters of a call that raised get their own ``FlightFailed``, chained from
+the leader's exception, rather than that one instance.
+
+Coalescing across processes needs the shared cache (``REDIS_URL``); with the
+per-process memory cache only threads of a process are coalesced. Results
+are kept for a few seconds only, so this is not a result cache.
+"""
+
+import copy
+import hashlib
+import threading
+import time
+
+from django.core.cache import cache
+
+# Longer than the slowest call, retries and budget queueing included
+LOCK_TIMEOUT = 60
+RESULT_TTL = 5
+POLL_INTERVAL = 0.1
+
+MISSING = object()
+
+_flights = {}
+_flights_lock = threading.Lock()
+
+
+def prompt_key(namespace, text):
+    """Key for a prompt, ignoring case and whitespace differences"""
+    normalized = " ".join(str(text).casefold().split())
+    return f"{namespace}:{hashlib.sha256(normalized.encode()).hexdigest()}"
+
+
+class FlightFailed(Exception):
+    """The call a caller waited for raised, see ``__cause__``"""
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+def single_flight(key, compute, publish=None):
+    """
+    Return ``compute()``, sharing one call among concurrent identical keys.
+    ``publish(result)`` tells whether other processes may reuse the result
+    for ``RESULT_TTL`` seconds, by default every result.
+    """
+    with _flights_lock:
+        flight = _flights.get(key)
+        leader = flight is None
+        if leader:
+            flight = _flights[key] = _Flight()
+
+    if not leader:
+        flight.done.wait()
+        if flight.error is not None:
+            raise FlightFailed(f"Shared call {key} failed") from flight.error
+        # Callers may modify what they get
+        return copy.deepcopy(flight.result)
+
+    try:
+        result = _across_processes(key, compute, publish)
+        flight.result = copy.deepcopy(result)
+        return result
+    except Exception as e:
+        flight.error = e
+        raise
+    finally:
+        with _flights_lock:
+            del _flights[key]
+        flight.done.set()
+
+
+def _across_processes(key, compute, publish):
+    result_key = f"single-flight:result:{key}"
+    lock_key = f"single-flight:lock:{key}"
+    deadline = time.monotonic() + LOCK_TIMEOUT
+    while True:
+        result = cache.get(result_key, MISSING)
+        if result is not MISSING:
+            return result
+        if cache.add(lock_key, True, timeout=LOCK_TIMEOUT):
+            try:
+                result = compute()
+                if publish is None or publish(result):
+                    cache.set(result_key, result, timeout=RESULT_TTL)
+                return result
+            finally:
+                cache.delete(lock_key)
+        if time.monotonic() >= deadline:
+            # The lock outlived its holder's call, stop waiting for it
+            return compute()
+        time.sleep(POLL_INTERVAL)
@@ -1,3 +1,444 @@
-from django.test import TestCase
+import datetime
+import gzip
+import io
+import threading
+import time
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest.mock import patch
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from accounts.models import User
+from doctors.models import DoctorProfile
+from doctors.serializers import DoctorProfileSerializer, DoctorRegistrationSerializer
+from education.models import Article
+from education.serializers import ArticleSerializer
+from symptoms.models import Condition
+from . import ai_budget, jobs, single_flight, throttling
+from .middleware import APICompressionMiddleware
+from .models import RateCounter
+from .parsers import FastJSONParser
+from .projection import compile_serializer
+from .renderers import FastJSONRenderer
+from .throttling import Quota, SlidingWindowRateThrottle
 
-# Create your tests here.
+
+class ProjectionSerializerTests(TestCase):
+    def assertSameOutput(self, serializer_class, queryset):
+        projection = compile_serializer(serializer_class)
+        expected = serializer_class(list(queryset), many=True).data
+        actual = projection.serialize(queryset.values(*projection.lookups))
+        renderer = JSONRenderer()
+        self.assertEqual(renderer.render(actual), renderer.render(expected))
+
+    def test_articles_with_nested_conditions(self):
+        condition = Condition.objects.create(
+            name="Migraine", description="...", severity=2
+        )
+        article = Article.objects.create(title="A", content="...", tags=["pain"])
+        article.related_conditions.add(condition)
+        Article.objects.create(title="B", content="...")
+
+        self.assertSameOutput(ArticleSerializer, Article.objects.order_by("id"))
+
+    def test_doctor_profiles_with_nested_user(self):
+        user = User.objects.create_user(
+            email="doc@example.com",
+            first_name="Abebe",
+            last_name="Kebede",
+            phone="+251911223344",
+            password="testpass123",
+            role=User.Role.DOCTOR,
+        )
+        DoctorProfile.objects.create(
+            user=user, license_number="LIC-1", consultation_fee=Decimal("99.5")
+        )
+
+        self.assertSameOutput(
+            DoctorProfileSerializer, DoctorProfile.objects.order_by("id")
+        )
+
+    def test_custom_representation_is_not_compiled(self):
+        with self.assertRaises(ImproperlyConfigured):
+            compile_serializer(DoctorRegistrationSerializer)
+
+
+class FastJSONTests(TestCase):
+    def test_renderer_matches_stdlib_output(self):
+        data = {
+            "fee": Decimal("150.00"),
+            "when": timezone.now(),
+            "day": datetime.date(2025, 5, 1),
+            "message": _("Login successful."),
+            "text": "line\u2028break \u1234",
+            "nested": [{"urgency": "low", "score": 0.25, "ok": True}],
+            1: None,
+        }
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_parser_rejects_invalid_json(self):
+        parser = FastJSONParser()
+        self.assertEqual(parser.parse(io.BytesIO(b'{"a": [1, 2]}')), {"a": [1, 2]})
+        with self.assertRaises(ParseError):
+            parser.parse(io.BytesIO(b"{'a': NaN}"))
+
+
+class APICompressionMiddlewareTests(TestCase):
+    body = b'{"content": "' + b"lorem ipsum " * 500 + b'"}'
+
+    def _process(self, path, response, accept="gzip"):
+        request = RequestFactory().get(path, HTTP_ACCEPT_ENCODING=accept)
+        return APICompressionMiddleware(lambda request: response)(request)
+
+    def test_compresses_large_api_responses(self):
+        response = self._process("/api/content/articles/", HttpResponse(self.body))
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(response.content), self.body)
+        self.assertIn("compress;desc=gzip", response["Server-Timing"])
+
+    def test_prefers_brotli_when_accepted(self):
+        response = self._process(
+            "/api/content/articles/", HttpResponse(self.body), "gzip, br"
+        )
+        self.assertEqual(response["Content-Encoding"], "br")
+
+    def test_streaming_responses_are_compressed(self):
+        response = self._process(
+            "/api/content/articles/",
+            StreamingHttpResponse(iter([self.body[:100], self.body[100:]])),
+        )
+        content = b"".join(response.streaming_content)
+        self.assertEqual(gzip.decompress(content), self.body)
+
+    def test_skips_small_encoded_and_excluded_responses(self):
+        small = self._process("/api/content/articles/", HttpResponse(b"{}"))
+        self.assertFalse(small.has_header("Content-Encoding"))
+
+        encoded = HttpResponse(self.body, headers={"Content-Encoding": "identity"})
+        encoded = self._process("/api/content/articles/", encoded)
+        self.assertEqual(encoded["Content-Encoding"], "identity")
+
+        auth = self._process("/api/auth/login/", HttpResponse(self.body))
+        self.assertFalse(auth.has_header("Content-Encoding"))
+
+
+class QuotaThrottle(SlidingWindowRateThrottle):
+    THROTTLE_RATES = {"quota": "3/minute"}
+    now = 600.0
+
+    def timer(self):
+        return self.now
+
+
+class SlidingWindowThrottleTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            email="quota@example.com",
+            first_name="Quota",
+            last_name="User",
+            phone="+251911000001",
+            password="testpass123",
+        )
+        self.view = SimpleNamespace(throttle_scope="quota")
+
+    def hit(self, now):
+        QuotaThrottle.now = now
+        request = Request(RequestFactory().post("/api/symptoms/checks/"))
+        request.user = self.user
+        throttle = QuotaThrottle()
+        return throttle.allow_request(request, self.view), throttle, request
+
+    def check_store(self):
+        for _ in range(3):
+            allowed, _, _ = self.hit(600.0)
+            self.assertTrue(allowed)
+        allowed, throttle, request = self.hit(610.0)
+        self.assertFalse(allowed)
+        self.assertEqual(
+            request._request.rate_limit_quota, Quota(limit=3, remaining=0, reset=50)
+        )
+        # 50s to the next window, then 20s for a third of the 3 to slide out
+        self.assertAlmostEqual(throttle.wait(), 70.0)
+
+        # Rejections are not counted: halfway through the next window half
+        # of the previous 3 requests still count
+        allowed, _, request = self.hit(690.0)
+        self.assertTrue(allowed)
+        self.assertEqual(request._request.rate_limit_quota.remaining, 0)
+        allowed, throttle, _ = self.hit(690.0)
+        self.assertFalse(allowed)
+        # Room for one more once two thirds of the window have passed
+        self.assertAlmostEqual(throttle.wait(), 10.0)
+
+    @override_settings(THROTTLE_COUNTER_STORE="core.throttling.CacheCounterStore")
+    def test_cache_store(self):
+        self.check_store()
+
+    @override_settings(THROTTLE_COUNTER_STORE="core.throttling.DatabaseCounterStore")
+    def test_database_store(self):
+        self.check_store()
+        # Only the current and previous windows are kept
+        self.hit(800.0)
+        self.assertEqual(
+            set(RateCounter.objects.values_list("window", flat=True)), {13}
+        )
+
+    def test_stale_counters_of_every_key_are_pruned(self):
+        RateCounter.objects.bulk_create(
+            RateCounter(key=key, window=window, count=1)
+            for key in ("throttle_quota_1", "throttle_quota_2")
+            for window in (8, 9, 10)
+        )
+        # An hourly scope whose keys also start with the minute scope's prefix
+        RateCounter.objects.create(key="throttle_quota_long_1", window=0, count=1)
+        durations = {"throttle_quota_": 60, "throttle_quota_long_": 3600}
+
+        self.assertEqual(throttling.prune_counters(durations, now=600.0), 2)
+        self.assertEqual(
+            set(RateCounter.objects.values_list("key", "window")),
+            {
+                ("throttle_quota_1", 9),
+                ("throttle_quota_1", 10),
+                ("throttle_quota_2", 9),
+                ("throttle_quota_2", 10),
+                ("throttle_quota_long_1", 0),
+            },
+        )
+
+    def test_scope_durations(self):
+        durations = throttling.scope_durations()
+        self.assertEqual(durations["throttle_symptom_checks_"], 3600)
+        self.assertEqual(durations["throttle_firstaid_"], 60)
+
+    def test_quota_headers(self):
+        response = self.client.get("/api/firstaid/")
+        self.assertEqual(response["X-RateLimit-Limit"], "60")
+        self.assertEqual(response["X-RateLimit-Remaining"], "59")
+        self.assertTrue(0 < int(response["X-RateLimit-Reset"]) <= 60)
+
+
+class FakeClock:
+    def __init__(self, now):
+        self.now = now
+        self.sleeps = []
+
+    def time(self):
+        return self.now
+
+    monotonic = time
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@override_settings(
+    THROTTLE_COUNTER_STORE="core.throttling.CacheCounterStore",
+    AI_BUDGET={
+        "REQUESTS_PER_MINUTE": 10,
+        "TOKENS_PER_MINUTE": 1000,
+        "PRIORITIES": {
+            "skin_diagnosis": {"share": 1.0, "max_wait": 30},
+            "chat": {"share": 0.5, "max_wait": 0},
+        },
+    },
+)
+class AIBudgetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.clock = FakeClock(600.0)
+        patcher = patch("core.ai_budget.time", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_low_priority_calls_are_shed_first(self):
+        for _ in range(5):
+            ai_budget.reserve("chat", tokens=10)
+        with self.assertRaises(ai_budget.BudgetExceeded) as raised:
+            ai_budget.reserve("chat", tokens=10)
+        # 60s to the next window, then 12s for a fifth of the 5 to slide out
+        self.assertEqual(raised.exception.retry_after, 72)
+        # The rest of the minute is kept for more important calls
+        for _ in range(5):
+            ai_budget.reserve("skin_diagnosis", tokens=10)
+        self.assertEqual(cache.get(f"{ai_budget.REQUESTS_KEY}:10"), 10)
+
+    def test_tokens_are_settled_with_reported_usage(self):
+        reservation = ai_budget.reserve("chat", tokens=400)
+        reservation.settle(
+            SimpleNamespace(usage_metadata=SimpleNamespace(total_token_count=150))
+        )
+        self.assertEqual(cache.get(f"{ai_budget.TOKENS_KEY}:10"), 150)
+        # 150 + 400 would pass half of the 1000 tokens
+        with self.assertRaises(ai_budget.BudgetExceeded):
+            ai_budget.reserve("chat", tokens=400)
+        self.assertEqual(cache.get(f"{ai_budget.TOKENS_KEY}:10"), 150)
+        self.assertEqual(cache.get(f"{ai_budget.REQUESTS_KEY}:10"), 1)
+
+    def test_calls_queue_until_the_window_slides(self):
+        for _ in range(10):
+            ai_budget.reserve("skin_diagnosis", tokens=10)
+        self.clock.now = 661.0
+        ai_budget.reserve("skin_diagnosis", tokens=10)
+        # Slept once, until a tenth of the previous window slid out
+        self.assertEqual(len(self.clock.sleeps), 1)
+        self.assertAlmostEqual(self.clock.now, 666.0)
+
+    def test_retries_do_not_queue_again(self):
+        for _ in range(10):
+            ai_budget.reserve("skin_diagnosis", tokens=10)
+        self.clock.now = 661.0
+        with self.assertRaises(ai_budget.BudgetExceeded) as raised:
+            ai_budget.reserve("skin_diagnosis", tokens=10, wait=False)
+        self.assertEqual(raised.exception.retry_after, 5)
+        self.assertEqual(self.clock.sleeps, [])
+
+    def test_waits_longer_than_the_cap_are_shed_without_sleeping(self):
+        for _ in range(10):
+            ai_budget.reserve("skin_diagnosis", tokens=10)
+        self.clock.now = 655.0
+        # max_wait is 30s, but no call queues for more than MAX_WAIT
+        with self.assertRaises(ai_budget.BudgetExceeded) as raised:
+            ai_budget.reserve("skin_diagnosis", tokens=10)
+        self.assertEqual(raised.exception.retry_after, 11)
+        self.assertEqual(self.clock.sleeps, [])
+
+
+class SingleFlightTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def run_concurrently(self, callers, compute):
+        started = threading.Barrier(callers)
+        results, errors = [], []
+
+        def call():
+            started.wait()
+            try:
+                results.append(single_flight.single_flight("same", compute))
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=call) for _ in range(callers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results, errors
+
+    def test_threads_share_one_call(self):
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return {"urgency": "low"}
+
+        results, _ = self.run_concurrently(5, compute)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{"urgency": "low"}] * 5)
+        # Every caller got its own copy
+        self.assertEqual(len({id(result) for result in results}), 5)
+
+    def test_errors_reach_every_waiter(self):
+        def compute():
+            time.sleep(0.2)
+            raise ValueError("provider down")
+
+        results, errors = self.run_concurrently(3, compute)
+        self.assertEqual((results, len(errors)), ([], 3))
+        [leader] = [e for e in errors if isinstance(e, ValueError)]
+        waiters = [e for e in errors if e is not leader]
+        # Each waiter raises its own exception, caused by the leader's
+        self.assertEqual(len(waiters), 2)
+        self.assertIsNot(waiters[0], waiters[1])
+        for error in waiters:
+            self.assertIsInstance(error, single_flight.FlightFailed)
+            self.assertIs(error.__cause__, leader)
+        # Nothing is left behind for the next call
+        self.assertEqual(
+            single_flight.single_flight("same", lambda: "recovered"), "recovered"
+        )
+
+    def test_unpublished_results_are_not_reused(self):
+        def busy():
+            return {"error": "busy"}
+
+        def publish(result):
+            return "error" not in result
+
+        self.assertEqual(single_flight.single_flight("same", busy, publish), busy())
+        self.assertIsNone(cache.get("single-flight:result:same"))
+        self.assertEqual(
+            single_flight.single_flight("same", lambda: {"urgency": "low"}, publish),
+            {"urgency": "low"},
+        )
+        self.assertEqual(cache.get("single-flight:result:same"), {"urgency": "low"})
+
+    def test_waits_for_the_result_of_another_process(self):
+        cache.add("single-flight:lock:same", True)
+        threading.Timer(
+            0.2, cache.set, ["single-flight:result:same", {"mode": "advice"}]
+        ).start()
+        result = single_flight.single_flight("same", self.fail)
+        self.assertEqual(result, {"mode": "advice"})
+
+    def test_stale_lock_is_not_waited_on_forever(self):
+        cache.add("single-flight:lock:same", True)
+        with patch.object(single_flight, "LOCK_TIMEOUT", 0.2):
+            self.assertEqual(single_flight.single_flight("same", lambda: 1), 1)
+
+    def test_prompt_key_normalizes_case_and_whitespace(self):
+        self.assertEqual(
+            single_flight.prompt_key("chat", "I have  a Fever\n"),
+            single_flight.prompt_key("chat", "i have a fever"),
+        )
+
+
+class StopLoop(Exception):
+    pass
+
+
+class RunPeriodicallyTests(TestCase):
+    def test_failing_runs_are_logged_and_the_loop_goes_on(self):
+        runs = []
+
+        def job():
+            runs.append(len(runs))
+            if len(runs) == 1:
+                raise RuntimeError("connection dropped")
+
+        sleeps = []
+
+        def sleep(seconds):
+            sleeps.append(seconds)
+            if len(sleeps) == 3:
+                raise StopLoop
+
+        with (
+            patch("core.jobs.time.sleep", sleep),
+            patch("core.jobs.close_old_connections") as close,
+            self.assertLogs("core.jobs", "ERROR") as logs,
+        ):
+            with self.assertRaises(StopLoop):
+                jobs.run_periodically(job, 60)
+
+        self.assertEqual(runs, [0, 1, 2])
+        self.assertEqual(sleeps, [60, 60, 60])
+        self.assertEqual(close.call_count, 6)
+        self.assertEqual(len(logs.records), 1)
+
+    def test_single_run_raises(self):
+        def job():
+            raise RuntimeError("connection dropped")
+
+        with self.assertRaises(RuntimeError):
+            jobs.run_periodically(job, 0)
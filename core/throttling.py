@@ -0,0 +1,216 @@
+"""
+Per-user request quotas shared by every worker.
+
+DRF's ``SimpleRateThrottle`` keeps a list of request timestamps per user in
+the cache and rewrites the whole list on every request: a read-modify-write
+that grows with the rate and lets concurrent workers overwrite each other's
+requests. ``SlidingWindowRateThrottle`` keeps two counters per user and
+scope instead, one for the current fixed window and one for the previous.
+Every request atomically increments the current one. The sliding window
+estimate is::
+
+    previous * (1 - elapsed / duration) + current
+
+which assumes the previous window's requests were spread evenly. A request
+is allowed while the estimate stays within the rate. Rejected requests are
+taken back off the counter, so a client that retries too early is not
+locked out longer. A request counts once, unless its view defines
+``get_throttle_cost(request)``, e.g. a batch that costs as much as the
+requests it replaces.
+
+Counters live in the store named by ``THROTTLE_COUNTER_STORE``:
+
+* ``CacheCounterStore``: ``incr`` on the shared cache (``REDIS_URL``);
+* ``DatabaseCounterStore``: ``RateCounter`` rows updated with ``F()``
+  expressions, for deployments without a shared cache. A key's old windows
+  are deleted when it starts a new one, those of keys that stop making
+  requests by ``manage.py prune_rate_counters`` (``prune_counters``).
+
+Throttled views report the quota left in ``X-RateLimit-Limit``,
+``X-RateLimit-Remaining`` and ``X-RateLimit-Reset`` (seconds until the
+current window ends), added by ``core.middleware.RateLimitHeadersMiddleware``.
+Rejections also carry DRF's ``Retry-After``.
+"""
+
+import math
+from dataclasses import dataclass
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils.module_loading import import_string
+from rest_framework.throttling import ScopedRateThrottle
+
+from .models import RateCounter
+
+
+class CacheCounterStore:
+    def hit(self, key, window, timeout, amount=1):
+        """
+        Add ``amount`` to the counter of ``window``, returns the counts of
+        that window and of the one before.
+        """
+        current = f"{key}:{window}"
+        try:
+            count = cache.incr(current, amount)
+        except ValueError:
+            if cache.add(current, amount, timeout=timeout):
+                count = amount
+            else:
+                # Another worker created it first
+                count = cache.incr(current, amount)
+        return count, cache.get(f"{key}:{window - 1}", 0)
+
+    def undo(self, key, window, amount=1):
+        try:
+            cache.decr(f"{key}:{window}", amount)
+        except ValueError:
+            pass
+
+
+class DatabaseCounterStore:
+    def hit(self, key, window, timeout, amount=1):
+        counters = RateCounter.objects.filter(key=key)
+        current = counters.filter(window=window)
+        if not current.update(count=F("count") + amount):
+            try:
+                with transaction.atomic():
+                    RateCounter.objects.create(key=key, window=window, count=amount)
+            except IntegrityError:
+                current.update(count=F("count") + amount)
+            else:
+                # Once per window and key, older windows are never read again
+                counters.filter(window__lt=window - 1).delete()
+        counts = dict(
+            counters.filter(window__gte=window - 1).values_list("window", "count")
+        )
+        return counts.get(window, 0), counts.get(window - 1, 0)
+
+    def undo(self, key, window, amount=1):
+        RateCounter.objects.filter(key=key, window=window, count__gte=amount).update(
+            count=F("count") - amount
+        )
+
+
+def scope_durations():
+    """Window length in seconds of the counter keys of each throttle scope"""
+    throttle = SlidingWindowRateThrottle()
+    durations = {}
+    for scope, rate in throttle.THROTTLE_RATES.items():
+        if rate is None:
+            continue
+        prefix = throttle.cache_format % {"scope": scope, "ident": ""}
+        durations[prefix] = throttle.parse_rate(rate)[1]
+    return durations
+
+
+def prune_counters(durations, now):
+    """
+    Delete the ``RateCounter`` rows no longer read, those before the previous
+    window. ``durations`` maps key prefixes to their window length; a key
+    matching several prefixes belongs to the longest. Returns the number of
+    rows deleted.
+    """
+    deleted = 0
+    for prefix, duration in durations.items():
+        stale = RateCounter.objects.filter(
+            key__startswith=prefix, window__lt=int(now // duration) - 1
+        )
+        for other in durations:
+            if other != prefix and other.startswith(prefix):
+                stale = stale.exclude(key__startswith=other)
+        deleted += stale.delete()[0]
+    return deleted
+
+
+@lru_cache
+def _load(path):
+    return import_string(path)()
+
+
+def get_store():
+    return _load(settings.THROTTLE_COUNTER_STORE)
+
+
+@dataclass
+class Quota:
+    limit: int
+    remaining: int
+    reset: int
+
+    def headers(self):
+        return {
+            "X-RateLimit-Limit": str(self.limit),
+            "X-RateLimit-Remaining": str(self.remaining),
+            "X-RateLimit-Reset": str(self.reset),
+        }
+
+
+def record_quota(request, quota):
+    """Remember the tightest quota of the request for the response headers"""
+    request = getattr(request, "_request", request)
+    current = getattr(request, "rate_limit_quota", None)
+    if current is None or quota.remaining < current.remaining:
+        request.rate_limit_quota = quota
+
+
+class SlidingWindowRateThrottle(ScopedRateThrottle):
+    """``ScopedRateThrottle`` with shared sliding window counters"""
+
+    def allow_request(self, request, view):
+        self.scope = getattr(view, self.scope_attr, None)
+        if not self.scope:
+            return True
+        self.rate = self.get_rate()
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        if self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        self.cost = self.get_cost(request, view)
+        now = self.timer()
+        self.window = int(now // self.duration)
+        self.elapsed = now - self.window * self.duration
+        store = get_store()
+        self.count, self.previous = store.hit(
+            self.key, self.window, timeout=self.duration * 2, amount=self.cost
+        )
+        carried = self.previous * (1 - self.elapsed / self.duration)
+        allowed = carried + self.count <= self.num_requests
+        if not allowed:
+            store.undo(self.key, self.window, amount=self.cost)
+            self.count -= self.cost
+
+        record_quota(
+            request,
+            Quota(
+                limit=self.num_requests,
+                remaining=max(0, math.floor(self.num_requests - carried - self.count)),
+                reset=math.ceil(self.duration - self.elapsed),
+            ),
+        )
+        return allowed
+
+    def get_cost(self, request, view):
+        """Units of the quota the request takes"""
+        get_cost = getattr(view, "get_throttle_cost", None)
+        return 1 if get_cost is None else max(1, get_cost(request))
+
+    def wait(self):
+        """Seconds until the estimate leaves room for the rejected request"""
+        limit, duration, cost = self.num_requests, self.duration, self.cost
+        if cost > limit:
+            # Never, DRF then sends no Retry-After
+            return None
+        if self.count + cost > limit:
+            # Only possible in the next window, once enough of this one's
+            # requests have slid out: count * (1 - t / duration) + cost <= limit
+            later = duration * (1 - (limit - cost) / self.count) if self.count else 0
+            return duration - self.elapsed + later
+        # previous * (1 - t / duration) + count + cost <= limit
+        needed = duration * (1 - (limit - self.count - cost) / self.previous)
+        return max(0, needed - self.elapsed)
@@ -1,7 +1,14 @@
 from django.contrib import admin
-from .models import DoctorProfile
+from .models import ConsultationReminder, DoctorProfile
 
 # Register your models here.
 
 
 admin.site.register(DoctorProfile)
+
+
+@admin.register(ConsultationReminder)
+class ConsultationReminderAdmin(admin.ModelAdmin):
+    list_display = ["teleconsultation", "recipient", "scheduled_time", "delivered_at"]
+    list_filter = ["delivered_at"]
+    raw_id_fields = ["teleconsultation", "recipient"]
@@ -0,0 +1,77 @@
+"""
+Cached public doctor directory.
+
+Each filter combination is served from the cache under a key that embeds a
+directory-wide generation. Saving or deleting a ``DoctorProfile`` (or
+renaming its user) replaces the generation, which retires every cached page
+at once without having to enumerate keys.
+
+The generation is kept in the ``DirectoryGeneration`` row rather than the
+cache: without ``REDIS_URL`` every process has its own cache, which other
+workers' changes would not reach, and a culled cache key would restart the
+count at a value older pages may still be cached under. Each change stores
+a fresh ``time.time_ns()``, so a generation is never used twice.
+"""
+
+import hashlib
+import time
+
+from django.conf import settings
+from django.db.models.functions import Upper
+
+from .models import DirectoryGeneration, DoctorProfile
+
+GENERATION_PK = 1
+
+CARD_FIELDS = [
+    "id",
+    "specialization",
+    "consultation_fee",
+    "available",
+    "user__first_name",
+    "user__last_name",
+]
+
+
+def cache_timeout():
+    return getattr(settings, "DOCTOR_DIRECTORY_CACHE_TIMEOUT", 300)
+
+
+def get_generation():
+    generations = DirectoryGeneration.objects.filter(pk=GENERATION_PK)
+    return generations.values_list("generation", flat=True).first() or 0
+
+
+def invalidate():
+    """Retire every cached directory page, in every process"""
+    generation = time.time_ns()
+    generations = DirectoryGeneration.objects.filter(pk=GENERATION_PK)
+    if not generations.update(generation=generation):
+        DirectoryGeneration.objects.update_or_create(
+            pk=GENERATION_PK, defaults={"generation": generation}
+        )
+
+
+def cache_key(generation, params):
+    digest = hashlib.md5(repr(sorted(params.items())).encode()).hexdigest()
+    return f"doctors:directory:{generation}:{digest}"
+
+
+def directory_queryset(specialization=None, min_fee=None, max_fee=None, available=None):
+    """
+    Card rows matching the filters, served by the
+    ``(UPPER(specialization), consultation_fee)`` and
+    ``(available, consultation_fee)`` indexes.
+    """
+    queryset = DoctorProfile.objects.all()
+    if specialization:
+        queryset = queryset.alias(specialization_upper=Upper("specialization")).filter(
+            specialization_upper=specialization.upper()
+        )
+    if available is not None:
+        queryset = queryset.filter(available=available)
+    if min_fee is not None:
+        queryset = queryset.filter(consultation_fee__gte=min_fee)
+    if max_fee is not None:
+        queryset = queryset.filter(consultation_fee__lte=max_fee)
+    return queryset.order_by("consultation_fee", "id").values(*CARD_FIELDS)
@@ -0,0 +1,95 @@
+import csv
+import json
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from doctors.provisioning import provision_users
+
+
+def read_csv(path):
+    with open(path, newline="", encoding="utf-8-sig") as handle:
+        # Empty cells are missing values, e.g. the license of a patient row
+        return [
+            {name: value for name, value in row.items() if value not in ("", None)}
+            for row in csv.DictReader(handle)
+        ]
+
+
+def read_json(path):
+    with open(path, encoding="utf-8") as handle:
+        rows = json.load(handle)
+    if not isinstance(rows, list):
+        raise ValueError("expected a list of objects")
+    return rows
+
+
+READERS = {"csv": read_csv, "json": read_json}
+EXTENSIONS = {".csv": "csv", ".json": "json"}
+
+
+class Command(BaseCommand):
+    help = (
+        "Create doctor and patient accounts from a CSV file or a JSON list, "
+        "hashing passwords in a process pool and inserting in chunks. Rows "
+        "that are invalid or already taken are reported and skipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument(
+            "--format",
+            choices=sorted(READERS),
+            help="Input format, inferred from the file extension by default",
+        )
+        parser.add_argument(
+            "--chunk-size", type=int, default=settings.PROVISIONING_CHUNK_SIZE
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=settings.PROVISIONING_HASH_WORKERS,
+            help="Processes hashing passwords, 1 hashes in this process",
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        if not os.path.isfile(path):
+            raise CommandError(f"{path} does not exist")
+        fmt = options["format"]
+        if fmt is None:
+            fmt = EXTENSIONS.get(os.path.splitext(path)[1].lower())
+            if fmt is None:
+                raise CommandError("Cannot infer the format, pass --format")
+        if options["chunk_size"] < 1 or options["workers"] < 1:
+            raise CommandError("--chunk-size and --workers must be positive")
+
+        try:
+            rows = READERS[fmt](path)
+        except (UnicodeDecodeError, ValueError) as e:
+            raise CommandError(f"Could not read {path}: {e}")
+
+        started = time.perf_counter()
+        results = provision_users(
+            rows, chunk_size=options["chunk_size"], workers=options["workers"]
+        )
+        elapsed = time.perf_counter() - started
+
+        created = 0
+        for result in results:
+            if result["created"]:
+                created += 1
+                continue
+            errors = "; ".join(
+                f"{name}: {' '.join(map(str, messages))}"
+                for name, messages in result["errors"].items()
+            )
+            self.stderr.write(f"row {result['row']} ({result['email']}): {errors}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Created {created} of {len(results)} accounts "
+                f"({len(results) - created} rejected) in {elapsed:.1f}s"
+            )
+        )
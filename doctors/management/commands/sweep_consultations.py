@@ -0,0 +1,42 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from core.jobs import run_periodically
+from doctors.sweeper import sweep
+
+
+class Command(BaseCommand):
+    help = (
+        "Complete past teleconsultations and queue reminders for upcoming ones. "
+        "Runs once, or every --interval seconds when given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--reminder-lead",
+            type=int,
+            default=30,
+            help="Minutes before a consultation to queue its reminders",
+        )
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument(
+            "--interval",
+            type=int,
+            default=0,
+            help="Keep running and sweep every INTERVAL seconds",
+        )
+
+    def handle(self, *args, **options):
+        lead = timedelta(minutes=options["reminder_lead"])
+
+        def run():
+            started = time.perf_counter()
+            counts = sweep(reminder_lead=lead, batch_size=options["batch_size"])
+            self.stdout.write(
+                f"completed={counts['completed']} reminders={counts['reminders']} "
+                f"in {(time.perf_counter() - started) * 1000:.1f}ms"
+            )
+
+        run_periodically(run, options["interval"])
@@ -0,0 +1,29 @@
+# Generated by Django 5.2 on 2026-10-19 06:31
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("doctors", "0001_initial"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="availability",
+            index=models.Index(
+                fields=["doctor", "day", "start_time"],
+                name="doctors_ava_doctor__1e1a00_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="teleconsultation",
+            index=models.Index(
+                fields=["doctor", "scheduled_time"],
+                name="doctors_tel_doctor__3deb0e_idx",
+            ),
+        ),
+    ]
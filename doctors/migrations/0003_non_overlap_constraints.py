@@ -0,0 +1,160 @@
+"""
+Exclusion constraints that make overlapping availability windows and
+overlapping scheduled consultations of the same doctor impossible.
+
+Only PostgreSQL supports them; OverlapConstraint emits no DDL on other
+backends and NonOverlappingMixin falls back to a locked check-then-insert.
+
+Rows written before this migration may already overlap, which would make
+adding the constraints fail. They are dealt with first, on every backend.
+Overlapping scheduled consultations stop the migration with a list of the
+clashing ids: they are patients' bookings, so which of them to move or
+cancel is for an operator to decide. Overlapping availability windows of a
+doctor only describe when they can be booked and are merged into one, which
+is reported.
+"""
+
+from datetime import timedelta
+
+import django.db.models.expressions
+import doctors.models
+from django.db import migrations, models
+
+SETUP_SQL = [
+    "CREATE EXTENSION IF NOT EXISTS btree_gist",
+    # timestamptz + interval is only STABLE, but adding whole minutes does not
+    # depend on the session time zone, so the wrapper can be IMMUTABLE
+    """
+    CREATE OR REPLACE FUNCTION doctors_consultation_period(timestamptz, integer)
+    RETURNS tstzrange LANGUAGE sql IMMUTABLE PARALLEL SAFE AS
+    $$ SELECT tstzrange($1, $1 + make_interval(mins => $2), '[)') $$
+    """,
+]
+
+TEARDOWN_SQL = [
+    "DROP FUNCTION IF EXISTS doctors_consultation_period(timestamptz, integer)",
+]
+
+
+def _run(statements):
+    def apply(apps, schema_editor):
+        if schema_editor.connection.vendor != "postgresql":
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+
+    return apply
+
+
+def merge_availability(apps, schema_editor):
+    Availability = apps.get_model("doctors", "Availability")
+    db = schema_editor.connection.alias
+    windows = (
+        Availability.objects.using(db)
+        .order_by("doctor_id", "day", "start_time", "pk")
+        .iterator()
+    )
+    current, merged = None, []
+    for window in windows:
+        if (
+            current is not None
+            and (window.doctor_id, window.day) == (current.doctor_id, current.day)
+            and window.start_time < current.end_time
+        ):
+            if window.end_time > current.end_time:
+                current.end_time = window.end_time
+                Availability.objects.using(db).filter(pk=current.pk).update(
+                    end_time=current.end_time
+                )
+            merged.append(window.pk)
+            continue
+        current = window
+    if merged:
+        Availability.objects.using(db).filter(pk__in=merged).delete()
+        print(f"\n  Merged {len(merged)} overlapping availability windows: {merged}")
+
+
+def check_overlapping_consultations(apps, schema_editor):
+    Teleconsultation = apps.get_model("doctors", "Teleconsultation")
+    db = schema_editor.connection.alias
+    consultations = (
+        Teleconsultation.objects.using(db)
+        .filter(status="scheduled")
+        .order_by("doctor_id", "scheduled_time", "pk")
+        .values_list("pk", "doctor_id", "scheduled_time", "duration")
+        .iterator()
+    )
+    doctor, busy_pk, busy_until, clashes = None, None, None, []
+    for pk, doctor_id, start, duration in consultations:
+        end = start + timedelta(minutes=duration)
+        if doctor_id == doctor and start < busy_until:
+            clashes.append((doctor_id, busy_pk, pk))
+            if end <= busy_until:
+                continue
+        doctor, busy_pk, busy_until = doctor_id, pk, end
+    if clashes:
+        report = "\n".join(
+            f"  doctor {doctor_id}: consultations {first} and {second}"
+            for doctor_id, first, second in clashes
+        )
+        raise RuntimeError(
+            "Scheduled consultations must not overlap before doctors.0003 can "
+            "add its constraints. These overlap:\n"
+            f"{report}\nReschedule or cancel one of each, then migrate again."
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("doctors", "0002_availability_search_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            check_overlapping_consultations, migrations.RunPython.noop
+        ),
+        migrations.RunPython(merge_availability, migrations.RunPython.noop),
+        migrations.RunPython(_run(SETUP_SQL), _run(TEARDOWN_SQL)),
+        migrations.AddConstraint(
+            model_name="availability",
+            constraint=doctors.models.OverlapConstraint(
+                expressions=[
+                    ("doctor", "="),
+                    (
+                        doctors.models.TsRange(
+                            models.ExpressionWrapper(
+                                django.db.models.expressions.CombinedExpression(
+                                    models.F("day"), "+", models.F("start_time")
+                                ),
+                                output_field=models.DateTimeField(),
+                            ),
+                            models.ExpressionWrapper(
+                                django.db.models.expressions.CombinedExpression(
+                                    models.F("day"), "+", models.F("end_time")
+                                ),
+                                output_field=models.DateTimeField(),
+                            ),
+                            models.Value("[)"),
+                        ),
+                        "&&",
+                    ),
+                ],
+                name="availability_no_overlap",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="teleconsultation",
+            constraint=doctors.models.OverlapConstraint(
+                condition=models.Q(("status", "scheduled")),
+                expressions=[
+                    ("doctor", "="),
+                    (
+                        doctors.models.ConsultationPeriod("scheduled_time", "duration"),
+                        "&&",
+                    ),
+                ],
+                name="teleconsultation_no_overlap",
+            ),
+        ),
+    ]
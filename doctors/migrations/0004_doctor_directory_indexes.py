@@ -0,0 +1,31 @@
+# Generated by Django 5.2 on 2026-10-19 06:41
+
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("doctors", "0003_non_overlap_constraints"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="doctorprofile",
+            index=models.Index(
+                django.db.models.functions.text.Upper("specialization"),
+                models.F("consultation_fee"),
+                name="doctor_directory_spec_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="doctorprofile",
+            index=models.Index(
+                fields=["available", "consultation_fee"],
+                name="doctor_directory_avail_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,80 @@
+# Generated by Django 5.2 on 2026-10-19 06:44
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("doctors", "0004_doctor_directory_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ConsultationReminder",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("scheduled_time", models.DateTimeField()),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("delivered_at", models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                "ordering": ["scheduled_time"],
+            },
+        ),
+        migrations.AddField(
+            model_name="teleconsultation",
+            name="reminder_queued_at",
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="teleconsultation",
+            index=models.Index(
+                fields=["status", "scheduled_time"],
+                name="doctors_tel_status_61fba1_idx",
+            ),
+        ),
+        migrations.AddField(
+            model_name="consultationreminder",
+            name="recipient",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="consultation_reminders",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddField(
+            model_name="consultationreminder",
+            name="teleconsultation",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="reminders",
+                to="doctors.teleconsultation",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="consultationreminder",
+            index=models.Index(
+                fields=["recipient", "delivered_at"],
+                name="doctors_con_recipie_17608a_idx",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="consultationreminder",
+            constraint=models.UniqueConstraint(
+                fields=("teleconsultation", "recipient"),
+                name="unique_consultation_reminder",
+            ),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2 on 2026-10-19 09:12
+
+import time
+
+from django.db import migrations, models
+
+
+def create_generation_row(apps, schema_editor):
+    DirectoryGeneration = apps.get_model("doctors", "DirectoryGeneration")
+    DirectoryGeneration.objects.using(schema_editor.connection.alias).create(
+        pk=1, generation=time.time_ns()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("doctors", "0005_consultation_sweeper"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DirectoryGeneration",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("generation", models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(create_generation_row, migrations.RunPython.noop),
+    ]
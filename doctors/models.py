@@ -1,9 +1,94 @@
+from datetime import timedelta
 from django.conf import settings
-from django.db import models
+from django.contrib.postgres.constraints import ExclusionConstraint
+from django.contrib.postgres.fields import DateTimeRangeField, RangeOperators
+from django.db import IntegrityError, connections, models, router, transaction
+from django.db.models.functions import Upper
 from django.utils import timezone
 from django.core.exceptions import ValidationError
 
 
+class OverlapError(Exception):
+    """Raised when saving would overlap another interval of the same doctor"""
+
+
+class OverlapConstraint(ExclusionConstraint):
+    """
+    Exclusion constraint that only exists on PostgreSQL.
+
+    Other backends get no DDL for it and NonOverlappingMixin checks overlaps
+    before saving instead. Model validation skips it as well, so overlaps
+    surface as OverlapError from save() on every backend.
+    """
+
+    def constraint_sql(self, model, schema_editor):
+        if schema_editor.connection.vendor != "postgresql":
+            return None
+        return super().constraint_sql(model, schema_editor)
+
+    def create_sql(self, model, schema_editor):
+        if schema_editor.connection.vendor != "postgresql":
+            return None
+        return super().create_sql(model, schema_editor)
+
+    def remove_sql(self, model, schema_editor):
+        if schema_editor.connection.vendor != "postgresql":
+            return None
+        return super().remove_sql(model, schema_editor)
+
+    def validate(self, model, instance, exclude=None, using=None):
+        pass
+
+
+class TsRange(models.Func):
+    function = "TSRANGE"
+    output_field = DateTimeRangeField()
+
+
+class ConsultationPeriod(models.Func):
+    # IMMUTABLE wrapper around tstzrange, created in migration 0003
+    function = "doctors_consultation_period"
+    output_field = DateTimeRangeField()
+
+
+class NonOverlappingMixin:
+    """
+    Keep a doctor's intervals from overlapping, enforced at write time.
+
+    On PostgreSQL the model's ``overlap_constraint`` (an OverlapConstraint
+    in ``Meta.constraints``) rejects the insert atomically and the
+    IntegrityError is translated. Other backends lock the doctor row, then
+    run the model's ``has_overlap(using)`` query before saving.
+    """
+
+    overlap_constraint = None
+
+    def blocks_overlap(self):
+        return True
+
+    def save(self, *args, **kwargs):
+        using = kwargs.get("using") or router.db_for_write(type(self), instance=self)
+        enforced_by_db = connections[using].vendor == "postgresql"
+        try:
+            if enforced_by_db or not self.blocks_overlap():
+                super().save(*args, **kwargs)
+                return
+            with transaction.atomic(using=using):
+                list(
+                    DoctorProfile.objects.using(using)
+                    .select_for_update()
+                    .filter(pk=self.doctor_id)
+                    .values_list("pk")
+                )
+                if self.has_overlap(using):
+                    raise OverlapError(self.overlap_constraint)
+                super().save(*args, **kwargs)
+        except IntegrityError as exc:
+            if self.overlap_constraint in str(exc):
+                raise OverlapError(self.overlap_constraint) from exc
+            raise
+
+
 class DoctorProfile(models.Model):
     user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     license_number = models.CharField(max_length=100, unique=True)
@@ -11,21 +96,85 @@ class DoctorProfile(models.Model):
     consultation_fee = models.DecimalField(max_digits=10, decimal_places=2)
     available = models.BooleanField(default=True)
 
+    class Meta:
+        indexes = [
+            # Directory filters, see doctors/directory.py
+            models.Index(
+                Upper("specialization"),
+                "consultation_fee",
+                name="doctor_directory_spec_idx",
+            ),
+            models.Index(
+                fields=["available", "consultation_fee"],
+                name="doctor_directory_avail_idx",
+            ),
+        ]
+
     def __str__(self):
         return f"dr.{self.user.first_name} {self.user.last_name}"
 
 
-class Availability(models.Model):
+class Availability(NonOverlappingMixin, models.Model):
+    overlap_constraint = "availability_no_overlap"
+
     doctor = models.ForeignKey(DoctorProfile, on_delete=models.CASCADE)
     day = models.DateField()
     start_time = models.TimeField()
     end_time = models.TimeField()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["doctor", "day", "start_time"]),
+        ]
+        constraints = [
+            OverlapConstraint(
+                name="availability_no_overlap",
+                expressions=[
+                    ("doctor", RangeOperators.EQUAL),
+                    (
+                        TsRange(
+                            models.ExpressionWrapper(
+                                models.F("day") + models.F("start_time"),
+                                output_field=models.DateTimeField(),
+                            ),
+                            models.ExpressionWrapper(
+                                models.F("day") + models.F("end_time"),
+                                output_field=models.DateTimeField(),
+                            ),
+                            models.Value("[)"),
+                        ),
+                        RangeOperators.OVERLAPS,
+                    ),
+                ],
+            ),
+        ]
+
     def __str__(self):
         return f"{self.doctor} - {self.day}"
 
+    def has_overlap(self, using):
+        return (
+            Availability.objects.using(using)
+            .filter(
+                doctor_id=self.doctor_id,
+                day=self.day,
+                start_time__lt=self.end_time,
+                end_time__gt=self.start_time,
+            )
+            .exclude(pk=self.pk)
+            .exists()
+        )
+
+
+# Consultation lengths Teleconsultation.clean() accepts. The longest also
+# bounds how far back overlap checks, the sweeper and slot searches look.
+MIN_CONSULTATION_MINUTES = 15
+MAX_CONSULTATION_MINUTES = 180
+
+
+class Teleconsultation(NonOverlappingMixin, models.Model):
+    overlap_constraint = "teleconsultation_no_overlap"
 
-class Teleconsultation(models.Model):
     class Status(models.TextChoices):
         SCHEDULED = "scheduled"
         COMPLETED = "completed"
@@ -46,21 +195,169 @@ class Teleconsultation(models.Model):
     status = models.CharField(max_length=20, default=Status.SCHEDULED)
     duration = models.PositiveIntegerField()
     meeting_url = models.URLField()
+    # Set by the sweeper once reminders are queued, see doctors/sweeper.py
+    reminder_queued_at = models.DateTimeField(null=True, blank=True, editable=False)
 
     class Meta:
         unique_together = ("patient", "doctor", "scheduled_time")
         ordering = ["scheduled_time"]
+        indexes = [
+            models.Index(fields=["doctor", "scheduled_time"]),
+            models.Index(fields=["status", "scheduled_time"]),
+        ]
+        constraints = [
+            OverlapConstraint(
+                name="teleconsultation_no_overlap",
+                expressions=[
+                    ("doctor", RangeOperators.EQUAL),
+                    (
+                        ConsultationPeriod("scheduled_time", "duration"),
+                        RangeOperators.OVERLAPS,
+                    ),
+                ],
+                condition=models.Q(status="scheduled"),
+            ),
+        ]
 
     def __str__(self):
         return f"{self.patient} - {self.doctor} - {self.scheduled_time}"
 
+    # Fields that decide whether two consultations collide
+    OVERLAP_FIELDS = {"doctor", "scheduled_time", "duration", "status"}
+    UNIQUE_FIELDS = {"patient", "doctor", "scheduled_time"}
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def changed_fields(self):
+        """
+        Names of the fields that differ from the values loaded from the
+        database, or None for unsaved instances and deferred loads.
+        """
+        loaded = getattr(self, "_loaded_values", None)
+        if self._state.adding or loaded is None:
+            return None
+        fields = self._meta.concrete_fields
+        if any(field.attname not in loaded for field in fields):
+            return None
+        return {
+            field.name
+            for field in fields
+            if getattr(self, field.attname) != loaded[field.attname]
+        }
+
+    @classmethod
+    def transition(cls, pk, status, from_status=Status.SCHEDULED, queryset=None):
+        """
+        Move a consultation to ``status`` with one conditional UPDATE.
+
+        Returns ``(changed, current)``: ``changed`` tells whether this call
+        performed the transition and ``current`` is the status the row now
+        has, or None when it does not exist. Repeating a transition that
+        already happened is therefore a no-op rather than an error.
+        """
+        queryset = (cls.objects.all() if queryset is None else queryset).filter(pk=pk)
+        if queryset.filter(status=from_status).update(status=status):
+            return True, status
+        return False, queryset.values_list("status", flat=True).first()
+
+    def blocks_overlap(self):
+        if self.status != self.Status.SCHEDULED:
+            return False
+        changed = self.changed_fields()
+        return changed is None or bool(changed & self.OVERLAP_FIELDS)
+
+    def has_overlap(self, using):
+        end = self.scheduled_time + timedelta(minutes=self.duration)
+        # Consultations last at most MAX_CONSULTATION_MINUTES, which bounds
+        # the index scan
+        earliest = self.scheduled_time - timedelta(minutes=MAX_CONSULTATION_MINUTES)
+        candidates = (
+            Teleconsultation.objects.using(using)
+            .filter(
+                doctor_id=self.doctor_id,
+                status=self.Status.SCHEDULED,
+                scheduled_time__lt=end,
+                scheduled_time__gt=earliest,
+            )
+            .exclude(pk=self.pk)
+            .values_list("scheduled_time", "duration")
+        )
+        return any(
+            start + timedelta(minutes=minutes) > self.scheduled_time
+            for start, minutes in candidates
+        )
+
     def clean(self):
         if self.scheduled_time < timezone.now():
             raise ValidationError("Cannot schedule consultation in the past")
 
-        if not 15 <= self.duration <= 180:
-            raise ValidationError("Duration must be between 15 and 180 minutes")
+        if not MIN_CONSULTATION_MINUTES <= self.duration <= MAX_CONSULTATION_MINUTES:
+            raise ValidationError(
+                f"Duration must be between {MIN_CONSULTATION_MINUTES} and "
+                f"{MAX_CONSULTATION_MINUTES} minutes"
+            )
 
     def save(self, *args, **kwargs):
-        self.full_clean()
+        changed = self.changed_fields()
+        if changed is None:
+            self.full_clean()
+        elif changed:
+            # Only validate what this save changes; a status update must not
+            # fail because the consultation has started in the meantime
+            exclude = {field.name for field in self._meta.fields} - changed
+            self.clean_fields(exclude=exclude)
+            if changed & {"scheduled_time", "duration"}:
+                self.clean()
+            if changed & self.UNIQUE_FIELDS:
+                self.validate_unique(exclude=exclude - self.UNIQUE_FIELDS)
+            if kwargs.get("update_fields") is None:
+                kwargs["update_fields"] = changed
         super().save(*args, **kwargs)
+        self._loaded_values = {
+            field.attname: getattr(self, field.attname)
+            for field in self._meta.concrete_fields
+        }
+
+
+class ConsultationReminder(models.Model):
+    """Outbox of reminders for upcoming consultations, one per recipient"""
+
+    teleconsultation = models.ForeignKey(
+        Teleconsultation, related_name="reminders", on_delete=models.CASCADE
+    )
+    recipient = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        related_name="consultation_reminders",
+        on_delete=models.CASCADE,
+    )
+    scheduled_time = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    delivered_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["scheduled_time"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["teleconsultation", "recipient"],
+                name="unique_consultation_reminder",
+            )
+        ]
+        indexes = [
+            models.Index(fields=["recipient", "delivered_at"]),
+        ]
+
+    def __str__(self):
+        return f"Reminder for {self.recipient} - {self.scheduled_time}"
+
+
+class DirectoryGeneration(models.Model):
+    """
+    Single row naming the current generation of cached directory pages,
+    shared by every process, see doctors/directory.py.
+    """
+
+    generation = models.BigIntegerField(default=0)
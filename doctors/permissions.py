@@ -10,7 +10,7 @@ class IsDoctorOrReadOnly(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
         if request.method in permissions.SAFE_METHODS:
             return True
-        return obj.user == request.user
+        return obj.user_id == request.user.pk
 
 
 class IsDoctorProfileOwner(permissions.BasePermission):
@@ -29,7 +29,7 @@ class IsDoctorProfileOwner(permissions.BasePermission):
             return True
 
         # For write operations, only allow the owner or superusers
-        return obj.user == request.user or request.user.is_superuser
+        return obj.user_id == request.user.pk or request.user.is_superuser
 
 
 class IsPatientOwner(permissions.BasePermission):
@@ -41,12 +41,11 @@ class IsPatientOwner(permissions.BasePermission):
         # For read operations, allow both the patient and the doctor
         if request.method in permissions.SAFE_METHODS:
             # Check if the user is the patient
-            is_patient = obj.patient == request.user
+            is_patient = obj.patient_id == request.user.pk
 
-            # Check if the user is the doctor
-            is_doctor = False
-            if hasattr(obj, "doctor") and hasattr(obj.doctor, "user"):
-                is_doctor = obj.doctor.user == request.user
+            # Check if the user is the doctor, comparing ids so no related
+            # rows need to be loaded
+            is_doctor = obj.doctor.user_id == request.user.pk
 
             # Allow access if the user is either the patient or the doctor
             return is_patient or is_doctor
@@ -65,10 +64,8 @@ class IsPatientOwner(permissions.BasePermission):
                 return False
 
             # Allow doctors to update only the status field
-            if hasattr(obj, "doctor") and hasattr(obj.doctor, "user"):
-                is_doctor = obj.doctor.user == request.user
-                if is_doctor:
-                    return True
+            if obj.doctor.user_id == request.user.pk:
+                return True
 
         # For other write operations, only allow the patient
-        return obj.patient == request.user
+        return obj.patient_id == request.user.pk
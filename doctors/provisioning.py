@@ -0,0 +1,202 @@
+"""
+Bulk provisioning of doctor and patient accounts.
+
+Onboarding a partner hospital creates hundreds of accounts at once, which
+one ``DoctorRegistrationAPI`` request per doctor makes slow: every request
+hashes a password (deliberately tens of milliseconds of CPU) and inserts the
+user and its profile separately. Here each row is validated on its own with
+``ProvisionRowSerializer`` and the valid rows are handled in chunks:
+
+* clashes with existing accounts and between rows of the batch are found
+  with one ``IN`` query per unique field, not one lookup per row;
+* the ``provision_users`` command hashes passwords in a process pool of
+  ``PROVISIONING_HASH_WORKERS``, so a large import uses every core instead
+  of one. The API hashes in the request's own process: a gunicorn worker
+  must not fork a pool per request, so it takes few enough rows to finish
+  within the request timeout instead (``ProvisionSerializer.MAX_ROWS``);
+* users and doctor profiles are written with one ``bulk_create`` each, in a
+  transaction per chunk. Should a concurrent registration take an email,
+  phone or license in between, the chunk is retried row by row in
+  savepoints so only the clashing rows are rejected.
+
+Every row gets a result in input order. ``bulk_create`` sends no signals, so
+the doctor directory is invalidated here once the accounts are committed.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import IntegrityError, transaction
+
+from accounts.serializers import USER_UNIQUE_MESSAGES
+from core.integrity import unique_violations
+
+from . import directory
+from .models import DoctorProfile
+from .serializers import DOCTOR_UNIQUE_MESSAGES, ProvisionRowSerializer
+
+User = get_user_model()
+
+# Batch-level uniqueness checks: field -> (model, lookup, message)
+UNIQUE_FIELDS = {
+    "email": (User, "email", USER_UNIQUE_MESSAGES["email"]),
+    "phone": (User, "phone", USER_UNIQUE_MESSAGES["phone"]),
+    "license_number": (
+        DoctorProfile,
+        "license_number",
+        DOCTOR_UNIQUE_MESSAGES["license_number"],
+    ),
+}
+DUPLICATE_MESSAGE = "Duplicates row {row} of this batch."
+
+
+def _init_worker():
+    # Workers started with spawn or forkserver import nothing of the parent
+    django.setup()
+
+
+def hash_passwords(passwords, pool=None, workers=1):
+    if pool is None:
+        return [make_password(password) for password in passwords]
+    # A few tasks per worker keeps them busy without a round trip per hash
+    chunksize = max(1, len(passwords) // (workers * 4))
+    return list(pool.map(make_password, passwords, chunksize=chunksize))
+
+
+def check_unique(results, rows):
+    """Reject rows whose unique values are taken or repeat an earlier row"""
+    for name, (model, lookup, message) in UNIQUE_FIELDS.items():
+        values = {row[name] for row in rows if name in row}
+        if not values:
+            continue
+        found = model.objects.filter(**{f"{lookup}__in": values})
+        taken = {
+            getattr(value, "as_e164", value)
+            for value in found.values_list(lookup, flat=True)
+        }
+        first = {}
+        for result, row in zip(results, rows):
+            value = row.get(name)
+            if value is None or result["errors"]:
+                continue
+            if value in taken:
+                result["errors"] = {name: [message]}
+            elif value in first:
+                result["errors"] = {name: [DUPLICATE_MESSAGE.format(row=first[value])]}
+            else:
+                first[value] = result["row"]
+
+
+def build(row, password):
+    user = User(
+        email=row["email"],
+        first_name=row["first_name"],
+        last_name=row["last_name"],
+        phone=row["phone"],
+        role=row["role"],
+        password=password,
+    )
+    profile = None
+    if row["role"] == User.Role.DOCTOR:
+        profile = DoctorProfile(
+            user=user,
+            license_number=row["license_number"],
+            specialization=row["specialization"],
+            consultation_fee=row["consultation_fee"],
+        )
+    return user, profile
+
+
+def write_chunk(results, rows, passwords):
+    built = [build(row, password) for row, password in zip(rows, passwords)]
+    try:
+        with transaction.atomic():
+            User.objects.bulk_create([user for user, _ in built])
+            DoctorProfile.objects.bulk_create(
+                [profile for _, profile in built if profile is not None]
+            )
+    except IntegrityError:
+        write_rows(results, rows, passwords)
+        return
+    for result, (user, _) in zip(results, built):
+        result["id"], result["created"] = user.pk, True
+
+
+def write_rows(results, rows, passwords):
+    """Fallback for chunks that lost a race, one savepoint per row"""
+    for result, row, password in zip(results, rows, passwords):
+        # Fresh instances, the failed bulk_create may have assigned keys
+        user, profile = build(row, password)
+        try:
+            with transaction.atomic():
+                user.save()
+                if profile is not None:
+                    profile.user = user
+                    profile.save()
+        except IntegrityError as e:
+            result["errors"] = {
+                **unique_violations(e, User, USER_UNIQUE_MESSAGES),
+                **unique_violations(e, DoctorProfile, DOCTOR_UNIQUE_MESSAGES),
+            } or {"non_field_errors": ["Could not be saved."]}
+        else:
+            result["id"], result["created"] = user.pk, True
+
+
+def provision_users(rows, chunk_size=None, workers=1):
+    """
+    Create an account for each dict in ``rows``, returns one result per row:
+    ``{"row", "email", "id", "created", "errors"}`` with 1-based row numbers.
+    Passwords are hashed in a pool of ``workers`` processes when it is above
+    1, which only the management command does.
+    """
+    chunk_size = chunk_size or settings.PROVISIONING_CHUNK_SIZE
+
+    results, valid = [], []
+    for number, data in enumerate(rows, start=1):
+        serializer = ProvisionRowSerializer(data=data)
+        result = {
+            "row": number,
+            "email": data.get("email") if isinstance(data, dict) else None,
+            "id": None,
+            "created": False,
+            "errors": None,
+        }
+        if serializer.is_valid():
+            result["email"] = serializer.validated_data["email"]
+            valid.append((result, serializer.validated_data))
+        else:
+            result["errors"] = serializer.errors
+        results.append(result)
+
+    doctors = 0
+    pool = None
+    if workers > 1 and len(valid) > 1:
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+    with pool or nullcontext():
+        for start in range(0, len(valid), chunk_size):
+            chunk_results, chunk_rows = zip(*valid[start : start + chunk_size])
+            check_unique(chunk_results, chunk_rows)
+            accepted = [
+                (result, row)
+                for result, row in zip(chunk_results, chunk_rows)
+                if not result["errors"]
+            ]
+            if not accepted:
+                continue
+            accepted_results, accepted_rows = zip(*accepted)
+            passwords = hash_passwords(
+                [row["password"] for row in accepted_rows], pool, workers
+            )
+            write_chunk(accepted_results, accepted_rows, passwords)
+            doctors += sum(
+                result["created"] and row["role"] == User.Role.DOCTOR
+                for result, row in accepted
+            )
+
+    if doctors:
+        transaction.on_commit(directory.invalidate)
+    return results
@@ -0,0 +1,236 @@
+"""
+Free-slot computation for doctor availability.
+
+Availability windows and booked teleconsultations are turned into half-open
+``[start, end)`` datetime intervals; booked time is subtracted from the
+windows with a linear sweep and what remains is cut into bookable slots.
+Everything for a search is loaded with one query per table, backed by the
+``(doctor, day, start_time)`` and ``(doctor, scheduled_time)`` indexes.
+
+Bulk availability creation uses the same interval logic: candidates are
+checked against the doctor's existing windows with a single query and
+accepted rows are written with one ``bulk_create``.
+"""
+
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import (
+    MAX_CONSULTATION_MINUTES,
+    Availability,
+    DoctorProfile,
+    OverlapError,
+    Teleconsultation,
+)
+
+
+def merge_intervals(intervals):
+    """Sort and merge overlapping or touching intervals"""
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def subtract_intervals(windows, busy):
+    """Return the parts of ``windows`` not covered by ``busy``"""
+    windows = merge_intervals(windows)
+    busy = merge_intervals(busy)
+
+    free = []
+    i = 0
+    for start, end in windows:
+        cursor = start
+        # Skip bookings that finished before this window
+        while i < len(busy) and busy[i][1] <= cursor:
+            i += 1
+        j = i
+        while j < len(busy) and busy[j][0] < end:
+            busy_start, busy_end = busy[j]
+            if busy_start > cursor:
+                free.append((cursor, busy_start))
+            cursor = max(cursor, busy_end)
+            j += 1
+        if cursor < end:
+            free.append((cursor, end))
+    return free
+
+
+def split_into_slots(intervals, length, not_before=None):
+    """
+    Cut free intervals into consecutive slots of ``length``.
+
+    Slots stay aligned to the start of their interval; those starting before
+    ``not_before`` are dropped.
+    """
+    slots = []
+    for start, end in intervals:
+        while start + length <= end:
+            if not_before is None or start >= not_before:
+                slots.append((start, start + length))
+            start += length
+    return slots
+
+
+def local_datetime(day, at):
+    """Combine an availability date and time in the current timezone"""
+    return timezone.make_aware(
+        datetime.combine(day, at), timezone.get_current_timezone()
+    )
+
+
+def find_free_slots(
+    start_date, end_date, duration, specialization=None, doctor_ids=None
+):
+    """
+    Return bookable slots per available doctor between two dates (inclusive).
+
+    The result is a list of ``{"doctor": {...}, "slots": [(start, end), ...]}``
+    entries for doctors with at least one free slot, ordered by doctor id.
+    """
+    doctors = DoctorProfile.objects.filter(available=True)
+    if specialization:
+        doctors = doctors.filter(specialization__iexact=specialization)
+    if doctor_ids is not None:
+        doctors = doctors.filter(id__in=doctor_ids)
+    doctors = {
+        row["id"]: row
+        for row in doctors.order_by("id").values(
+            "id",
+            "specialization",
+            "consultation_fee",
+            "user__first_name",
+            "user__last_name",
+        )
+    }
+    if not doctors:
+        return []
+
+    windows = defaultdict(list)
+    for doctor_id, day, start_time, end_time in (
+        Availability.objects.filter(
+            doctor_id__in=list(doctors), day__gte=start_date, day__lte=end_date
+        )
+        .order_by("doctor_id", "day", "start_time")
+        .values_list("doctor_id", "day", "start_time", "end_time")
+    ):
+        windows[doctor_id].append(
+            (local_datetime(day, start_time), local_datetime(day, end_time))
+        )
+    if not windows:
+        return []
+
+    range_start = local_datetime(start_date, time.min)
+    range_end = local_datetime(end_date + timedelta(days=1), time.min)
+    busy = defaultdict(list)
+    for doctor_id, scheduled_time, minutes in (
+        Teleconsultation.objects.filter(
+            doctor_id__in=list(windows),
+            status=Teleconsultation.Status.SCHEDULED,
+            # Bookings starting before the range can still run into it
+            scheduled_time__gte=range_start
+            - timedelta(minutes=MAX_CONSULTATION_MINUTES),
+            scheduled_time__lt=range_end,
+        )
+        .order_by("doctor_id", "scheduled_time")
+        .values_list("doctor_id", "scheduled_time", "duration")
+    ):
+        busy[doctor_id].append(
+            (scheduled_time, scheduled_time + timedelta(minutes=minutes))
+        )
+
+    now = timezone.now()
+    length = timedelta(minutes=duration)
+    results = []
+    for doctor_id in sorted(windows):
+        free = subtract_intervals(windows[doctor_id], busy.get(doctor_id, []))
+        slots = split_into_slots(free, length, not_before=now)
+        if slots:
+            results.append({"doctor": doctors[doctor_id], "slots": slots})
+    return results
+
+
+def expand_weekly_template(weekdays, start_time, end_time, start_date, weeks):
+    """Yield ``(day, start_time, end_time)`` for each matching day"""
+    weekdays = set(weekdays)
+    for offset in range(weeks * 7):
+        day = start_date + timedelta(days=offset)
+        if day.weekday() in weekdays:
+            yield day, start_time, end_time
+
+
+def bulk_create_availability(doctor, slots):
+    """
+    Create many availability windows for ``doctor`` in one transaction.
+
+    ``slots`` is a list of ``(day, start_time, end_time)``. Each one is either
+    created or rejected with a reason, and a result dict is returned per slot
+    in input order. Overlaps are checked against existing windows and against
+    earlier slots of the same batch.
+    """
+    today = timezone.localdate()
+    results = [
+        {
+            "day": day,
+            "start_time": start_time,
+            "end_time": end_time,
+            "id": None,
+            "created": False,
+            "error": None,
+        }
+        for day, start_time, end_time in slots
+    ]
+    days = {result["day"] for result in results}
+
+    with transaction.atomic():
+        # Serialize writers per doctor, like Availability.save() does
+        list(
+            DoctorProfile.objects.select_for_update()
+            .filter(pk=doctor.pk)
+            .values_list("pk")
+        )
+        taken = defaultdict(list)
+        for day, start_time, end_time in Availability.objects.filter(
+            doctor=doctor, day__in=days
+        ).values_list("day", "start_time", "end_time"):
+            taken[day].append((start_time, end_time))
+
+        accepted = []
+        for result in results:
+            day, start, end = result["day"], result["start_time"], result["end_time"]
+            if day < today:
+                result["error"] = "Availability day cannot be in the past"
+            elif any(s < end and e > start for s, e in taken[day]):
+                result["error"] = "Overlaps with an existing availability"
+            else:
+                taken[day].append((start, end))
+                accepted.append(result)
+
+        try:
+            created = Availability.objects.bulk_create(
+                Availability(
+                    doctor=doctor,
+                    day=result["day"],
+                    start_time=result["start_time"],
+                    end_time=result["end_time"],
+                )
+                for result in accepted
+            )
+        except IntegrityError as exc:
+            # A concurrent single-row write slipped past the lock (PostgreSQL
+            # saves rely on the exclusion constraint instead)
+            if Availability.overlap_constraint in str(exc):
+                raise OverlapError(Availability.overlap_constraint) from exc
+            raise
+
+    for result, availability in zip(accepted, created):
+        result["id"] = availability.pk
+        result["created"] = True
+    return results
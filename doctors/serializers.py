@@ -1,11 +1,28 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import IntegrityError, transaction
 from django.utils import timezone
-from .models import DoctorProfile, Availability, Teleconsultation
+from datetime import timedelta
+from phonenumber_field.serializerfields import PhoneNumberField
+from accounts.serializers import USER_UNIQUE_MESSAGES
+from core.integrity import raise_unique_violations
+from .models import (
+    MAX_CONSULTATION_MINUTES,
+    MIN_CONSULTATION_MINUTES,
+    DoctorProfile,
+    Availability,
+    Teleconsultation,
+)
+from .scheduling import expand_weekly_template
 
 User = get_user_model()
 
+DOCTOR_UNIQUE_MESSAGES = {
+    "license_number": "A doctor with this license number already exists.",
+}
+
 
 class UserPublicSerializer(serializers.ModelSerializer):
     class Meta:
@@ -36,7 +53,7 @@ class DoctorRegistrationSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, validators=[validate_password])
     first_name = serializers.CharField()
     last_name = serializers.CharField()
-    phone = serializers.CharField()
+    phone = PhoneNumberField()
     license_number = serializers.CharField()
     specialization = serializers.CharField()
     consultation_fee = serializers.DecimalField(max_digits=10, decimal_places=2)
@@ -65,34 +82,23 @@ class DoctorRegistrationSerializer(serializers.ModelSerializer):
             "phone": validated_data["phone"],
             "role": "doctor",
         }
-        user = User.objects.create_user(**user_data)
-
-        DoctorProfile.objects.create(
-            user=user,
-            license_number=validated_data["license_number"],
-            specialization=validated_data["specialization"],
-            consultation_fee=validated_data["consultation_fee"],
-        )
-        return user
-
-    def validate_email(self, value):
-        if User.objects.filter(email=value).exists():
-            raise serializers.ValidationError("A user with this email already exists.")
-        return value
-
-    def validate_phone(self, value):
-        if User.objects.filter(phone=value).exists():
-            raise serializers.ValidationError(
-                "A user with this phone number already exists."
-            )
-        return value
-
-    def validate_license_number(self, value):
-        if DoctorProfile.objects.filter(license_number=value).exists():
-            raise serializers.ValidationError(
-                "A doctor with this license number already exists."
+        # Uniqueness is enforced by the database, a clash rolls back both rows
+        try:
+            with transaction.atomic():
+                user = User.objects.create_user(**user_data)
+                DoctorProfile.objects.create(
+                    user=user,
+                    license_number=validated_data["license_number"],
+                    specialization=validated_data["specialization"],
+                    consultation_fee=validated_data["consultation_fee"],
+                )
+        except IntegrityError as e:
+            raise_unique_violations(
+                e,
+                (User, USER_UNIQUE_MESSAGES),
+                (DoctorProfile, DOCTOR_UNIQUE_MESSAGES),
             )
-        return value
+        return user
 
     def to_representation(self, instance):
         doctor_profile = instance.doctorprofile
@@ -104,6 +110,73 @@ class DoctorRegistrationSerializer(serializers.ModelSerializer):
         }
 
 
+class ProvisionRowSerializer(serializers.Serializer):
+    """
+    One account of a bulk provisioning batch, see doctors/provisioning.py.
+    Uniqueness is checked for the whole batch at once, not here.
+    """
+
+    DOCTOR_FIELDS = ("license_number", "specialization", "consultation_fee")
+
+    email = serializers.EmailField()
+    password = serializers.CharField()
+    first_name = serializers.CharField(max_length=150)
+    last_name = serializers.CharField(max_length=150)
+    phone = PhoneNumberField()
+    role = serializers.ChoiceField(
+        choices=[User.Role.DOCTOR, User.Role.PATIENT], default=User.Role.DOCTOR
+    )
+    license_number = serializers.CharField(max_length=100, required=False)
+    specialization = serializers.CharField(max_length=100, required=False)
+    consultation_fee = serializers.DecimalField(
+        max_digits=10, decimal_places=2, required=False
+    )
+
+    def validate(self, attrs):
+        if attrs["role"] == User.Role.DOCTOR:
+            missing = {
+                name: ["This field is required for doctors."]
+                for name in self.DOCTOR_FIELDS
+                if name not in attrs
+            }
+            if missing:
+                raise serializers.ValidationError(missing)
+        attrs["email"] = User.objects.normalize_email(attrs["email"])
+        # Stored as E.164, which is also what the batch is deduplicated on
+        attrs["phone"] = attrs["phone"].as_e164
+        try:
+            validate_password(
+                attrs["password"],
+                User(
+                    email=attrs["email"],
+                    first_name=attrs["first_name"],
+                    last_name=attrs["last_name"],
+                ),
+            )
+        except DjangoValidationError as e:
+            raise serializers.ValidationError({"password": list(e.messages)})
+        return attrs
+
+
+class ProvisionSerializer(serializers.Serializer):
+    # Hashed in the request's process: 25 argon2 hashes take ~1.5 s, and
+    # even the pbkdf2 profile (~0.5 s each) stays well inside gunicorn's
+    # 30 s timeout. Larger imports go through ``manage.py provision_users``.
+    MAX_ROWS = 25
+
+    users = serializers.ListField(
+        child=serializers.DictField(), allow_empty=False, max_length=MAX_ROWS
+    )
+
+
+class ProvisionResultSerializer(serializers.Serializer):
+    row = serializers.IntegerField()
+    email = serializers.CharField(allow_null=True)
+    id = serializers.IntegerField(allow_null=True)
+    created = serializers.BooleanField()
+    errors = serializers.DictField(allow_null=True)
+
+
 class AvailabilitySerializer(serializers.ModelSerializer):
     doctor = serializers.PrimaryKeyRelatedField(
         queryset=DoctorProfile.objects.all(),
@@ -133,48 +206,17 @@ class AvailabilitySerializer(serializers.ModelSerializer):
                 {"time_range": "End time must be after start time"}
             )
 
-        # For partial updates (PATCH), we need to get the instance's existing values
+        # For partial updates (PATCH), validate against the instance's values
         if self.instance:
-            # Get values from data or from instance if not in data
-            day = data.get("day", self.instance.day)
             start_time = data.get("start_time", self.instance.start_time)
             end_time = data.get("end_time", self.instance.end_time)
-            doctor = data.get("doctor", self.instance.doctor)
-
-            # Check for overlapping availability, excluding the current instance
-            query = Availability.objects.filter(
-                doctor=doctor, day=day, start_time__lt=end_time, end_time__gt=start_time
-            ).exclude(pk=self.instance.pk)
-
-            if query.exists():
+            if start_time >= end_time:
                 raise serializers.ValidationError(
-                    {"overlap": "This slot overlaps with existing availability"}
-                )
-
-        # For new instances (POST), check if all required fields are present
-        elif all(k in data for k in ["day", "start_time", "end_time"]):
-            day = data["day"]
-            start_time = data["start_time"]
-            end_time = data["end_time"]
-
-            # Get doctor from data or context
-            doctor = data.get("doctor")
-            if not doctor and "doctor" in self.context:
-                doctor = self.context["doctor"]
-
-            if doctor:
-                # Check for overlapping availability
-                query = Availability.objects.filter(
-                    doctor=doctor,
-                    day=day,
-                    start_time__lt=end_time,
-                    end_time__gt=start_time,
+                    {"time_range": "End time must be after start time"}
                 )
 
-                if query.exists():
-                    raise serializers.ValidationError(
-                        {"overlap": "This slot overlaps with existing availability"}
-                    )
+        # Overlaps are rejected atomically when the row is written, see
+        # NonOverlappingMixin
 
         return data
 
@@ -214,9 +256,14 @@ class TeleconsultationSerializer(serializers.ModelSerializer):
 
         # Validate duration if it's being updated
         duration = attrs.get("duration")
-        if duration and not (15 <= duration <= 180):
+        if duration and not (
+            MIN_CONSULTATION_MINUTES <= duration <= MAX_CONSULTATION_MINUTES
+        ):
             raise serializers.ValidationError(
-                {"duration": "Duration must be between 15 and 180 minutes."}
+                {
+                    "duration": f"Duration must be between {MIN_CONSULTATION_MINUTES} "
+                    f"and {MAX_CONSULTATION_MINUTES} minutes."
+                }
             )
 
         # Validate status if it's being updated
@@ -238,3 +285,173 @@ class TeleconsultationSerializer(serializers.ModelSerializer):
                 "Doctor is not available for consultations"
             )
         return value
+
+
+class AvailabilitySearchSerializer(serializers.Serializer):
+    """Query parameters for the free-slot search"""
+
+    MAX_RANGE_DAYS = 14
+
+    specialization = serializers.CharField(required=False, allow_blank=True)
+    start_date = serializers.DateField(required=False)
+    end_date = serializers.DateField(required=False)
+    duration = serializers.IntegerField(
+        required=False,
+        default=30,
+        min_value=MIN_CONSULTATION_MINUTES,
+        max_value=MAX_CONSULTATION_MINUTES,
+    )
+
+    def validate(self, attrs):
+        today = timezone.localdate()
+        start_date = attrs.get("start_date") or today
+        end_date = attrs.get("end_date") or start_date + timedelta(days=6)
+
+        if start_date < today:
+            start_date = today
+        if end_date < start_date:
+            raise serializers.ValidationError(
+                {"end_date": "End date must not be before start date"}
+            )
+        if (end_date - start_date).days >= self.MAX_RANGE_DAYS:
+            raise serializers.ValidationError(
+                {"end_date": f"Search range cannot exceed {self.MAX_RANGE_DAYS} days"}
+            )
+
+        attrs["start_date"] = start_date
+        attrs["end_date"] = end_date
+        return attrs
+
+
+class TeleconsultationStatusSerializer(serializers.Serializer):
+    status = serializers.ChoiceField(
+        choices=[
+            Teleconsultation.Status.COMPLETED,
+            Teleconsultation.Status.CANCELLED,
+        ]
+    )
+
+
+class DoctorDirectoryFilterSerializer(serializers.Serializer):
+    """Query parameters for the public doctor directory"""
+
+    specialization = serializers.CharField(required=False, allow_blank=True)
+    min_fee = serializers.DecimalField(
+        max_digits=10, decimal_places=2, required=False, min_value=0
+    )
+    max_fee = serializers.DecimalField(
+        max_digits=10, decimal_places=2, required=False, min_value=0
+    )
+    available = serializers.BooleanField(required=False, allow_null=True, default=None)
+
+    def validate(self, attrs):
+        min_fee, max_fee = attrs.get("min_fee"), attrs.get("max_fee")
+        if min_fee is not None and max_fee is not None and min_fee > max_fee:
+            raise serializers.ValidationError(
+                {"max_fee": "Maximum fee must not be below minimum fee"}
+            )
+        attrs["specialization"] = attrs.get("specialization", "").strip()
+        return attrs
+
+
+class DoctorCardSerializer(serializers.Serializer):
+    """Compact directory entry built from a values() row"""
+
+    id = serializers.IntegerField()
+    first_name = serializers.CharField(source="user__first_name")
+    last_name = serializers.CharField(source="user__last_name")
+    specialization = serializers.CharField()
+    consultation_fee = serializers.DecimalField(max_digits=10, decimal_places=2)
+    available = serializers.BooleanField()
+
+
+class AvailabilitySlotSerializer(serializers.Serializer):
+    day = serializers.DateField()
+    start_time = serializers.TimeField()
+    end_time = serializers.TimeField()
+
+    def validate(self, attrs):
+        if attrs["start_time"] >= attrs["end_time"]:
+            raise serializers.ValidationError(
+                {"time_range": "End time must be after start time"}
+            )
+        return attrs
+
+
+class WeeklyTemplateSerializer(serializers.Serializer):
+    """A weekly recurring window, e.g. Mon-Fri 09:00-12:00 for 8 weeks"""
+
+    weekdays = serializers.ListField(
+        child=serializers.IntegerField(min_value=0, max_value=6),
+        allow_empty=False,
+        help_text="0 for Monday through 6 for Sunday",
+    )
+    start_time = serializers.TimeField()
+    end_time = serializers.TimeField()
+    start_date = serializers.DateField(required=False)
+    weeks = serializers.IntegerField(min_value=1, max_value=26, default=1)
+
+    def validate(self, attrs):
+        if attrs["start_time"] >= attrs["end_time"]:
+            raise serializers.ValidationError(
+                {"time_range": "End time must be after start time"}
+            )
+        attrs.setdefault("start_date", timezone.localdate())
+        return attrs
+
+
+class AvailabilityBulkSerializer(serializers.Serializer):
+    """Explicit slots and/or weekly templates, expanded into one batch"""
+
+    MAX_SLOTS = 500
+
+    slots = AvailabilitySlotSerializer(many=True, required=False)
+    templates = WeeklyTemplateSerializer(many=True, required=False)
+
+    def validate(self, attrs):
+        slots = [
+            (slot["day"], slot["start_time"], slot["end_time"])
+            for slot in attrs.get("slots", [])
+        ]
+        for template in attrs.get("templates", []):
+            slots.extend(expand_weekly_template(**template))
+
+        if not slots:
+            raise serializers.ValidationError(
+                "Provide at least one slot or weekly template"
+            )
+        if len(slots) > self.MAX_SLOTS:
+            raise serializers.ValidationError(
+                f"A single request cannot create more than {self.MAX_SLOTS} slots"
+            )
+        return {"slots": slots}
+
+
+class AvailabilityBulkResultSerializer(serializers.Serializer):
+    day = serializers.DateField()
+    start_time = serializers.TimeField()
+    end_time = serializers.TimeField()
+    id = serializers.IntegerField(allow_null=True)
+    created = serializers.BooleanField()
+    error = serializers.CharField(allow_null=True)
+
+
+class FreeSlotSerializer(serializers.Serializer):
+    start = serializers.DateTimeField()
+    end = serializers.DateTimeField()
+
+
+class DoctorSlotsSerializer(serializers.Serializer):
+    doctor_id = serializers.IntegerField(source="doctor.id")
+    first_name = serializers.CharField(source="doctor.user__first_name")
+    last_name = serializers.CharField(source="doctor.user__last_name")
+    specialization = serializers.CharField(source="doctor.specialization")
+    consultation_fee = serializers.DecimalField(
+        source="doctor.consultation_fee", max_digits=10, decimal_places=2
+    )
+    slots = serializers.SerializerMethodField()
+
+    def get_slots(self, obj):
+        return FreeSlotSerializer(
+            [{"start": start, "end": end} for start, end in obj["slots"]], many=True
+        ).data
@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from . import directory
+from .models import DoctorProfile
+
+# Fields of the user shown on directory cards
+CARD_USER_FIELDS = {"first_name", "last_name"}
+
+
+@receiver(post_save, sender=DoctorProfile)
+@receiver(post_delete, sender=DoctorProfile)
+def invalidate_directory(sender, instance, **kwargs):
+    # Wait for the commit so a concurrent request cannot re-cache stale rows
+    transaction.on_commit(directory.invalidate)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def invalidate_directory_on_rename(sender, instance, update_fields=None, **kwargs):
+    # Logins only touch last_login, which must not flush the directory
+    if update_fields is not None and not CARD_USER_FIELDS & set(update_fields):
+        return
+    if instance.role == "doctor":
+        transaction.on_commit(directory.invalidate)
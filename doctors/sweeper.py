@@ -0,0 +1,116 @@
+"""
+Periodic maintenance of teleconsultations.
+
+Past consultations are moved to ``completed`` and reminders are queued for
+upcoming ones. Both passes work in id batches with queryset ``update()`` and
+``bulk_create``, so no model ``save()`` (and its ``full_clean``) runs per
+row. Rows are selected through the ``(status, scheduled_time)`` index.
+"""
+
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import MAX_CONSULTATION_MINUTES, ConsultationReminder, Teleconsultation
+
+SCHEDULED = Teleconsultation.Status.SCHEDULED
+
+
+def _locked(queryset):
+    # Lets several sweepers run side by side on PostgreSQL
+    features = connection.features
+    if not features.has_select_for_update_skip_locked:
+        return queryset
+    if features.has_select_for_update_of:
+        # Only the consultation rows, not the joined doctor profile
+        return queryset.select_for_update(skip_locked=True, of=("self",))
+    return queryset.select_for_update(skip_locked=True)
+
+
+def complete_past_consultations(now, batch_size=500):
+    """Mark scheduled consultations that have ended as completed"""
+    completed = 0
+
+    # Anything that started more than the longest duration ago has ended,
+    # which needs no per-row arithmetic
+    cutoff = now - timedelta(minutes=MAX_CONSULTATION_MINUTES)
+    while True:
+        with transaction.atomic():
+            ids = list(
+                _locked(
+                    Teleconsultation.objects.filter(
+                        status=SCHEDULED, scheduled_time__lte=cutoff
+                    )
+                ).values_list("id", flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+            completed += Teleconsultation.objects.filter(
+                id__in=ids, status=SCHEDULED
+            ).update(status=Teleconsultation.Status.COMPLETED)
+
+    # The remaining window is bounded, so end times are checked in Python
+    with transaction.atomic():
+        ended = [
+            pk
+            for pk, start, minutes in _locked(
+                Teleconsultation.objects.filter(
+                    status=SCHEDULED, scheduled_time__gt=cutoff, scheduled_time__lt=now
+                )
+            ).values_list("id", "scheduled_time", "duration")
+            if start + timedelta(minutes=minutes) <= now
+        ]
+        for start in range(0, len(ended), batch_size):
+            completed += Teleconsultation.objects.filter(
+                id__in=ended[start : start + batch_size], status=SCHEDULED
+            ).update(status=Teleconsultation.Status.COMPLETED)
+
+    return completed
+
+
+def queue_reminders(now, lead, batch_size=500):
+    """Queue one reminder per patient and doctor for consultations due soon"""
+    queued = 0
+    while True:
+        with transaction.atomic():
+            rows = list(
+                _locked(
+                    Teleconsultation.objects.filter(
+                        status=SCHEDULED,
+                        scheduled_time__gt=now,
+                        scheduled_time__lte=now + lead,
+                        reminder_queued_at__isnull=True,
+                    )
+                )
+                .order_by("scheduled_time")
+                .values_list("id", "patient_id", "doctor__user_id", "scheduled_time")[
+                    :batch_size
+                ]
+            )
+            if not rows:
+                break
+            reminders = [
+                ConsultationReminder(
+                    teleconsultation_id=pk,
+                    recipient_id=recipient_id,
+                    scheduled_time=scheduled_time,
+                )
+                for pk, patient_id, doctor_user_id, scheduled_time in rows
+                for recipient_id in (patient_id, doctor_user_id)
+            ]
+            ConsultationReminder.objects.bulk_create(reminders, ignore_conflicts=True)
+            Teleconsultation.objects.filter(id__in=[row[0] for row in rows]).update(
+                reminder_queued_at=now
+            )
+            queued += len(reminders)
+    return queued
+
+
+def sweep(now=None, reminder_lead=timedelta(minutes=30), batch_size=500):
+    """Run both passes and return how many rows each one touched"""
+    now = now or timezone.now()
+    return {
+        "completed": complete_past_consultations(now, batch_size),
+        "reminders": queue_reminders(now, reminder_lead, batch_size),
+    }
@@ -1,3 +1,681 @@
-from django.test import TestCase
+import json
+import tempfile
+from contextlib import redirect_stdout
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from importlib import import_module
+from io import StringIO
+from itertools import count
+from types import SimpleNamespace
+from unittest.mock import patch
+from django.apps import apps as django_apps
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from accounts.models import User
+from .models import (
+    Availability,
+    ConsultationReminder,
+    DoctorProfile,
+    OverlapError,
+    Teleconsultation,
+)
+from . import directory, provisioning
+from .serializers import ProvisionSerializer
+from .scheduling import split_into_slots, subtract_intervals
+from .sweeper import sweep
 
-# Create your tests here.
+PHONES = count(11223344)
+
+
+def make_user(email, role=User.Role.PATIENT, **extra):
+    return User.objects.create_user(
+        email=email,
+        first_name="Test",
+        last_name="User",
+        phone=f"+2519{next(PHONES)}",
+        password="testpass123",
+        role=role,
+        **extra,
+    )
+
+
+def make_doctor(email, specialization="Cardiology", **extra):
+    user = make_user(email, role=User.Role.DOCTOR)
+    return DoctorProfile.objects.create(
+        user=user,
+        license_number=f"LIC-{email}",
+        specialization=specialization,
+        **{"consultation_fee": Decimal("200.00"), **extra},
+    )
+
+
+class IntervalArithmeticTests(APITestCase):
+    def test_subtract_and_split(self):
+        day = datetime(2030, 1, 1, tzinfo=timezone.get_current_timezone())
+
+        def at(hour, minute=0):
+            return day.replace(hour=hour, minute=minute)
+
+        free = subtract_intervals(
+            [(at(9), at(12)), (at(14), at(16))],
+            [(at(9, 30), at(10)), (at(11), at(11, 15)), (at(15), at(17))],
+        )
+        self.assertEqual(
+            free,
+            [
+                (at(9), at(9, 30)),
+                (at(10), at(11)),
+                (at(11, 15), at(12)),
+                (at(14), at(15)),
+            ],
+        )
+        slots = split_into_slots(free, timedelta(minutes=30))
+        self.assertEqual(
+            [start for start, _ in slots],
+            [at(9), at(10), at(10, 30), at(11, 15), at(14), at(14, 30)],
+        )
+
+
+class AvailabilitySearchTests(APITestCase):
+    def setUp(self):
+        self.patient = make_user("patient@example.com")
+        self.client.force_authenticate(user=self.patient)
+        self.day = timezone.localdate() + timedelta(days=2)
+
+        self.cardiologist = make_doctor("cardio@example.com")
+        make_doctor("derm@example.com", specialization="Dermatology")
+        for doctor in DoctorProfile.objects.all():
+            Availability.objects.create(
+                doctor=doctor, day=self.day, start_time=time(9), end_time=time(11)
+            )
+
+        Teleconsultation.objects.create(
+            patient=self.patient,
+            doctor=self.cardiologist,
+            scheduled_time=timezone.make_aware(datetime.combine(self.day, time(9))),
+            duration=45,
+            meeting_url="https://meet.example.com/abc",
+        )
+
+    def test_booked_time_is_subtracted(self):
+        response = self.client.get(
+            reverse("availability-search"),
+            {"specialization": "cardiology", "duration": 30},
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        [result] = response.data["results"]
+        self.assertEqual(result["doctor_id"], self.cardiologist.id)
+        self.assertEqual(
+            [slot["start"][11:16] for slot in result["slots"]], ["09:45", "10:15"]
+        )
+
+    def test_search_uses_constant_queries(self):
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse("availability-search"))
+        self.assertEqual(len(response.data["results"]), 2)
+
+
+class NonOverlapTests(APITestCase):
+    def setUp(self):
+        self.doctor = make_doctor("overlap@example.com")
+        self.patient = make_user("patient@example.com")
+        self.day = timezone.localdate() + timedelta(days=2)
+        Availability.objects.create(
+            doctor=self.doctor, day=self.day, start_time=time(9), end_time=time(11)
+        )
+
+    def test_overlapping_availability_is_rejected(self):
+        self.client.force_authenticate(user=self.doctor.user)
+        url = reverse("availability-list")
+        payload = {"day": self.day, "start_time": "10:00", "end_time": "12:00"}
+        response = self.client.post(url, payload)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("time_range", response.data)
+
+        # Touching intervals are allowed
+        payload["start_time"] = "11:00"
+        response = self.client.post(url, payload)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_overlapping_consultation_is_rejected(self):
+        start = timezone.make_aware(datetime.combine(self.day, time(9)))
+        fields = {
+            "patient": self.patient,
+            "doctor": self.doctor,
+            "duration": 60,
+            "meeting_url": "https://meet.example.com/abc",
+        }
+        first = Teleconsultation.objects.create(scheduled_time=start, **fields)
+        with self.assertRaises(OverlapError):
+            Teleconsultation.objects.create(
+                scheduled_time=start + timedelta(minutes=30), **fields
+            )
+
+        # Cancelled consultations free their time
+        first.status = Teleconsultation.Status.CANCELLED
+        first.save()
+        Teleconsultation.objects.create(
+            scheduled_time=start + timedelta(minutes=30), **fields
+        )
+
+    def test_existing_overlaps_are_dealt_with_before_the_constraints(self):
+        migration = import_module("doctors.migrations.0003_non_overlap_constraints")
+        # bulk_create skips the write-time check, like rows from before it
+        Availability.objects.bulk_create(
+            [
+                Availability(
+                    doctor=self.doctor,
+                    day=self.day,
+                    start_time=time(10),
+                    end_time=time(12),
+                ),
+                Availability(
+                    doctor=self.doctor,
+                    day=self.day,
+                    start_time=time(11),
+                    end_time=time(11, 30),
+                ),
+            ]
+        )
+        start = timezone.make_aware(datetime.combine(self.day, time(9)))
+        first, clashing, later = Teleconsultation.objects.bulk_create(
+            Teleconsultation(
+                patient=self.patient,
+                doctor=self.doctor,
+                scheduled_time=start + timedelta(minutes=offset),
+                duration=60,
+                meeting_url="https://meet.example.com/abc",
+            )
+            for offset in (0, 30, 60)
+        )
+
+        editor = SimpleNamespace(connection=connection)
+        with redirect_stdout(StringIO()) as output:
+            migration.merge_availability(django_apps, editor)
+        self.assertEqual(
+            list(Availability.objects.values_list("start_time", "end_time")),
+            [(time(9), time(12))],
+        )
+        self.assertIn("Merged 2 overlapping availability", output.getvalue())
+
+        # Bookings are left to an operator, nothing is changed
+        with self.assertRaises(RuntimeError) as raised:
+            migration.check_overlapping_consultations(django_apps, editor)
+        message = str(raised.exception)
+        self.assertIn(
+            f"doctor {self.doctor.pk}: consultations {first.pk} and {clashing.pk}",
+            message,
+        )
+        self.assertIn(f"consultations {clashing.pk} and {later.pk}", message)
+        self.assertEqual(
+            set(Teleconsultation.objects.values_list("status", flat=True)),
+            {Teleconsultation.Status.SCHEDULED},
+        )
+
+        clashing.status = Teleconsultation.Status.CANCELLED
+        clashing.save(update_fields=["status"])
+        migration.check_overlapping_consultations(django_apps, editor)
+
+
+class BulkAvailabilityTests(APITestCase):
+    def setUp(self):
+        self.doctor = make_doctor("bulk@example.com")
+        self.client.force_authenticate(user=self.doctor.user)
+        # Next Monday, so a Mon-Fri template starts on a full week
+        today = timezone.localdate()
+        self.monday = today + timedelta(days=7 - today.weekday())
+        Availability.objects.create(
+            doctor=self.doctor,
+            day=self.monday,
+            start_time=time(10),
+            end_time=time(11),
+        )
+
+    def test_template_and_slots_report_per_slot_results(self):
+        payload = {
+            "templates": [
+                {
+                    "weekdays": [0, 1, 2, 3, 4],
+                    "start_time": "09:00",
+                    "end_time": "12:00",
+                    "start_date": self.monday,
+                    "weeks": 2,
+                }
+            ],
+            "slots": [
+                {"day": self.monday, "start_time": "13:00", "end_time": "14:00"},
+                {"day": self.monday, "start_time": "13:30", "end_time": "15:00"},
+            ],
+        }
+        with self.assertNumQueries(6):
+            response = self.client.post(
+                reverse("availability-bulk"), payload, format="json"
+            )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["created"], 10)
+        self.assertEqual(response.data["rejected"], 2)
+        rejected = [r for r in response.data["results"] if not r["created"]]
+        self.assertEqual(
+            [(r["day"], r["start_time"]) for r in rejected],
+            [(str(self.monday), "13:30:00"), (str(self.monday), "09:00:00")],
+        )
+        self.assertEqual(Availability.objects.filter(doctor=self.doctor).count(), 11)
+
+    def test_nothing_created_is_a_bad_request(self):
+        payload = {
+            "slots": [{"day": self.monday, "start_time": "10:30", "end_time": "11:30"}]
+        }
+        response = self.client.post(
+            reverse("availability-bulk"), payload, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data["created"], 0)
+
+
+class QueryCountTests(APITestCase):
+    """
+    Query budgets for every doctors endpoint. Each list is checked with
+    several rows so per-row lookups show up as a failure.
+    """
+
+    def setUp(self):
+        self.patient = make_user("patient@example.com")
+        self.doctor = make_doctor("doctor@example.com")
+        self.day = timezone.localdate() + timedelta(days=2)
+        for i in range(3):
+            make_doctor(f"other{i}@example.com")
+            Availability.objects.create(
+                doctor=self.doctor,
+                day=self.day + timedelta(days=i),
+                start_time=time(9),
+                end_time=time(10),
+            )
+            other_patient = make_user(f"patient{i}@example.com")
+            for patient in (self.patient, other_patient):
+                Teleconsultation.objects.create(
+                    patient=patient,
+                    doctor=self.doctor,
+                    scheduled_time=timezone.make_aware(
+                        datetime.combine(self.day + timedelta(days=i), time(11))
+                    )
+                    + timedelta(hours=patient is self.patient),
+                    duration=30,
+                    meeting_url="https://meet.example.com/abc",
+                )
+        self.consultation = Teleconsultation.objects.filter(
+            patient=self.patient
+        ).first()
+
+    def assertQueries(self, user, count, method, url, data=None):
+        self.client.force_authenticate(user=user)
+        with self.assertNumQueries(count):
+            response = getattr(self.client, method)(url, data, format="json")
+        self.assertLess(response.status_code, 400, response.data)
+        return response
+
+    def test_profiles(self):
+        # count + page
+        self.assertQueries(self.patient, 2, "get", reverse("doctor-profile-list"))
+        self.assertQueries(self.doctor.user, 2, "get", reverse("doctor-profile-list"))
+        detail = reverse("doctor-profile-detail", args=[self.doctor.pk])
+        self.assertQueries(self.patient, 1, "get", detail)
+        # fetch + update
+        self.assertQueries(
+            self.doctor.user, 2, "patch", detail, {"specialization": "Neurology"}
+        )
+        me = reverse("doctor-profile-me")
+        self.assertQueries(self.doctor.user, 1, "get", me)
+
+    def test_availability(self):
+        url = reverse("availability-list")
+        # profile + count + page
+        self.assertQueries(self.doctor.user, 3, "get", url)
+        self.assertQueries(self.patient, 0, "get", url)
+        detail = reverse("availability-detail", args=[Availability.objects.first().pk])
+        # profile + fetch, then the locked overlap check and update in a savepoint
+        self.assertQueries(self.doctor.user, 7, "patch", detail, {"end_time": "09:30"})
+
+    def test_teleconsultations(self):
+        url = reverse("teleconsult-list")
+        self.assertQueries(self.patient, 2, "get", url)
+        # profile + count + page
+        self.assertQueries(self.doctor.user, 3, "get", url)
+        detail = reverse("teleconsult-detail", args=[self.consultation.pk])
+        self.assertQueries(self.patient, 1, "get", detail)
+        self.assertQueries(self.doctor.user, 2, "get", detail)
+        # profile + fetch, then only the changed column is written
+        self.assertQueries(
+            self.doctor.user, 3, "patch", detail, {"status": "completed"}
+        )
+        other = Teleconsultation.objects.filter(patient=self.patient).last()
+        url = reverse("teleconsult-set-status", args=[other.pk])
+        # profile + conditional update
+        self.assertQueries(self.doctor.user, 2, "post", url, {"status": "cancelled"})
+
+
+class DoctorDirectoryTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.cardiologist = make_doctor("cardio@example.com")
+        make_doctor(
+            "derm@example.com",
+            specialization="Dermatology",
+            consultation_fee=Decimal("90.00"),
+        )
+        make_doctor("away@example.com", available=False)
+        self.url = reverse("doctor-directory")
+
+    def test_filters_return_compact_cards(self):
+        response = self.client.get(
+            self.url, {"specialization": "cardiology", "available": "true"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        [card] = response.data["results"]
+        self.assertEqual(
+            set(card),
+            {
+                "id",
+                "first_name",
+                "last_name",
+                "specialization",
+                "consultation_fee",
+                "available",
+            },
+        )
+        self.assertEqual(card["id"], self.cardiologist.id)
+
+        response = self.client.get(self.url, {"max_fee": "100"})
+        self.assertEqual(response.data["count"], 1)
+        response = self.client.get(self.url, {"min_fee": "300", "max_fee": "100"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_pages_are_cached_until_a_profile_changes(self):
+        self.client.get(self.url)
+        # Only the generation is read
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url)
+        self.assertEqual(response.data["count"], 3)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.cardiologist.available = False
+            self.cardiologist.save()
+        response = self.client.get(self.url, {"available": "true"})
+        self.assertEqual(response.data["count"], 1)
+
+    def test_generations_are_shared_and_never_reused(self):
+        before = directory.get_generation()
+        directory.invalidate()
+        after = directory.get_generation()
+        self.assertGreater(after, before)
+        # Losing the cache, or having another process's cache, changes nothing
+        cache.clear()
+        self.assertEqual(directory.get_generation(), after)
+        directory.invalidate()
+        self.assertNotIn(directory.get_generation(), (before, after))
+
+
+class SweeperTests(APITestCase):
+    def test_sweep_completes_past_and_queues_reminders(self):
+        doctor = make_doctor("sweep@example.com")
+        patient = make_user("patient@example.com")
+        now = timezone.now()
+        fields = {"patient": patient, "doctor": doctor, "meeting_url": "https://a.b/c"}
+        # bulk_create skips full_clean, which rejects past consultations
+        long_ago, just_ended, running, soon, later = (
+            Teleconsultation.objects.bulk_create(
+                [
+                    Teleconsultation(
+                        scheduled_time=now - timedelta(days=1), duration=30, **fields
+                    ),
+                    Teleconsultation(
+                        scheduled_time=now - timedelta(minutes=40),
+                        duration=30,
+                        **fields,
+                    ),
+                    Teleconsultation(
+                        scheduled_time=now - timedelta(minutes=10),
+                        duration=30,
+                        **fields,
+                    ),
+                    Teleconsultation(
+                        scheduled_time=now + timedelta(minutes=20),
+                        duration=30,
+                        **fields,
+                    ),
+                    Teleconsultation(
+                        scheduled_time=now + timedelta(hours=3), duration=30, **fields
+                    ),
+                ]
+            )
+        )
+
+        self.assertEqual(sweep(now=now), {"completed": 2, "reminders": 2})
+        completed = Teleconsultation.objects.filter(
+            status=Teleconsultation.Status.COMPLETED
+        )
+        self.assertEqual(
+            set(completed.values_list("id", flat=True)), {long_ago.id, just_ended.id}
+        )
+        self.assertEqual(
+            set(
+                ConsultationReminder.objects.values_list(
+                    "teleconsultation_id", "recipient_id"
+                )
+            ),
+            {(soon.id, patient.id), (soon.id, doctor.user_id)},
+        )
+
+        # A second run has nothing left to do
+        self.assertEqual(sweep(now=now), {"completed": 0, "reminders": 0})
+
+
+class StatusTransitionTests(APITestCase):
+    def setUp(self):
+        self.doctor = make_doctor("status@example.com")
+        self.patient = make_user("patient@example.com")
+        self.consultation = Teleconsultation.objects.create(
+            patient=self.patient,
+            doctor=self.doctor,
+            scheduled_time=timezone.now() + timedelta(hours=1),
+            duration=30,
+            meeting_url="https://meet.example.com/abc",
+        )
+        self.url = reverse("teleconsult-set-status", args=[self.consultation.pk])
+
+    def test_transition_is_idempotent_and_exclusive(self):
+        self.client.force_authenticate(user=self.doctor.user)
+        response = self.client.post(self.url, {"status": "completed"})
+        self.assertEqual(response.data["changed"], True)
+        response = self.client.post(self.url, {"status": "completed"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["changed"], False)
+
+        response = self.client.post(self.url, {"status": "cancelled"})
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+    def test_other_users_cannot_transition(self):
+        self.client.force_authenticate(user=make_user("other@example.com"))
+        response = self.client.post(self.url, {"status": "cancelled"})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.consultation.refresh_from_db()
+        self.assertEqual(self.consultation.status, Teleconsultation.Status.SCHEDULED)
+
+    def test_save_validates_only_changed_fields(self):
+        # Started consultations can still be updated, full_clean would reject
+        # the past scheduled_time
+        Teleconsultation.objects.filter(pk=self.consultation.pk).update(
+            scheduled_time=timezone.now() - timedelta(minutes=10)
+        )
+        consultation = Teleconsultation.objects.get(pk=self.consultation.pk)
+        consultation.meeting_url = "https://meet.example.com/new"
+        with self.assertNumQueries(1):
+            consultation.save()
+
+        consultation.duration = 500
+        with self.assertRaises(ValidationError):
+            consultation.save()
+
+
+class DoctorRegistrationTests(APITestCase):
+    def register(self, **overrides):
+        data = {
+            "email": "doc@example.com",
+            "password": "s3cret-pass-123",
+            "first_name": "Abebe",
+            "last_name": "Kebede",
+            "phone": "+251911555555",
+            "license_number": "LIC-1",
+            "specialization": "Cardiology",
+            "consultation_fee": "150.00",
+            **overrides,
+        }
+        return self.client.post(reverse("doctor-register"), data)
+
+    def test_duplicates_are_reported_per_field(self):
+        self.assertEqual(self.register().status_code, status.HTTP_201_CREATED)
+
+        response = self.register(email="other@example.com", phone="+251911555556")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            response.data,
+            {"license_number": ["A doctor with this license number already exists."]},
+        )
+        # The user row of the failed registration was rolled back
+        self.assertFalse(User.objects.filter(email="other@example.com").exists())
+
+        response = self.register(license_number="LIC-2", phone="+251911555557")
+        self.assertEqual(
+            response.data, {"email": ["A user with this email already exists."]}
+        )
+
+
+@override_settings(
+    PASSWORD_HASHERS=["accounts.hashers.TunedPBKDF2PasswordHasher"],
+    PASSWORD_PBKDF2_ITERATIONS=1000,
+)
+class ProvisioningTests(APITestCase):
+    def setUp(self):
+        self.admin = make_user("admin@example.com", role=User.Role.ADMIN, is_staff=True)
+        self.client.force_authenticate(user=self.admin)
+
+    def row(self, number, **overrides):
+        return {
+            "email": f"doc{number}@example.com",
+            "password": "s3cret-pass-123",
+            "first_name": "Abebe",
+            "last_name": "Kebede",
+            "phone": f"+2519118{number:05d}",
+            "license_number": f"LIC-P{number}",
+            "specialization": "Cardiology",
+            "consultation_fee": "150.00",
+            **overrides,
+        }
+
+    def provision(self, rows):
+        return self.client.post(
+            reverse("doctor-provision"), {"users": rows}, format="json"
+        )
+
+    def test_rows_are_created_or_rejected_individually(self):
+        make_doctor("taken@example.com")
+        patient = self.row(2, role="patient")
+        for name in ("license_number", "specialization", "consultation_fee"):
+            del patient[name]
+        rows = [
+            self.row(1),
+            patient,
+            self.row(3, email="taken@example.com"),
+            self.row(4, license_number=None),
+            self.row(5, phone=self.row(1)["phone"]),
+            self.row(6, password="123"),
+        ]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.provision(rows)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual((response.data["created"], response.data["rejected"]), (2, 4))
+        results = response.data["results"]
+        self.assertEqual([result["row"] for result in results], [1, 2, 3, 4, 5, 6])
+        self.assertEqual(
+            results[2]["errors"], {"email": ["A user with this email already exists."]}
+        )
+        self.assertIn("license_number", results[3]["errors"])
+        self.assertEqual(
+            results[4]["errors"], {"phone": ["Duplicates row 1 of this batch."]}
+        )
+        self.assertIn("password", results[5]["errors"])
+
+        doctor = User.objects.get(pk=results[0]["id"])
+        self.assertTrue(doctor.check_password("s3cret-pass-123"))
+        self.assertEqual(doctor.doctorprofile.license_number, "LIC-P1")
+        patient = User.objects.get(pk=results[1]["id"])
+        self.assertEqual(patient.role, User.Role.PATIENT)
+        self.assertFalse(DoctorProfile.objects.filter(user=patient).exists())
+
+    def test_batch_is_written_with_a_fixed_number_of_queries(self):
+        rows = [self.row(number) for number in range(1, 21)]
+        # Three uniqueness checks, savepoint, users, profiles, release
+        with self.assertNumQueries(7):
+            response = self.provision(rows)
+        self.assertEqual(response.data["created"], 20)
+
+    def test_lost_race_only_rejects_the_clashing_row(self):
+        rows = [self.row(1), self.row(2)]
+        original = provisioning.check_unique
+
+        def racing_check(results, chunk):
+            original(results, chunk)
+            make_user("doc2@example.com")
+
+        with patch.object(provisioning, "check_unique", racing_check):
+            results = provisioning.provision_users(rows, workers=1)
+
+        self.assertTrue(results[0]["created"])
+        self.assertEqual(
+            results[1]["errors"], {"email": ["A user with this email already exists."]}
+        )
+        self.assertFalse(DoctorProfile.objects.filter(license_number="LIC-P2").exists())
+
+    def test_passwords_can_be_hashed_in_a_process_pool(self):
+        results = provisioning.provision_users(
+            [self.row(number) for number in range(1, 5)], workers=2
+        )
+        self.assertTrue(all(result["created"] for result in results))
+        for user in User.objects.filter(role=User.Role.DOCTOR):
+            self.assertTrue(user.check_password("s3cret-pass-123"))
+
+    def test_api_hashes_in_process_and_caps_the_rows(self):
+        with patch.object(provisioning, "ProcessPoolExecutor") as pool:
+            response = self.provision([self.row(1), self.row(2)])
+        self.assertEqual(response.data["created"], 2)
+        pool.assert_not_called()
+
+        rows = [self.row(number) for number in range(ProvisionSerializer.MAX_ROWS + 1)]
+        response = self.provision(rows)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("users", response.data)
+
+    def test_admin_only(self):
+        self.client.force_authenticate(user=make_user("patient@example.com"))
+        response = self.provision([self.row(1)])
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_command_reports_rejected_rows(self):
+        rows = [self.row(1), self.row(2, email="not-an-email")]
+        with tempfile.NamedTemporaryFile("w", suffix=".json") as handle:
+            json.dump(rows, handle)
+            handle.flush()
+            out, err = StringIO(), StringIO()
+            call_command(
+                "provision_users", handle.name, workers=1, stdout=out, stderr=err
+            )
+        self.assertIn("Created 1 of 2 accounts", out.getvalue())
+        self.assertIn("row 2 (not-an-email): email:", err.getvalue())
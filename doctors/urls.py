@@ -1,8 +1,11 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import (
+    AvailabilitySearchAPI,
+    DoctorDirectoryAPI,
     DoctorRegistrationAPI,
     DoctorProfileViewSet,
+    ProvisionUsersAPI,
     AvailabilityViewSet,
     TeleconsultationViewSet,
 )
@@ -14,6 +17,14 @@ router.register(r"teleconsults", TeleconsultationViewSet, basename="teleconsult"
 
 urlpatterns = [
     path("register/", DoctorRegistrationAPI.as_view(), name="doctor-register"),
+    path("provision/", ProvisionUsersAPI.as_view(), name="doctor-provision"),
+    path("directory/", DoctorDirectoryAPI.as_view(), name="doctor-directory"),
+    # Declared before the router so "search" is not taken as an availability pk
+    path(
+        "availability/search/",
+        AvailabilitySearchAPI.as_view(),
+        name="availability-search",
+    ),
     # Removed duplicate "profiles/me/" path - use the @action decorator in the viewset instead
     path("", include(router.urls)),
 ]
@@ -1,18 +1,40 @@
-from rest_framework import viewsets, status, permissions, serializers, pagination
+from rest_framework import (
+    generics,
+    viewsets,
+    status,
+    permissions,
+    serializers,
+    pagination,
+)
 from rest_framework.decorators import action
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.exceptions import NotFound, ValidationError
-from django.db import transaction
+from django.core.cache import cache
+from django.db.models import Q
+from drf_spectacular.utils import extend_schema
 from django.db.utils import IntegrityError
 import logging
-from .models import DoctorProfile, Availability, Teleconsultation
+from core.projection import ProjectionListMixin
+from .models import DoctorProfile, Availability, OverlapError, Teleconsultation
 from .serializers import (
     DoctorProfileSerializer,
     DoctorRegistrationSerializer,
+    ProvisionSerializer,
+    ProvisionResultSerializer,
     AvailabilitySerializer,
+    AvailabilityBulkSerializer,
+    AvailabilityBulkResultSerializer,
+    AvailabilitySearchSerializer,
+    DoctorCardSerializer,
+    DoctorDirectoryFilterSerializer,
+    DoctorSlotsSerializer,
     TeleconsultationSerializer,
+    TeleconsultationStatusSerializer,
 )
+from . import directory
+from .provisioning import provision_users
+from .scheduling import bulk_create_availability, find_free_slots
 from .permissions import IsDoctorOrReadOnly, IsPatientOwner, IsDoctorProfileOwner
 
 logger = logging.getLogger(__name__)
@@ -24,6 +46,29 @@ class DoctorsPagination(pagination.PageNumberPagination):
     max_page_size = 100
 
 
+def get_current_doctor(request):
+    """
+    Return the authenticated user's DoctorProfile, or None.
+
+    The lookup runs at most once per request; the result is memoized on the
+    request and shares the already loaded ``request.user``.
+    """
+    try:
+        return request._current_doctor
+    except AttributeError:
+        pass
+
+    doctor_profile = None
+    user = request.user
+    # Patients never have a profile, skip the query for them
+    if user.is_authenticated and user.role != "patient":
+        doctor_profile = DoctorProfile.objects.filter(user=user).first()
+        if doctor_profile is not None:
+            doctor_profile.user = user
+    request._current_doctor = doctor_profile
+    return doctor_profile
+
+
 class DoctorRegistrationAPI(APIView):
     permission_classes = [permissions.AllowAny]
 
@@ -31,10 +76,12 @@ class DoctorRegistrationAPI(APIView):
         try:
             serializer = DoctorRegistrationSerializer(data=request.data)
             if serializer.is_valid():
-                with transaction.atomic():
-                    serializer.save()
+                serializer.save()
                 return Response(serializer.data, status=status.HTTP_201_CREATED)
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        except ValidationError as e:
+            # Duplicate email, phone or license number
+            return Response(e.detail, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             logger.error(f"Doctor registration failed: {str(e)}", exc_info=True)
             return Response(
@@ -43,39 +90,63 @@ class DoctorRegistrationAPI(APIView):
             )
 
 
-class DoctorProfileViewSet(viewsets.ModelViewSet):
+class ProvisionUsersAPI(APIView):
+    """
+    Create many doctor and patient accounts at once, for onboarding partner
+    hospitals. Every row gets its own result; invalid or duplicate rows are
+    reported and skipped while the others are created. Imports larger than
+    ``ProvisionSerializer.MAX_ROWS`` go through ``manage.py provision_users``.
+    """
+
+    permission_classes = [permissions.IsAdminUser]
+
+    @extend_schema(
+        request=ProvisionSerializer,
+        responses=ProvisionResultSerializer(many=True),
+    )
+    def post(self, request):
+        serializer = ProvisionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        results = provision_users(serializer.validated_data["users"])
+
+        created = sum(result["created"] for result in results)
+        return Response(
+            {
+                "created": created,
+                "rejected": len(results) - created,
+                "results": ProvisionResultSerializer(results, many=True).data,
+            },
+            status=status.HTTP_201_CREATED if created else status.HTTP_400_BAD_REQUEST,
+        )
+
+
+class DoctorProfileViewSet(ProjectionListMixin, viewsets.ModelViewSet):
     serializer_class = DoctorProfileSerializer
     permission_classes = [permissions.IsAuthenticated, IsDoctorProfileOwner]
     pagination_class = DoctorsPagination
 
     def get_queryset(self):
+        queryset = DoctorProfile.objects.select_related("user")
         if self.request.user.is_superuser:
-            return DoctorProfile.objects.all()
+            return queryset
 
         # For regular users, show only available doctors
         # For doctors, also include their own profile even if not available
-        queryset = DoctorProfile.objects.filter(available=True)
-
-        # If the user is a doctor, add their profile to the queryset
         if self.request.user.role == "doctor":
-            try:
-                own_profile = DoctorProfile.objects.get(user=self.request.user)
-                # Use distinct() to avoid duplicates if the profile is already available
-                return (
-                    queryset | DoctorProfile.objects.filter(id=own_profile.id)
-                ).distinct()
-            except DoctorProfile.DoesNotExist:
-                pass
+            return queryset.filter(Q(available=True) | Q(user=self.request.user))
 
-        return queryset
+        return queryset.filter(available=True)
 
     def perform_update(self, serializer):
         """
         Additional security check to ensure a doctor can only update their own profile.
         This is a belt-and-suspenders approach in addition to the permission class.
         """
-        instance = self.get_object()
-        if instance.user != self.request.user and not self.request.user.is_superuser:
+        instance = serializer.instance
+        if (
+            instance.user_id != self.request.user.pk
+            and not self.request.user.is_superuser
+        ):
             raise serializers.ValidationError(
                 {"permission": "You can only update your own profile"}
             )
@@ -86,7 +157,10 @@ class DoctorProfileViewSet(viewsets.ModelViewSet):
         Additional security check to ensure a doctor can only delete their own profile.
         This is a belt-and-suspenders approach in addition to the permission class.
         """
-        if instance.user != self.request.user and not self.request.user.is_superuser:
+        if (
+            instance.user_id != self.request.user.pk
+            and not self.request.user.is_superuser
+        ):
             raise serializers.ValidationError(
                 {"permission": "You can only delete your own profile"}
             )
@@ -98,9 +172,8 @@ class DoctorProfileViewSet(viewsets.ModelViewSet):
         GET: Return the authenticated doctor's profile
         PATCH: Partially update the authenticated doctor's profile
         """
-        try:
-            doctor_profile = DoctorProfile.objects.get(user=request.user)
-        except DoctorProfile.DoesNotExist:
+        doctor_profile = get_current_doctor(request)
+        if doctor_profile is None:
             raise NotFound("Doctor profile not found for the authenticated user.")
 
         if request.method == "GET":
@@ -127,57 +200,33 @@ class AvailabilityViewSet(viewsets.ModelViewSet):
             return Availability.objects.all().order_by("day", "start_time")
 
         # For doctors, return their own availabilities
-        try:
-            doctor_profile = DoctorProfile.objects.get(user=self.request.user)
-            return Availability.objects.filter(doctor=doctor_profile).order_by(
-                "day", "start_time"
-            )
-        except DoctorProfile.DoesNotExist:
+        doctor_profile = get_current_doctor(self.request)
+        if doctor_profile is None:
             # If the user is not a doctor, return an empty queryset
             return Availability.objects.none()
+        return Availability.objects.filter(doctor=doctor_profile).order_by(
+            "day", "start_time"
+        )
 
     def perform_create(self, serializer):
         try:
-            doctor_profile = DoctorProfile.objects.get(user=self.request.user)
-
-            # Use transaction to prevent race conditions
-            with transaction.atomic():
-                # Check for overlapping availabilities within the transaction
-                day = serializer.validated_data.get("day")
-                start_time = serializer.validated_data.get("start_time")
-                end_time = serializer.validated_data.get("end_time")
-
-                # Check for overlaps
-                from django.db import models
-
-                overlapping = Availability.objects.filter(
-                    doctor=doctor_profile,
-                    day=day,
-                ).filter(
-                    # Either the new start time is within an existing slot
-                    # or the new end time is within an existing slot
-                    # or the new slot completely contains an existing slot
-                    (
-                        models.Q(start_time__lte=start_time, end_time__gt=start_time)
-                        | models.Q(start_time__lt=end_time, end_time__gte=end_time)
-                        | models.Q(start_time__gte=start_time, end_time__lte=end_time)
-                    )
-                )
+            doctor_profile = get_current_doctor(self.request)
+            if doctor_profile is None:
+                raise DoctorProfile.DoesNotExist
 
-                if overlapping.exists():
-                    raise serializers.ValidationError(
-                        {
-                            "time_range": "This availability overlaps with an existing one"
-                        }
-                    )
-
-                # Save the availability
-                serializer.save(doctor=doctor_profile)
+            # Overlaps are rejected by the model inside the insert transaction
+            serializer.save(doctor=doctor_profile)
 
+        except OverlapError:
+            raise serializers.ValidationError(
+                {"time_range": "This availability overlaps with an existing one"}
+            )
         except DoctorProfile.DoesNotExist:
             raise serializers.ValidationError(
                 {"doctor": "You must be a doctor to create availability slots"}
             )
+        except serializers.ValidationError:
+            raise
         except Exception as e:
             logger.error(f"Error creating availability: {str(e)}", exc_info=True)
             raise serializers.ValidationError(
@@ -186,26 +235,131 @@ class AvailabilityViewSet(viewsets.ModelViewSet):
 
     def perform_update(self, serializer):
         # Ensure users can only update their own availability slots
-        instance = self.get_object()
+        instance = serializer.instance
         if (
-            instance.doctor.user != self.request.user
+            instance.doctor_id != getattr(get_current_doctor(self.request), "pk", None)
             and not self.request.user.is_superuser
         ):
             raise serializers.ValidationError(
                 {"permission": "You can only update your own availability slots"}
             )
-        serializer.save()
+        try:
+            serializer.save()
+        except OverlapError:
+            raise serializers.ValidationError(
+                {"overlap": "This slot overlaps with existing availability"}
+            )
+
+    @extend_schema(
+        request=AvailabilityBulkSerializer,
+        responses=AvailabilityBulkResultSerializer(many=True),
+    )
+    @action(detail=False, methods=["post"], url_path="bulk")
+    def bulk(self, request):
+        """
+        Create many availability slots at once from explicit slots and/or
+        weekly templates. Every slot gets its own result; overlapping or past
+        slots are reported and skipped while the others are created.
+        """
+        doctor_profile = get_current_doctor(request)
+        if doctor_profile is None:
+            raise serializers.ValidationError(
+                {"doctor": "You must be a doctor to create availability slots"}
+            )
+
+        serializer = AvailabilityBulkSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            results = bulk_create_availability(
+                doctor_profile, serializer.validated_data["slots"]
+            )
+        except OverlapError:
+            return Response(
+                {"error": "Availability changed while saving. Please try again."},
+                status=status.HTTP_409_CONFLICT,
+            )
+
+        created = sum(result["created"] for result in results)
+        return Response(
+            {
+                "created": created,
+                "rejected": len(results) - created,
+                "results": AvailabilityBulkResultSerializer(results, many=True).data,
+            },
+            status=status.HTTP_201_CREATED if created else status.HTTP_400_BAD_REQUEST,
+        )
 
     def get_serializer_context(self):
         context = super().get_serializer_context()
-        try:
-            context["doctor"] = DoctorProfile.objects.get(user=self.request.user)
-        except DoctorProfile.DoesNotExist:
-            # Don't add doctor to context if the user doesn't have a doctor profile
-            pass
+        doctor_profile = get_current_doctor(self.request)
+        # Don't add doctor to context if the user doesn't have a doctor profile
+        if doctor_profile is not None:
+            context["doctor"] = doctor_profile
         return context
 
 
+class AvailabilitySearchAPI(generics.GenericAPIView):
+    """
+    Bookable slots across all available doctors.
+
+    Booked teleconsultations are subtracted from each doctor's availability
+    windows and the remainder is split into `duration`-minute slots.
+    """
+
+    serializer_class = DoctorSlotsSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = DoctorsPagination
+
+    @extend_schema(parameters=[AvailabilitySearchSerializer])
+    def get(self, request):
+        params = AvailabilitySearchSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        results = find_free_slots(**params.validated_data)
+
+        page = self.paginate_queryset(results)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        return Response(self.get_serializer(results, many=True).data)
+
+
+class DoctorDirectoryAPI(generics.GenericAPIView):
+    """
+    Public doctor directory returning compact cards.
+
+    Every filter combination and page is cached until a doctor profile
+    changes, see doctors/directory.py.
+    """
+
+    serializer_class = DoctorCardSerializer
+    permission_classes = [permissions.AllowAny]
+    pagination_class = DoctorsPagination
+
+    @extend_schema(parameters=[DoctorDirectoryFilterSerializer])
+    def get(self, request):
+        params = DoctorDirectoryFilterSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+
+        key = directory.cache_key(
+            directory.get_generation(),
+            {
+                **params.validated_data,
+                "page": request.query_params.get("page"),
+                "page_size": request.query_params.get("page_size"),
+                "host": request.get_host(),
+            },
+        )
+        data = cache.get(key)
+        if data is None:
+            rows = directory.directory_queryset(**params.validated_data)
+            page = self.paginate_queryset(rows)
+            data = self.get_paginated_response(
+                self.get_serializer(page, many=True).data
+            ).data
+            cache.set(key, data, directory.cache_timeout())
+        return Response(data)
+
+
 class TeleconsultationViewSet(viewsets.ModelViewSet):
     serializer_class = TeleconsultationSerializer
     permission_classes = [permissions.IsAuthenticated, IsPatientOwner]
@@ -214,20 +368,16 @@ class TeleconsultationViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         user = self.request.user
 
-        # Use select_related to optimize queries
+        # The serializer nests the patient and the doctor with its user
+        queryset = Teleconsultation.objects.select_related("patient", "doctor__user")
         if user.role == "doctor":
-            try:
-                doctor_profile = DoctorProfile.objects.get(user=user)
-                return Teleconsultation.objects.filter(
-                    doctor=doctor_profile
-                ).select_related("patient", "doctor__user")
-            except DoctorProfile.DoesNotExist:
+            doctor_profile = get_current_doctor(self.request)
+            if doctor_profile is None:
                 return Teleconsultation.objects.none()
+            return queryset.filter(doctor=doctor_profile)
         else:
             # For patients or other roles
-            return Teleconsultation.objects.filter(patient=user).select_related(
-                "doctor", "doctor__user"
-            )
+            return queryset.filter(patient=user)
 
     def create(self, request, *args, **kwargs):
         """
@@ -248,6 +398,13 @@ class TeleconsultationViewSet(viewsets.ModelViewSet):
                 )
             # Re-raise other validation errors
             raise
+        except OverlapError:
+            return Response(
+                {
+                    "error": "The doctor already has a consultation scheduled at this time."
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
         except IntegrityError as e:
             # Handle database-level integrity errors (like unique constraint violations)
             if (
@@ -295,6 +452,13 @@ class TeleconsultationViewSet(viewsets.ModelViewSet):
                 {"error": str(e)},
                 status=status.HTTP_400_BAD_REQUEST,
             )
+        except OverlapError:
+            return Response(
+                {
+                    "error": "The doctor already has a consultation scheduled at this time."
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
         except IntegrityError as e:
             # Handle database-level integrity errors
             logger.error(
@@ -313,3 +477,34 @@ class TeleconsultationViewSet(viewsets.ModelViewSet):
 
     def perform_create(self, serializer):
         serializer.save(patient=self.request.user)
+
+    @extend_schema(request=TeleconsultationStatusSerializer)
+    @action(detail=True, methods=["post"], url_path="status")
+    def set_status(self, request, pk=None):
+        """
+        Complete or cancel a scheduled consultation.
+
+        Runs a single conditional UPDATE, so concurrent requests cannot both
+        win and repeating a request that already succeeded is harmless.
+        """
+        serializer = TeleconsultationStatusSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        new_status = serializer.validated_data["status"]
+
+        try:
+            pk = int(pk)
+        except ValueError:
+            raise NotFound("Teleconsultation not found.")
+
+        # get_queryset() limits the update to the caller's own consultations
+        changed, current = Teleconsultation.transition(
+            pk, new_status, queryset=self.get_queryset()
+        )
+        if current is None:
+            raise NotFound("Teleconsultation not found.")
+        if current != new_status:
+            return Response(
+                {"error": f"Teleconsultation is already {current}."},
+                status=status.HTTP_409_CONFLICT,
+            )
+        return Response({"id": pk, "status": current, "changed": changed})
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Article, Video
+from .models import Article, Tag, Video
 
 
 class ArticleAdmin(admin.ModelAdmin):
@@ -16,5 +16,12 @@ class VideoAdmin(admin.ModelAdmin):
     ordering = ("-published_date",)
 
 
+class TagAdmin(admin.ModelAdmin):
+    list_display = ("name", "article_count")
+    search_fields = ("name",)
+    readonly_fields = ("name", "article_count")
+
+
 admin.site.register(Article, ArticleAdmin)
 admin.site.register(Video, VideoAdmin)
+admin.site.register(Tag, TagAdmin)
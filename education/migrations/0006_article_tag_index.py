@@ -0,0 +1,58 @@
+# Generated by Django 5.2 on 2026-10-19 06:22
+
+from django.db import migrations, models
+
+
+def backfill_tag_index(apps, schema_editor):
+    Article = apps.get_model('education', 'Article')
+    Tag = apps.get_model('education', 'Tag')
+
+    names_by_article = {}
+    for article in Article.objects.only('id', 'tags'):
+        names_by_article[article.id] = {
+            tag.strip() for tag in (article.tags or []) if isinstance(tag, str) and tag.strip()
+        }
+
+    all_names = set().union(*names_by_article.values())
+    Tag.objects.bulk_create([Tag(name=name) for name in all_names], ignore_conflicts=True)
+    tag_ids = dict(Tag.objects.values_list('name', 'id'))
+
+    Through = Article.tag_index.through
+    Through.objects.bulk_create(
+        [
+            Through(article_id=article_id, tag_id=tag_ids[name])
+            for article_id, names in names_by_article.items()
+            for name in names
+        ],
+        ignore_conflicts=True,
+    )
+    for tag in Tag.objects.all():
+        tag.article_count = Through.objects.filter(tag_id=tag.id).count()
+        tag.save(update_fields=['article_count'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('education', '0005_auto_20250503_1200'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=500, unique=True)),
+                ('article_count', models.PositiveIntegerField(db_index=True, default=0)),
+            ],
+            options={
+                'ordering': ['-article_count', 'name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='tag_index',
+            field=models.ManyToManyField(blank=True, editable=False, help_text='Normalized copy of tags, kept in sync on save', related_name='articles', to='education.tag'),
+        ),
+        migrations.RunPython(backfill_tag_index, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,6 @@
 from django.db import models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
 from symptoms.models import Condition, Symptom
 from .validators import (
     validate_string_list,
@@ -17,6 +19,42 @@ class PublishableModel(models.Model):
         abstract = True
 
 
+class Tag(models.Model):
+    """
+    Normalized article tag.
+
+    Mirrors the strings stored in ``Article.tags`` so tag filters can use the
+    unique index on ``name`` and the through-table index instead of scanning
+    the JSON column. ``article_count`` is precomputed whenever an article's
+    tags change.
+    """
+
+    name = models.CharField(max_length=500, unique=True)
+    article_count = models.PositiveIntegerField(default=0, db_index=True)
+
+    class Meta:
+        ordering = ["-article_count", "name"]
+
+    def __str__(self):
+        return self.name
+
+    @classmethod
+    def refresh_counts(cls, names):
+        """Recompute ``article_count`` for the given tag names in one UPDATE"""
+        if not names:
+            return
+        through = Article.tag_index.through
+        counts = (
+            through.objects.filter(tag=OuterRef("pk"))
+            .values("tag")
+            .annotate(total=Count("pk"))
+            .values("total")
+        )
+        cls.objects.filter(name__in=names).update(
+            article_count=Coalesce(Subquery(counts), Value(0))
+        )
+
+
 class Article(PublishableModel):
     title = models.CharField(max_length=200)
     summary = models.CharField(
@@ -39,10 +77,38 @@ class Article(PublishableModel):
         help_text="URL to cover image (16:9 aspect ratio recommended)",
         validators=[validate_image_url],
     )
+    tag_index = models.ManyToManyField(
+        Tag,
+        blank=True,
+        editable=False,
+        related_name="articles",
+        help_text="Normalized copy of tags, kept in sync on save",
+    )
 
     def __str__(self):
         return self.title
 
+    def tag_names(self):
+        """Return the distinct, non-blank tag strings of this article"""
+        return {
+            tag.strip()
+            for tag in (self.tags or [])
+            if isinstance(tag, str) and tag.strip()
+        }
+
+    def sync_tag_index(self):
+        """Bring ``tag_index`` and the affected tag counts in line with ``tags``"""
+        names = self.tag_names()
+        current = set(self.tag_index.values_list("name", flat=True))
+        if names == current:
+            return
+
+        Tag.objects.bulk_create(
+            [Tag(name=name) for name in names - current], ignore_conflicts=True
+        )
+        self.tag_index.set(Tag.objects.filter(name__in=names))
+        Tag.refresh_counts(names ^ current)
+
 
 class Video(PublishableModel):
     title = models.CharField(max_length=200)
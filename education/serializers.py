@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Article, Video
+from .models import Article, Tag, Video
 from symptoms.serializers import ConditionSerializer, SymptomSerializer
 from symptoms.models import Condition, Symptom
 
@@ -56,3 +56,10 @@ class VideoSerializer(serializers.ModelSerializer):
             "updated_at",
         ]
         read_only_fields = ["published_date", "updated_at"]
+
+
+class TagSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Tag
+        fields = ["name", "article_count"]
+        read_only_fields = fields
@@ -0,0 +1,15 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .models import Article, Tag
+
+
+@receiver(post_save, sender=Article)
+def sync_article_tags(sender, instance, **kwargs):
+    # Also runs for raw fixture loads so loaddata keeps the tag index populated
+    instance.sync_tag_index()
+
+
+@receiver(post_delete, sender=Article)
+def refresh_deleted_article_tags(sender, instance, **kwargs):
+    # Through rows are already gone by now, so the counts can simply be recomputed
+    Tag.refresh_counts(instance.tag_names())
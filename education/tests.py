@@ -1,3 +1,44 @@
-from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from rest_framework import status
+from .models import Article, Tag
 
-# Create your tests here.
+
+class ArticleTagTests(APITestCase):
+    def setUp(self):
+        self.first = Article.objects.create(
+            title="Migraines", content="...", tags=["headache", "pain"]
+        )
+        self.second = Article.objects.create(
+            title="Back pain", content="...", tags=["pain", "posture"]
+        )
+
+    def _titles(self, params):
+        response = self.client.get(reverse("article-list"), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return sorted(item["title"] for item in response.data["results"])
+
+    def test_tag_counts_follow_saves_and_deletes(self):
+        self.assertEqual(Tag.objects.get(name="pain").article_count, 2)
+
+        self.second.tags = ["posture"]
+        self.second.save()
+        self.assertEqual(Tag.objects.get(name="pain").article_count, 1)
+
+        self.first.delete()
+        self.assertEqual(Tag.objects.get(name="pain").article_count, 0)
+
+    def test_tag_filters(self):
+        self.assertEqual(self._titles({"tag": "headache"}), ["Migraines"])
+        self.assertEqual(self._titles({"tags": "pain,posture"}), ["Back pain"])
+        self.assertEqual(
+            self._titles({"tags": "headache,posture", "tag_mode": "any"}),
+            ["Back pain", "Migraines"],
+        )
+
+    def test_tag_list(self):
+        response = self.client.get(reverse("tag-list"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data["results"][0], {"name": "pain", "article_count": 2}
+        )
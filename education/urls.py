@@ -1,10 +1,11 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import ArticleViewSet, VideoViewSet
+from .views import ArticleViewSet, TagViewSet, VideoViewSet
 
 router = DefaultRouter()
 router.register(r"articles", ArticleViewSet, basename="article")
 router.register(r"videos", VideoViewSet, basename="video")
+router.register(r"tags", TagViewSet, basename="tag")
 
 urlpatterns = [
     path("", include(router.urls)),
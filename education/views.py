@@ -1,11 +1,12 @@
-from rest_framework import viewsets, filters, pagination, permissions, status
+from rest_framework import mixins, viewsets, filters, pagination, permissions, status
 from rest_framework.response import Response
-from drf_spectacular.utils import extend_schema_view, extend_schema
+from drf_spectacular.utils import extend_schema_view, extend_schema, OpenApiParameter
 from django_filters.rest_framework import DjangoFilterBackend
 from django.utils.translation import gettext_lazy as _
 from django.db.utils import IntegrityError
-from .models import Article, Video
-from .serializers import ArticleSerializer, VideoSerializer
+from core.projection import ProjectionListMixin
+from .models import Article, Tag, Video
+from .serializers import ArticleSerializer, TagSerializer, VideoSerializer
 import logging
 
 logger = logging.getLogger(__name__)
@@ -27,10 +28,28 @@ class EducationAdminPermission(permissions.BasePermission):
 
 
 @extend_schema_view(
-    list=extend_schema(description="List educational articles"),
+    list=extend_schema(
+        description="List educational articles",
+        parameters=[
+            OpenApiParameter(
+                name="tag", type=str, description="Filter by a single tag"
+            ),
+            OpenApiParameter(
+                name="tags",
+                type=str,
+                description="Comma-separated tags to filter by",
+            ),
+            OpenApiParameter(
+                name="tag_mode",
+                type=str,
+                enum=["all", "any"],
+                description="Match all of `tags` (default) or any of them",
+            ),
+        ],
+    ),
     retrieve=extend_schema(description="Get article details"),
 )
-class ArticleViewSet(viewsets.ModelViewSet):
+class ArticleViewSet(ProjectionListMixin, viewsets.ModelViewSet):
     serializer_class = ArticleSerializer
     permission_classes = [
         EducationAdminPermission,
@@ -46,16 +65,26 @@ class ArticleViewSet(viewsets.ModelViewSet):
     ordering_fields = ["published_date", "updated_at"]
     pagination_class = EducationPagination
 
-    # Custom filter for tags (JSONField)
+    # Tag filters go through the normalized tag index rather than the JSONField
     def get_queryset(self):
         queryset = Article.objects.prefetch_related("related_conditions").all()
 
-        # Filter by tag if provided
-        tag = self.request.query_params.get("tag", None)
+        params = self.request.query_params
+        names = [name.strip() for name in params.get("tags", "").split(",")]
+        tag = params.get("tag", None)
         if tag:
-            # Filter articles that have the specified tag in their tags list
-            queryset = queryset.filter(tags__contains=[tag])
+            names.append(tag.strip())
+        names = list(dict.fromkeys(name for name in names if name))
 
+        if not names:
+            return queryset
+
+        if params.get("tag_mode", "all").lower() == "any":
+            return queryset.filter(tag_index__name__in=names).distinct()
+
+        # One indexed join per tag keeps AND filtering off the JSON column
+        for name in names:
+            queryset = queryset.filter(tag_index__name=name)
         return queryset
 
     def create(self, request, *args, **kwargs):
@@ -108,11 +137,28 @@ class ArticleViewSet(viewsets.ModelViewSet):
     # Removed duplicate get_queryset method
 
 
+@extend_schema_view(
+    list=extend_schema(description="List article tags with precomputed counts"),
+)
+class TagViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
+    serializer_class = TagSerializer
+    permission_classes = [
+        EducationAdminPermission,
+    ]
+    filter_backends = [filters.SearchFilter]
+    search_fields = ["^name"]
+    search_param = "q"
+    pagination_class = EducationPagination
+
+    def get_queryset(self):
+        return Tag.objects.filter(article_count__gt=0)
+
+
 @extend_schema_view(
     list=extend_schema(description="List educational videos"),
     retrieve=extend_schema(description="Get video details"),
 )
-class VideoViewSet(viewsets.ModelViewSet):
+class VideoViewSet(ProjectionListMixin, viewsets.ModelViewSet):
     serializer_class = VideoSerializer
     permission_classes = [
         EducationAdminPermission,
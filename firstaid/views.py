@@ -2,7 +2,7 @@
 from rest_framework.generics import ListAPIView, RetrieveAPIView
 from rest_framework import filters, permissions, status, pagination
 from rest_framework.response import Response
-from rest_framework.throttling import ScopedRateThrottle
+from core.throttling import SlidingWindowRateThrottle
 from django.db.models import Q
 from django.utils.translation import gettext_lazy as _
 from drf_spectacular.utils import (
@@ -26,7 +26,7 @@ class FirstAidPagination(pagination.PageNumberPagination):
 
 class FirstAidBaseAPIView:
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
-    throttle_classes = [ScopedRateThrottle]
+    throttle_classes = [SlidingWindowRateThrottle]
     throttle_scope = "firstaid"
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_param = "q"
@@ -15,6 +15,7 @@ from pathlib import Path
 from datetime import timedelta
 from dotenv import load_dotenv
 from urllib.parse import urlparse, parse_qsl
+from importlib.util import find_spec
 import re
 
 
@@ -71,6 +72,7 @@ INSTALLED_APPS = [
     "doctors",
     "skin_diagnosis",
     "chatbot",
+    "clinics",
     # installed dependencies
     "rest_framework",
     "rest_framework_simplejwt",
@@ -85,14 +87,28 @@ INSTALLED_APPS = [
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        # Trusts role/staff claims in access tokens, see accounts/tokens.py
+        "accounts.authentication.ClaimsJWTAuthentication",
     ],
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
+    # orjson-backed JSON with a stdlib fallback, see core/renderers.py
+    "DEFAULT_RENDERER_CLASSES": [
+        "core.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "core.parsers.FastJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ],
+    # Shared sliding window counters, see core/throttling.py
     "DEFAULT_THROTTLE_CLASSES": [
-        "rest_framework.throttling.ScopedRateThrottle",
+        "core.throttling.SlidingWindowRateThrottle",
     ],
     "DEFAULT_THROTTLE_RATES": {
         "symptom_checks": "10/hour",
+        # Charged per distinct symptom set of a batch
+        "symptom_check_batches": "60/hour",
         "firstaid": "60/minute",
         "skin_diagnosis": "5/hour",
         "chatbot": "10/minute",
@@ -120,13 +136,37 @@ SIMPLE_JWT = {
     "REFRESH_TOKEN_LIFETIME": timedelta(days=7),
     "ROTATE_REFRESH_TOKENS": True,
     "BLACKLIST_AFTER_ROTATION": True,
-    "UPDATE_LAST_LOGIN": True,
+    # Login batches last_login writes itself, see accounts/last_login.py
+    "UPDATE_LAST_LOGIN": False,
     "ALGORITHM": "HS256",
     "SIGNING_KEY": SECRET_KEY,
+    # Refuses revoked refresh tokens, see accounts/tokens.py
+    "TOKEN_REFRESH_SERIALIZER": "accounts.serializers.ClaimsTokenRefreshSerializer",
 }
 
+# Where logged out and rotated refresh tokens are remembered, see
+# accounts/revocation.py. The cache store needs a shared cache (REDIS_URL).
+TOKEN_REVOCATION_STORE = os.getenv(
+    "TOKEN_REVOCATION_STORE",
+    (
+        "accounts.revocation.CacheRevocationStore"
+        if os.getenv("REDIS_URL")
+        else "accounts.revocation.DatabaseRevocationStore"
+    ),
+)
+
+# Build request.user from access token claims instead of a query; the
+# user row is still loaded lazily when other fields are read. Revocations are
+# then checked in the cache, so only the default with a shared cache
+# (REDIS_URL), see accounts/tokens.py
+JWT_CLAIMS_USER = (
+    os.getenv("JWT_CLAIMS_USER", "true" if os.getenv("REDIS_URL") else "false").lower()
+    == "true"
+)
+
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "core.middleware.APICompressionMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -135,13 +175,77 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "core.middleware.RateLimitHeadersMiddleware",
 ]
 
+# gzip/brotli for API responses use core.middleware.DEFAULT_API_COMPRESSION;
+# an API_COMPRESSION dict here overrides individual keys of it.
+
+# Shared cache when REDIS_URL is set, per-process memory otherwise
+if os.getenv("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.getenv("REDIS_URL"),
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
+# Where throttle counters are kept, see core/throttling.py. The cache store
+# needs a shared cache, the database store works with any deployment.
+THROTTLE_COUNTER_STORE = os.getenv(
+    "THROTTLE_COUNTER_STORE",
+    (
+        "core.throttling.CacheCounterStore"
+        if os.getenv("REDIS_URL")
+        else "core.throttling.DatabaseCounterStore"
+    ),
+)
+
+# Provider limits shared by every AI call, see core/ai_budget.py. The
+# defaults are Gemini's free tier; None leaves a limit unenforced.
+AI_BUDGET = {
+    "REQUESTS_PER_MINUTE": int(os.getenv("AI_REQUESTS_PER_MINUTE", 15)),
+    "TOKENS_PER_MINUTE": int(os.getenv("AI_TOKENS_PER_MINUTE", 1_000_000)),
+    # Share of the limits each kind of call may fill and the seconds it may
+    # queue for room (at most ai_budget.MAX_WAIT). Lower shares are shed
+    # first as the minute fills up.
+    "PRIORITIES": {
+        "skin_diagnosis": {"share": 1.0, "max_wait": 5},
+        "symptom_check": {"share": 0.8, "max_wait": 3},
+        "chat": {"share": 0.6, "max_wait": 0},
+    },
+}
+
+# Concurrent AI calls of one symptom check batch, see symptoms/batch.py
+SYMPTOM_BATCH_AI_WORKERS = 4
+
+# Seconds a doctor directory page stays cached, see doctors/directory.py
+DOCTOR_DIRECTORY_CACHE_TIMEOUT = 300
+
+# "auto", "postgis", "geohash" or "kdtree", see clinics/search.py
+CLINIC_SPATIAL_BACKEND = os.getenv("CLINIC_SPATIAL_BACKEND", "auto")
+
+# Time zone clinic opening hours are written in, see clinics/hours.py
+CLINIC_TIME_ZONE = os.getenv("CLINIC_TIME_ZONE", "Africa/Addis_Ababa")
+
 ROOT_URLCONF = "medihelp.urls"
 
 # CORS settings - allow all origins for now
 CORS_ALLOW_ALL_ORIGINS = True
 CORS_ALLOW_CREDENTIALS = True
+# Lets browser clients read their remaining quota
+CORS_EXPOSE_HEADERS = [
+    "Retry-After",
+    "X-RateLimit-Limit",
+    "X-RateLimit-Remaining",
+    "X-RateLimit-Reset",
+]
 
 TEMPLATES = [
     {
@@ -268,6 +372,45 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Password hashing, see accounts/hashers.py. "argon2" needs argon2-cffi and
+# falls back to "pbkdf2" without it.
+PASSWORD_HASHER_PROFILE = os.getenv("PASSWORD_HASHER_PROFILE", "argon2")
+if PASSWORD_HASHER_PROFILE == "argon2" and find_spec("argon2") is None:
+    PASSWORD_HASHER_PROFILE = "pbkdf2"
+PASSWORD_ARGON2_PARAMS = {
+    "time_cost": int(os.getenv("PASSWORD_ARGON2_TIME_COST", 2)),
+    # KiB; 19 MiB is the OWASP baseline, Django's default is 100 MiB
+    "memory_cost": int(os.getenv("PASSWORD_ARGON2_MEMORY_COST", 19456)),
+    "parallelism": int(os.getenv("PASSWORD_ARGON2_PARALLELISM", 1)),
+}
+PASSWORD_PBKDF2_ITERATIONS = int(os.getenv("PASSWORD_PBKDF2_ITERATIONS", 1_000_000))
+PASSWORD_HASHERS = {
+    "argon2": [
+        "accounts.hashers.TunedArgon2PasswordHasher",
+        "accounts.hashers.TunedPBKDF2PasswordHasher",
+    ],
+    "pbkdf2": [
+        "accounts.hashers.TunedPBKDF2PasswordHasher",
+        "accounts.hashers.TunedArgon2PasswordHasher",
+    ],
+}[PASSWORD_HASHER_PROFILE] + [
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+    "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
+    "django.contrib.auth.hashers.ScryptPasswordHasher",
+]
+
+# last_login is written in batches, see accounts/last_login.py
+LAST_LOGIN_BATCH_SIZE = 500
+LAST_LOGIN_FLUSH_INTERVAL = 30
+
+# Bulk account provisioning, see doctors/provisioning.py. The hash workers
+# are processes started by the provision_users command, never by the API.
+PROVISIONING_HASH_WORKERS = int(
+    os.getenv("PROVISIONING_HASH_WORKERS", os.cpu_count() or 1)
+)
+PROVISIONING_CHUNK_SIZE = 200
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
 
@@ -14,3 +14,9 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'medihelp.settings')
 
 application = get_wsgi_application()
+
+# Each worker builds its in-memory clinic index before serving, see
+# clinics/index.py
+from clinics.index import warm_up  # noqa: E402
+
+warm_up()
@@ -5,6 +5,7 @@ from django.conf import settings
 from google.generativeai import configure, GenerativeModel
 from google.api_core.exceptions import GoogleAPIError, RetryError, ServiceUnavailable
 import mimetypes  # Import mimetypes to guess the file type
+from core.ai_budget import BudgetExceeded, estimate_tokens, reserve
 
 logger = logging.getLogger(__name__)
 
@@ -110,7 +111,13 @@ def analyze_skin_image(image_path: str) -> dict:
         for attempt in range(1, MAX_RETRIES + 1):
             try:
                 logger.info(f"API call attempt {attempt}/{MAX_RETRIES}")
+                reservation = reserve(
+                    "skin_diagnosis",
+                    estimate_tokens(prompt, 500, images=1),
+                    wait=attempt == 1,
+                )
                 response = model.generate_content([prompt, image_part])
+                reservation.settle(response)
                 break  # Success, exit the retry loop
             except (RetryError, ServiceUnavailable) as e:
                 if attempt < MAX_RETRIES:
@@ -199,6 +206,9 @@ def analyze_skin_image(image_path: str) -> dict:
                 "urgency": "medium",
             }
 
+    except BudgetExceeded as e:
+        logger.warning(str(e))
+        return {"error": "AI service is busy, please try again shortly"}
     except GoogleAPIError as e:
         logger.error(f"Gemini API error: {str(e)}")
         return {"error": "AI service unavailable"}
@@ -9,6 +9,11 @@ class SkinDiagnosisViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
     http_method_names = ["get", "post", "head"]
 
+    @property
+    def throttle_scope(self):
+        # Only new diagnoses call the model, listing past ones is free
+        return "skin_diagnosis" if self.action == "create" else None
+
     def get_queryset(self):
         return SkinDiagnosis.objects.filter(user=self.request.user)
 
@@ -4,6 +4,8 @@ import logging
 import google.generativeai as genai
 from django.utils.translation import gettext_lazy as _
 from time import sleep
+from core.ai_budget import BudgetExceeded, estimate_tokens, reserve
+from core.single_flight import prompt_key, single_flight
 
 logger = logging.getLogger(__name__)
 MAX_RETRIES = 3
@@ -21,8 +23,22 @@ def generate_diagnosis(symptoms):
     """
     Call Google Gemini to analyze a list of symptoms.
     Returns a dict with 'conditions', 'recommendations', 'urgency' on success,
-    or {'error': ..., 'details': ...} on failure.
+    or {'error': ..., 'details': ...} on failure. A call shed by the AI budget
+    returns {'error': ..., 'retry_after': seconds}.
+
+    Concurrent calls for the same set of symptoms share one Gemini request,
+    see core/single_flight.py.
     """
+    names = sorted({s.name.casefold() for s in symptoms})
+    return single_flight(
+        prompt_key("diagnosis", ", ".join(names)),
+        lambda: _generate_diagnosis(symptoms),
+        # Failures and "busy" answers are not handed to later callers
+        publish=lambda diagnosis: "error" not in diagnosis,
+    )
+
+
+def _generate_diagnosis(symptoms):
     configure_gemini()
     model = genai.GenerativeModel("gemini-2.0-flash")
 
@@ -40,6 +56,9 @@ def generate_diagnosis(symptoms):
     for attempt in range(1, MAX_RETRIES + 1):
         try:
             logger.info(f"Gemini attempt {attempt}: sending prompt")
+            reservation = reserve(
+                "symptom_check", estimate_tokens(prompt, 500), wait=attempt == 1
+            )
             response = model.generate_content(
                 prompt,
                 generation_config=genai.types.GenerationConfig(
@@ -47,6 +66,7 @@ def generate_diagnosis(symptoms):
                     max_output_tokens=500,
                 ),
             )
+            reservation.settle(response)
             raw = response.text.strip()
             logger.debug(f"Raw Gemini response: {raw}")
 
@@ -67,6 +87,13 @@ def generate_diagnosis(symptoms):
                 raise ValueError(f"Missing keys: {missing}")
             return diagnosis
 
+        except BudgetExceeded as e:
+            # Already queued for room, retrying would only queue again
+            logger.warning(str(e))
+            return {
+                "error": str(_("The diagnosis service is busy, try again shortly")),
+                "retry_after": e.retry_after,
+            }
         except json.JSONDecodeError as je:
             logger.warning(f"JSON parse error on attempt {attempt}: {je}")
         except Exception as e:
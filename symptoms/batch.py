@@ -0,0 +1,99 @@
+"""
+Symptom checks in batches, for clinics triaging many patients at once.
+
+Going through ``SymptomCheckViewSet.create`` once per patient costs a
+Gemini call and several writes each, one after the other. A batch instead:
+
+* diagnoses every distinct symptom set once, however many checks list it
+  (in any order);
+* makes those calls concurrently from a pool of
+  ``SYMPTOM_BATCH_AI_WORKERS`` threads, still within the shared AI budget
+  of core/ai_budget.py;
+* stores the checks with ``store_checks`` (symptoms/checks.py) in one
+  transaction, after all AI calls are done.
+
+A set whose diagnosis raises, or that the AI budget shed, is reported and no
+check is created for it; shed sets carry the ``retry_after`` of the budget.
+Other diagnoses that come back as an error are stored like single checks do.
+The batch view is throttled per distinct set and the serializer takes no
+more sets than the budget allows in a minute, see
+``SymptomCheckBatchSerializer.max_sets``.
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections
+
+from .ai import generate_diagnosis
+from .checks import store_checks
+from .serializers import _clean_json
+
+logger = logging.getLogger(__name__)
+
+FAILED_MESSAGE = "Could not process diagnosis. Please try again."
+BUSY_MESSAGE = "The diagnosis service is busy, try again shortly."
+
+
+def _diagnose(symptoms):
+    try:
+        return _clean_json(generate_diagnosis(symptoms), max_depth=10)
+    finally:
+        # The AI budget may have used the database from this thread
+        connections.close_all()
+
+
+def diagnose_sets(symptom_sets):
+    """
+    Diagnose each distinct set once, returns ``{key: diagnosis or None}``
+    keyed on frozensets of symptom ids.
+    """
+    unique = {}
+    for symptoms in symptom_sets:
+        unique.setdefault(frozenset(s.pk for s in symptoms), symptoms)
+
+    workers = min(settings.SYMPTOM_BATCH_AI_WORKERS, len(unique))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {key: pool.submit(_diagnose, sets) for key, sets in unique.items()}
+    diagnoses = {}
+    for key, future in futures.items():
+        try:
+            diagnoses[key] = future.result()
+        except Exception as e:
+            logger.error(f"Batch diagnosis failed: {str(e)}")
+            diagnoses[key] = None
+    return diagnoses
+
+
+def _failure(diagnosis):
+    """``(error, retry_after)`` of a diagnosis no check is stored for"""
+    if diagnosis is None:
+        return FAILED_MESSAGE, None
+    if isinstance(diagnosis, dict) and "retry_after" in diagnosis:
+        return BUSY_MESSAGE, int(diagnosis["retry_after"])
+    return None
+
+
+def create_checks(user, symptom_sets):
+    """
+    Create a check per symptom set, returns one ``(check, error,
+    retry_after)`` triple per set in input order with ``check`` None for
+    failed sets.
+    """
+    keys = [frozenset(s.pk for s in symptoms) for symptoms in symptom_sets]
+    diagnoses = diagnose_sets(symptom_sets)
+
+    results = [None] * len(symptom_sets)
+    pending = []
+    for index, (symptoms, key) in enumerate(zip(symptom_sets, keys)):
+        failure = _failure(diagnoses[key])
+        if failure is None:
+            pending.append((index, (symptoms, diagnoses[key])))
+        else:
+            results[index] = (None, *failure)
+    checks = store_checks(user, [entry for _, entry in pending])
+
+    for (index, _), check in zip(pending, checks):
+        results[index] = (check, None, None)
+    return results
@@ -0,0 +1,57 @@
+"""
+Storing symptom checks once their diagnosis is known.
+
+A check used to be inserted before its Gemini call and then filled in with
+``symptoms.set()``, ``conditions.set()`` and a second ``save()``: each
+``set()`` reads the through table before inserting into it, and the row sat
+half-written for as long as the call took. ``store_checks`` is given the
+diagnoses up front and, after one lookup of the diagnosed conditions, writes
+the checks and both M2M through tables with one ``bulk_create`` each in a
+single transaction. Single checks and batches (symptoms/batch.py) share it.
+"""
+
+from django.db import transaction
+
+from .models import Condition, SymptomCheck
+
+
+def condition_names(diagnosis):
+    """Condition names of a diagnosis, normalized to match ``Condition.name``"""
+    if not isinstance(diagnosis, dict):
+        return set()
+    names = diagnosis.get("conditions")
+    if not isinstance(names, list):
+        return set()
+    return {name.strip().title() for name in names if isinstance(name, str)}
+
+
+def store_checks(user, entries):
+    """
+    Create a check per ``(symptoms, diagnosis)`` pair, returns the checks in
+    input order with their primary keys set.
+    """
+    entries = list(entries)
+    names = set().union(*(condition_names(diagnosis) for _, diagnosis in entries))
+    conditions = dict(
+        Condition.objects.filter(name__in=names).values_list("name", "pk")
+    )
+
+    checks = [
+        SymptomCheck(user=user, ai_diagnosis=diagnosis) for _, diagnosis in entries
+    ]
+    SymptomThrough = SymptomCheck.symptoms.through
+    ConditionThrough = SymptomCheck.conditions.through
+    with transaction.atomic():
+        SymptomCheck.objects.bulk_create(checks)
+        SymptomThrough.objects.bulk_create(
+            SymptomThrough(symptomcheck_id=check.pk, symptom_id=pk)
+            for check, (symptoms, _) in zip(checks, entries)
+            for pk in {symptom.pk for symptom in symptoms}
+        )
+        ConditionThrough.objects.bulk_create(
+            ConditionThrough(symptomcheck_id=check.pk, condition_id=pk)
+            for check in checks
+            for name in condition_names(check.ai_diagnosis)
+            if (pk := conditions.get(name)) is not None
+        )
+    return checks
@@ -1,6 +1,9 @@
+import math
+from django.conf import settings
 from rest_framework import serializers
 from .models import Symptom, Condition, SymptomCheck
 from .ai import generate_diagnosis
+from .checks import store_checks
 import logging
 from django.urls import reverse
 from django.utils.encoding import force_str
@@ -42,6 +45,30 @@ def _clean_json(value, max_depth=10, current_depth=0):
     return force_str(value)
 
 
+def resolve_symptoms(id_lists):
+    """
+    Symptoms of each list of ids, looked up with a single query. A symptom
+    listed twice in a list counts once.
+    """
+    ids = {pk for pks in id_lists for pk in pks}
+    symptoms = Symptom.objects.in_bulk(ids)
+    unknown = sorted(ids - symptoms.keys())
+    if unknown:
+        raise serializers.ValidationError(
+            f"Unknown symptom ids: {', '.join(map(str, unknown))}"
+        )
+    return [[symptoms[pk] for pk in dict.fromkeys(pks)] for pks in id_lists]
+
+
+class SymptomIdsField(serializers.ListField):
+    """Symptom ids, written as a list and resolved by the serializer"""
+
+    child = serializers.IntegerField(min_value=1)
+
+    def to_representation(self, value):
+        return [symptom.pk for symptom in value.all()]
+
+
 class SymptomSerializer(serializers.ModelSerializer):
     class Meta:
         model = Symptom
@@ -69,11 +96,7 @@ class ConditionSerializer(serializers.ModelSerializer):
 
 
 class SymptomCheckSerializer(serializers.ModelSerializer):
-    symptoms = serializers.PrimaryKeyRelatedField(
-        many=True,
-        queryset=Symptom.objects.all(),
-        help_text="List of symptom IDs to analyze",
-    )
+    symptoms = SymptomIdsField(help_text="List of symptom IDs to analyze")
     conditions = ConditionSerializer(many=True, read_only=True)
     user = serializers.PrimaryKeyRelatedField(read_only=True)
     diagnosis = serializers.SerializerMethodField()
@@ -99,7 +122,8 @@ class SymptomCheckSerializer(serializers.ModelSerializer):
         """Ensure at least one symptom is provided"""
         if not value:
             raise serializers.ValidationError("At least one symptom is required")
-        return value
+        (symptoms,) = resolve_symptoms([value])
+        return symptoms
 
     def create(self, validated_data):
         """Create symptom check with AI integration"""
@@ -107,28 +131,10 @@ class SymptomCheckSerializer(serializers.ModelSerializer):
             user = self.context["request"].user
             symptoms = validated_data.pop("symptoms")
 
-            # Create check instance
-            check = SymptomCheck.objects.create(user=user)
-            check.symptoms.set(symptoms)
-
-            # Generate AI diagnosis
+            # Diagnose first so the check is written once, with its results
             raw_data = generate_diagnosis(symptoms)
             diagnosis_data = _clean_json(raw_data, max_depth=10)
-
-            # Store and process results
-            check.ai_diagnosis = diagnosis_data
-
-            # Link conditions if available
-            if isinstance(diagnosis_data, dict):
-                conditions = Condition.objects.filter(
-                    name__in=[
-                        name.strip().title()
-                        for name in diagnosis_data.get("conditions", [])
-                    ]
-                )
-                check.conditions.set(conditions)
-
-            check.save()
+            (check,) = store_checks(user, [(symptoms, diagnosis_data)])
             return check
 
         except Exception as e:
@@ -139,3 +145,41 @@ class SymptomCheckSerializer(serializers.ModelSerializer):
                     "message": "Could not process diagnosis. Please try again.",
                 }
             )
+
+
+class SymptomSetSerializer(serializers.Serializer):
+    symptoms = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), allow_empty=False
+    )
+
+
+class SymptomCheckBatchSerializer(serializers.Serializer):
+    """Many symptom sets, resolved to symptoms with a single query"""
+
+    MAX_CHECKS = 100
+    # Distinct sets, each one AI call. They are diagnosed
+    # SYMPTOM_BATCH_AI_WORKERS at a time and a call may queue for the budget
+    # besides taking a few seconds, so 12 sets (three rounds of four) stay
+    # within the request timeout.
+    MAX_SETS = 12
+
+    checks = SymptomSetSerializer(many=True, allow_empty=False, max_length=MAX_CHECKS)
+
+    @classmethod
+    def max_sets(cls):
+        """``MAX_SETS``, or fewer if the AI budget takes fewer calls a minute"""
+        budget = settings.AI_BUDGET
+        limit = budget["REQUESTS_PER_MINUTE"]
+        if limit is None:
+            return cls.MAX_SETS
+        share = budget["PRIORITIES"]["symptom_check"]["share"]
+        return max(1, min(cls.MAX_SETS, math.floor(limit * share)))
+
+    def validate_checks(self, value):
+        distinct = len({frozenset(check["symptoms"]) for check in value})
+        if distinct > self.max_sets():
+            raise serializers.ValidationError(
+                f"At most {self.max_sets()} different symptom sets per batch, "
+                f"got {distinct}."
+            )
+        return resolve_symptoms([check["symptoms"] for check in value])
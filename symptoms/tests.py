@@ -1,3 +1,215 @@
-from django.test import TestCase
+import threading
+import time
+from unittest.mock import patch
+from django.conf import settings
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from accounts.models import User
+from .models import Condition, Symptom, SymptomCheck
+from .serializers import SymptomCheckBatchSerializer
 
-# Create your tests here.
+
+@override_settings(THROTTLE_COUNTER_STORE="core.throttling.CacheCounterStore")
+class SymptomCheckBatchTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            email="triage@example.com",
+            first_name="Triage",
+            last_name="Nurse",
+            phone="+251911700001",
+            password="testpass123",
+        )
+        self.client.force_authenticate(user=self.user)
+        self.fever, self.cough, self.rash = (
+            Symptom.objects.create(name=name) for name in ("Fever", "Cough", "Rash")
+        )
+        self.flu = Condition.objects.create(name="Influenza", description="...")
+        self.calls = []
+        self.running = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def fake_diagnosis(self, symptoms):
+        with self.lock:
+            self.calls.append(sorted(s.name for s in symptoms))
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+        time.sleep(0.05)
+        with self.lock:
+            self.running -= 1
+        if symptoms[0].name == "Rash":
+            raise RuntimeError("provider down")
+        if symptoms[0].name == "Cough":
+            return {"error": "The diagnosis service is busy", "retry_after": 12}
+        return {
+            "conditions": ["influenza ", "Unknown"],
+            "recommendations": ["Rest"],
+            "urgency": "low",
+        }
+
+    def post(self, checks):
+        with patch("symptoms.batch.generate_diagnosis", self.fake_diagnosis):
+            return self.client.post(
+                reverse("symptom-check-batch"), {"checks": checks}, format="json"
+            )
+
+    def test_identical_sets_are_diagnosed_once(self):
+        checks = [
+            {"symptoms": [self.fever.pk, self.cough.pk]},
+            {"symptoms": [self.cough.pk, self.fever.pk, self.fever.pk]},
+            {"symptoms": [self.fever.pk]},
+            {"symptoms": [self.rash.pk]},
+        ]
+        # Symptoms, conditions, savepoint, three inserts, release, then the
+        # checks with their symptoms and conditions
+        with self.assertNumQueries(10):
+            response = self.post(checks)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual((response.data["created"], response.data["failed"]), (3, 1))
+        self.assertEqual(sorted(self.calls), [["Cough", "Fever"], ["Fever"], ["Rash"]])
+        self.assertGreater(self.peak, 1)
+
+        first, second, third, failed = response.data["results"]
+        self.assertEqual(
+            sorted(first["check"]["symptoms"]), [self.fever.pk, self.cough.pk]
+        )
+        self.assertEqual(
+            sorted(second["check"]["symptoms"]), [self.fever.pk, self.cough.pk]
+        )
+        self.assertEqual(third["check"]["symptoms"], [self.fever.pk])
+        self.assertEqual(
+            [c["name"] for c in first["check"]["conditions"]], ["Influenza"]
+        )
+        self.assertEqual(first["check"]["diagnosis"]["urgency"], "low")
+        self.assertIsNone(failed["check"])
+        self.assertIsNotNone(failed["error"])
+        self.assertEqual(SymptomCheck.objects.filter(user=self.user).count(), 3)
+
+    def test_sets_shed_by_the_budget_are_not_stored(self):
+        checks = [{"symptoms": [self.cough.pk]}, {"symptoms": [self.fever.pk]}]
+        response = self.post(checks)
+
+        self.assertEqual((response.data["created"], response.data["failed"]), (1, 1))
+        shed, created = response.data["results"]
+        self.assertIsNone(shed["check"])
+        self.assertEqual(shed["retry_after"], 12)
+        self.assertIsNone(created["retry_after"])
+        self.assertEqual(
+            list(SymptomCheck.objects.values_list("symptoms", flat=True)),
+            [self.fever.pk],
+        )
+
+    def test_quota_is_charged_per_distinct_set(self):
+        checks = [
+            {"symptoms": [self.fever.pk]},
+            {"symptoms": [self.fever.pk]},
+            {"symptoms": [self.fever.pk, self.cough.pk]},
+        ]
+        response = self.post(checks)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response["X-RateLimit-Limit"], "60")
+        self.assertEqual(response["X-RateLimit-Remaining"], "58")
+
+    def test_batch_with_every_set_shed_asks_to_retry(self):
+        response = self.post([{"symptoms": [self.cough.pk]}])
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(response["Retry-After"], "12")
+        self.assertEqual(response.data["results"][0]["retry_after"], 12)
+        self.assertFalse(SymptomCheck.objects.exists())
+
+    def test_batches_take_no_more_sets_than_the_budget_allows(self):
+        symptoms = Symptom.objects.bulk_create(
+            Symptom(name=f"Symptom {i}") for i in range(13)
+        )
+        checks = [{"symptoms": [symptom.pk]} for symptom in symptoms]
+        self.assertEqual(SymptomCheckBatchSerializer.max_sets(), 12)
+
+        response = self.post(checks)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.calls, [])
+        # Rejected batches are charged no more than a valid one could be
+        self.assertEqual(response["X-RateLimit-Remaining"], "48")
+        with self.settings(AI_BUDGET={**settings.AI_BUDGET, "REQUESTS_PER_MINUTE": 5}):
+            self.assertEqual(SymptomCheckBatchSerializer.max_sets(), 4)
+
+    def test_unknown_symptoms_are_rejected_before_any_call(self):
+        response = self.post([{"symptoms": [self.fever.pk, 999]}])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.calls, [])
+        self.assertFalse(SymptomCheck.objects.exists())
+
+
+@override_settings(THROTTLE_COUNTER_STORE="core.throttling.CacheCounterStore")
+class SymptomCheckCreateTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            email="patient@example.com",
+            first_name="Pat",
+            last_name="Ient",
+            phone="+251911700002",
+            password="testpass123",
+        )
+        self.client.force_authenticate(user=self.user)
+        self.fever = Symptom.objects.create(name="Fever")
+        self.cough = Symptom.objects.create(name="Cough")
+        self.flu = Condition.objects.create(name="Influenza", description="...")
+        self.cold = Condition.objects.create(name="Common Cold", description="...")
+
+    def post(self, symptoms, diagnosis):
+        with patch("symptoms.serializers.generate_diagnosis", diagnosis):
+            return self.client.post(
+                reverse("symptom-check-list"), {"symptoms": symptoms}, format="json"
+            )
+
+    def test_check_is_written_once_with_its_relations(self):
+        def diagnosis(symptoms):
+            return {
+                "conditions": ["influenza", " common cold ", "Unknown"],
+                "recommendations": ["Rest"],
+                "urgency": "low",
+            }
+
+        # One lookup of the listed symptoms, conditions, savepoint, three
+        # inserts, release, then the check's symptoms and conditions
+        with self.assertNumQueries(9):
+            response = self.post(
+                [self.fever.pk, self.cough.pk, self.fever.pk], diagnosis
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        check = SymptomCheck.objects.get(user=self.user)
+        self.assertEqual(check.ai_diagnosis["urgency"], "low")
+        self.assertEqual(
+            set(check.symptoms.values_list("pk", flat=True)),
+            {self.fever.pk, self.cough.pk},
+        )
+        self.assertEqual(
+            set(check.conditions.values_list("pk", flat=True)),
+            {self.flu.pk, self.cold.pk},
+        )
+
+    def test_unknown_symptoms_are_rejected(self):
+        def diagnosis(symptoms):
+            raise AssertionError("not called")
+
+        response = self.post([self.fever.pk, 999], diagnosis)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            response.data["error"]["symptoms"], ["Unknown symptom ids: 999"]
+        )
+        self.assertFalse(SymptomCheck.objects.exists())
+
+    def test_failed_diagnosis_writes_nothing(self):
+        def diagnosis(symptoms):
+            raise RuntimeError("provider down")
+
+        response = self.post([self.fever.pk], diagnosis)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data["error"]["code"], "diagnosis_failed")
+        self.assertFalse(SymptomCheck.objects.exists())
@@ -1,9 +1,17 @@
 from rest_framework import mixins, viewsets, permissions, status, serializers
+from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.throttling import ScopedRateThrottle
+from drf_spectacular.utils import extend_schema
 from rest_framework.pagination import PageNumberPagination
+from core.throttling import SlidingWindowRateThrottle
 from .models import Symptom, SymptomCheck, Condition
-from .serializers import SymptomSerializer, SymptomCheckSerializer, ConditionSerializer
+from .batch import create_checks
+from .serializers import (
+    SymptomSerializer,
+    SymptomCheckSerializer,
+    SymptomCheckBatchSerializer,
+    ConditionSerializer,
+)
 import logging
 
 logger = logging.getLogger(__name__)
@@ -23,7 +31,7 @@ class SymptomCheckViewSet(
 ):
     serializer_class = SymptomCheckSerializer
     permission_classes = [permissions.IsAuthenticated]
-    throttle_classes = [ScopedRateThrottle]
+    throttle_classes = [SlidingWindowRateThrottle]
     throttle_scope = "symptom_checks"
     pagination_class = StandardPagination
 
@@ -55,6 +63,81 @@ class SymptomCheckViewSet(
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR,
             )
 
+    def get_throttle_cost(self, request):
+        """
+        A batch takes a unit of its quota per distinct symptom set, counted
+        before validation and so at most what a valid batch may hold.
+        """
+        if self.action != "batch":
+            return 1
+        checks = request.data.get("checks") if isinstance(request.data, dict) else None
+        if not isinstance(checks, list):
+            return 1
+        distinct = len(
+            {
+                frozenset(map(str, check["symptoms"]))
+                for check in checks
+                if isinstance(check, dict) and isinstance(check.get("symptoms"), list)
+            }
+        )
+        return min(distinct, SymptomCheckBatchSerializer.max_sets())
+
+    @extend_schema(request=SymptomCheckBatchSerializer)
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="batch",
+        throttle_scope="symptom_check_batches",
+    )
+    def batch(self, request):
+        """
+        Create a symptom check for each of many symptom sets, with identical
+        sets diagnosed once and the AI calls made concurrently. Every set
+        gets its own result in input order; sets the AI budget had no room
+        for get a ``retry_after`` in seconds and no check. A valid batch of
+        which no check could be created is answered with 503, and with a
+        ``Retry-After`` header when sets were shed.
+        """
+        serializer = SymptomCheckBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        results = create_checks(request.user, serializer.validated_data["checks"])
+
+        checks = self.get_queryset().in_bulk(
+            [check.pk for check, _, _ in results if check is not None]
+        )
+        created = len(checks)
+        headers = {}
+        retry_after = max(
+            (retry_after for _, _, retry_after in results if retry_after is not None),
+            default=None,
+        )
+        if not created and retry_after is not None:
+            headers["Retry-After"] = str(retry_after)
+        return Response(
+            {
+                "created": created,
+                "failed": len(results) - created,
+                "results": [
+                    {
+                        "check": (
+                            None
+                            if check is None
+                            else SymptomCheckSerializer(checks[check.pk]).data
+                        ),
+                        "error": error,
+                        "retry_after": retry_after,
+                    }
+                    for check, error, retry_after in results
+                ],
+            },
+            status=(
+                status.HTTP_201_CREATED
+                if created
+                else status.HTTP_503_SERVICE_UNAVAILABLE
+            ),
+            headers=headers,
+        )
+
 
 class SymptomViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = SymptomSerializer